@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Create maDMP digest table."""
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0a26e617cc7d'
+down_revision = '2c30631e7cce'
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        'madmp_digest',
+        sa.Column('created', sa.DateTime(), nullable=False),
+        sa.Column('updated', sa.DateTime(), nullable=False),
+        sa.Column('digest', sa.String(length=64), nullable=False),
+        sa.Column(
+            'recids',
+            sa.JSON().with_variant(
+                postgresql.JSONB(none_as_null=True), 'postgresql'
+            ).with_variant(
+                sqlalchemy_utils.types.json.JSONType(), 'sqlite'
+            ),
+            nullable=False
+        ),
+        sa.PrimaryKeyConstraint('digest', name=op.f('pk_madmp_digest'))
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_table('madmp_digest')
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Create invenio-maDMP branch."""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2c30631e7cce'
+down_revision = None
+branch_labels = ('invenio_madmp',)
+depends_on = 'dbdbc1b19cf2'
+
+
+def upgrade():
+    """Upgrade database."""
+
+
+def downgrade():
+    """Downgrade database."""
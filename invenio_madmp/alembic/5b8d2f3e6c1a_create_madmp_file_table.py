@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Create maDMP file table."""
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5b8d2f3e6c1a'
+down_revision = 'e294dd7e8e76'
+branch_labels = ()
+depends_on = '2e97565eba72'
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        'madmp_file',
+        sa.Column('created', sa.DateTime(), nullable=False),
+        sa.Column('updated', sa.DateTime(), nullable=False),
+        sa.Column('digest', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('file_id', sqlalchemy_utils.types.uuid.UUIDType(),
+                  nullable=False),
+        sa.ForeignKeyConstraint(
+            ['file_id'], ['files_files.id'],
+            name=op.f('fk_madmp_file_file_id_files_files'),
+            ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('digest', 'size', name=op.f('pk_madmp_file'))
+    )
+    op.create_index(op.f('ix_madmp_file_file_id'), 'madmp_file',
+                    ['file_id'], unique=False)
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index(op.f('ix_madmp_file_file_id'), table_name='madmp_file')
+    op.drop_table('madmp_file')
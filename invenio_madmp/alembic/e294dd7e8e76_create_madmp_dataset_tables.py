@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Create maDMP and maDMP dataset tables."""
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e294dd7e8e76'
+down_revision = '0a26e617cc7d'
+branch_labels = ()
+depends_on = '862037093962'
+
+
+def json_type():
+    """Column type of JSON documents."""
+    return sa.JSON().with_variant(
+        postgresql.JSONB(none_as_null=True), 'postgresql'
+    ).with_variant(
+        sqlalchemy_utils.types.json.JSONType(), 'sqlite'
+    )
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        'madmp_dmp',
+        sa.Column('created', sa.DateTime(), nullable=False),
+        sa.Column('updated', sa.DateTime(), nullable=False),
+        sa.Column('id', sa.String(length=255), nullable=False),
+        sa.Column('header', json_type(), nullable=False),
+        sa.Column('version_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_madmp_dmp'))
+    )
+    op.create_table(
+        'madmp_dataset',
+        sa.Column('dmp_id', sa.String(length=255), nullable=False),
+        sa.Column('dataset_id', sa.String(length=255), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('document', json_type(), nullable=False),
+        sa.Column('record_id', sqlalchemy_utils.types.uuid.UUIDType(),
+                  nullable=False),
+        sa.ForeignKeyConstraint(
+            ['dmp_id'], ['madmp_dmp.id'],
+            name=op.f('fk_madmp_dataset_dmp_id_madmp_dmp'),
+            ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(
+            ['record_id'], ['records_metadata.id'],
+            name=op.f('fk_madmp_dataset_record_id_records_metadata'),
+            ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('dmp_id', 'dataset_id',
+                                name=op.f('pk_madmp_dataset'))
+    )
+    op.create_index(op.f('ix_madmp_dataset_record_id'), 'madmp_dataset',
+                    ['record_id'], unique=False)
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index(op.f('ix_madmp_dataset_record_id'),
+                  table_name='madmp_dataset')
+    op.drop_table('madmp_dataset')
+    op.drop_table('madmp_dmp')
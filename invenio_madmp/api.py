@@ -8,23 +8,45 @@
 """MaDMP REST API."""
 
 import json
-import os
 import uuid
+from json import JSONDecodeError
 
-from flask import Blueprint, jsonify, request
+from elasticsearch.exceptions import RequestError
+from flask import Blueprint, Response, current_app, jsonify, request, \
+    stream_with_context, url_for
+from flask_login import current_user, login_required
 from invenio_db import db
-from invenio_files_rest.models import ObjectVersion, Bucket
+from invenio_files_rest.errors import FilesException
+from invenio_files_rest.models import Bucket, MultipartObject, ObjectVersion, \
+    Part
 from invenio_files_rest.serializer import json_serializer
 from invenio_files_rest.signals import file_uploaded
-from invenio_indexer.api import RecordIndexer
+from invenio_files_rest.tasks import remove_file_data
 from invenio_pidstore import current_pidstore
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_records.api import Record
 from invenio_records_files.api import Record
+from invenio_records_files.models import RecordsBuckets
 from invenio_rest import ContentNegotiatedMethodView
-from json import JSONDecodeError
-from jsonschema import validate, ValidationError, FormatChecker
+from invenio_search import current_search_client
+from jsonschema import ValidationError
+from sqlalchemy.orm.exc import StaleDataError
 from werkzeug.exceptions import BadRequest
-
+from werkzeug.utils import import_string
+
+from .digests import document_digest, streamed_digest
+from .export import EXPORT_FORMATS, export_records
+from .files import store_file, verify_file
+from .indexer import MaDMPIndexer
+# get_license_mapping used to be defined here, keep it importable
+from .licenses import get_license_mapping, licenses
+from .mapping import extractor
+from .models import MaDMP, MaDMPDataset, MaDMPDigest, identifier_of
+from .patch import InvalidPatch, apply_patch
+from .proxies import current_madmp
+from .schemas import UnknownSchemaVersion, json_path, split_document
+from .search import FACETS, InvalidCursor, search, suggest
+from .streaming import InvalidStream, MaDMPStream
 
 blueprint = Blueprint(
     'madmp',
@@ -34,34 +56,55 @@ blueprint = Blueprint(
 )
 
 
-def get_license_mapping():
-    """Maps valid licenses."""
-    license_mapping = {
-        'Apache License 2.0': 'https://opensource.org/licenses/Apache-2.0',
-        '3-Clause BSD License': 'https://opensource.org/licenses/BSD-3-Clause',
-        '2-Clause BSD License': 'https://opensource.org/licenses/BSD-2-Clause',
-        'GNU General Public License': {
-            'GNU Library General Public License version 2': 'https://opensource.org/licenses/LGPL-2.0',
-            'GNU Lesser General Public License version 2.1': 'https://opensource.org/licenses/LGPL-2.1',
-            'GNU Lesser General Public License version 3': 'https://opensource.org/licenses/LGPL-3.0'
-        },
-        'GNU LGPL': {
-            'GNU General Public License version 2': 'https://opensource.org/licenses/GPL-2.0',
-            'GNU General Public License version 3': 'https://opensource.org/licenses/GPL-3.0'
-        },
-        'MIT': 'https://opensource.org/licenses/MIT',
-        'Mozilla Public License 2.0': 'https://opensource.org/licenses/MPL-2.0',
-        'Common Development and Distribution License 1.0': 'https://opensource.org/licenses/CDDL-1.0',
-        'Eclipse Public License version 2.0': 'https://opensource.org/licenses/EPL-2.0',
-
-        'CC BY': 'https://creativecommons.org/licenses/by/4.0/',
-        'CC BY-SA': 'https://creativecommons.org/licenses/by-sa/4.0/',
-        'CC BY-ND': 'https://creativecommons.org/licenses/by-nd/4.0/',
-        'CC BY-NC': 'https://creativecommons.org/licenses/by-nc/4.0/',
-        'CC BY-NC-SA': 'https://creativecommons.org/licenses/by-nc-sa/4.0/',
-        'CC BY-NC-ND': 'https://creativecommons.org/licenses/by-nc-nd/4.0/'
-    }
-    return license_mapping
+class IndexingError(Exception):
+    """The record was created but could not be indexed."""
+
+    def __init__(self, record_id):
+        """Initialize exception."""
+        super(IndexingError, self).__init__(
+            'Record {0} could not be indexed'.format(record_id)
+        )
+        self.record_id = record_id
+
+
+def recid_filter(rec_id):
+    """
+    Filters of the registered recid PID of a record.
+
+    The lookup uses the unique index of the PID store on the PID type and
+    value, so its cost does not grow with the number of records.
+
+    :param rec_id: the record identifier
+    :returns: tuple of SQLAlchemy filter expressions
+    """
+    return (
+        PersistentIdentifier.pid_type == 'recid',
+        PersistentIdentifier.pid_value == str(rec_id),
+        PersistentIdentifier.status == PIDStatus.REGISTERED,
+    )
+
+
+def current_owner():
+    """
+    Owner of the records created by the current request.
+
+    :returns: id of the authenticated user, as stored in the ``owner`` of records, None for
+        anonymous requests
+    """
+    return int(current_user.get_id()) if current_user.is_authenticated else None
+
+
+def get_record_bucket(rec_id):
+    """
+    Get the bucket of a record from its recid, through the records-buckets relation.
+
+    :param rec_id: the record identifier
+    :returns: the bucket id, None if the record has no bucket
+    """
+    return db.session.query(RecordsBuckets.bucket_id).join(
+        PersistentIdentifier,
+        PersistentIdentifier.object_uuid == RecordsBuckets.record_id,
+    ).filter(*recid_filter(rec_id)).scalar()
 
 
 class UploadMaDMP(ContentNegotiatedMethodView):
@@ -77,23 +120,17 @@ class UploadMaDMP(ContentNegotiatedMethodView):
         :returns: Created Record View.
         """
         global json_data
-        path = os.path.dirname(os.path.abspath(__file__))
-        filename = 'maDMP-schema.json'
+        madmp_stream = None
+        digest = None
 
         try:
-            with open(os.path.join(path, filename)) as json_file:
-                schema_data = json.load(json_file)
-        except IOError as io_exc:
-            response = jsonify({'message': 'Something went wrong', 'status': 500})
-            response.status_code = 500
-            print(io_exc)
-            return response
+            # None unless the body is JSON, also for multipart requests
+            request_json = request.get_json(silent=True)
 
-        try:
-            if 'file' not in request.files and not request.json:
+            if 'file' not in request.files and not request_json:
                 raise BadRequest('No file or json data in request')
 
-            if 'file' in request.files and request.json:
+            if 'file' in request.files and request_json:
                 raise BadRequest('Only file or data must be in request')
 
             if 'file' in request.files:
@@ -102,19 +139,53 @@ class UploadMaDMP(ContentNegotiatedMethodView):
                 if file.filename == '':
                     raise BadRequest('No file selected')
 
-                if len(file.read()) is 0:
-                    raise BadRequest('File is empty')
+                if current_app.config['INVENIO_MADMP_STREAMING_UPLOADS']:
+                    if not file.stream.read(1):
+                        raise BadRequest('File is empty')
+
+                    madmp_stream = MaDMPStream(file.stream)
+                    json_data = madmp_stream.header
+                else:
+                    content = file.read()
+                    if not content:
+                        raise BadRequest('File is empty')
 
-                json_data = json.load(file)
+                    json_data = json.loads(content)
 
-            elif request.json:
-                json_data = request.json
+            elif request_json:
+                json_data = request_json
 
                 if json_data is None:
                     raise BadRequest('JSON data is empty')
 
-            validate(instance=json_data, schema=schema_data, format_checker=FormatChecker())
+            digest = UploadMaDMP.digest(json_data, madmp_stream)
+            uploaded = UploadMaDMP.uploaded(digest)
+
+            if uploaded is not None:
+                return jsonify({'message': 'maDMP already uploaded', 'responses': uploaded, 'status': 200})
+
+            if current_app.config['INVENIO_MADMP_ASYNC_UPLOADS']:
+                UploadMaDMP.validate_envelope(json_data, madmp_stream)
+                job = current_madmp.jobs.submit(
+                    file.stream if 'file' in request.files else json_data,
+                    digest=digest,
+                    owner=current_owner()
+                )
+
+                response = jsonify({'message': 'Upload accepted', 'job_id': job.id, 'status': 202})
+                response.status_code = 202
+                response.headers['Location'] = url_for('madmp.job', job_id=job.id, _external=True)
+                return response
+
+            if madmp_stream is not None:
+                current_madmp.schemas.validate_stream(madmp_stream)
+            else:
+                current_madmp.schemas.validate(json_data)
 
+        except UnknownSchemaVersion as version_exc:
+            response = jsonify({'message': str(version_exc), 'status': 400})
+            response.status_code = 400
+            return response
         except BadRequest as bad_req_exc:
             response = jsonify({'message': bad_req_exc.description, 'status': 400})
             response.status_code = 400
@@ -123,10 +194,18 @@ class UploadMaDMP(ContentNegotiatedMethodView):
             response = jsonify({
                 'message': 'JSON does not validate against the schema',
                 'details': validation_exc.message,
+                'errors': getattr(validation_exc, 'errors', None) or [{
+                    'path': json_path(validation_exc.absolute_path),
+                    'message': validation_exc.message,
+                }],
                 'status': 400
             })
             response.status_code = 400
             return response
+        except InvalidStream as stream_exc:
+            response = jsonify({'message': 'JSON syntax error: ' + str(stream_exc), 'status': 400})
+            response.status_code = 400
+            return response
         except JSONDecodeError as json_exc:
             response = jsonify({'message': 'JSON syntax error: ' + json_exc.msg, 'status': 400})
             response.status_code = 400
@@ -143,7 +222,10 @@ class UploadMaDMP(ContentNegotiatedMethodView):
             return response
         else:
             try:
-                data = UploadMaDMP.extract_data(json_data)
+                if madmp_stream is not None:
+                    data = UploadMaDMP.extract_stream(madmp_stream)
+                else:
+                    data = UploadMaDMP.extract_data(json_data)
                 if not data:
                     raise BadRequest
             except BadRequest:
@@ -159,211 +241,308 @@ class UploadMaDMP(ContentNegotiatedMethodView):
                 print('Extact data method: ' + exc.__str__())
                 return response
 
-        calls = 1
         responses = {'responses': []}
+        batch_size = current_app.config['INVENIO_MADMP_RECORDS_BATCH_SIZE']
 
-        for rec in data:
-            try:
-                _ = UploadMaDMP.create_record(**rec)
-            except Exception as exc:
-                response = {'id': calls, 'message': 'Something went wrong', 'status': 500}
-                responses['responses'].append(response)
-                print("Error inserting record: " + exc.__str__())
-            else:
-                response = {'id': calls, 'message': 'Metadata created successfully', 'status': 201}
-                responses['responses'].append(response)
+        for batch_responses in UploadMaDMP.ingest(data, batch_size, current_owner()):
+            responses['responses'].extend(batch_responses)
 
-            calls += 1
+        UploadMaDMP.remember(digest, responses['responses'], json_data, madmp_stream)
 
         resp = jsonify(responses)
         resp.status_code = 201 if not any(item['status'] == 500 for item in responses['responses']) else 500
         return resp
 
     @staticmethod
-    def validate_license(value):
+    def digest(json_data, madmp_stream=None):
         """
-        Checks if the License Reference is correct.
+        Digest identifying the content of an uploaded maDMP.
 
-        :param value: URL of license
-        :returns: True if license is found in the mapping, False otherwise.
+        :param json_data: the maDMP as dictionary
+        :param madmp_stream: :class:`invenio_madmp.streaming.MaDMPStream` of the maDMP, if streamed
+        :returns: the digest as hex string, None if deduplication is disabled
         """
-        if value in get_license_mapping().values():
-            return True
-
-        for k, v in get_license_mapping().items():
-            if isinstance(v, dict):
-                if value in v.values():
-                    return True
-
-        return False
+        if not current_app.config['INVENIO_MADMP_DEDUPLICATE_UPLOADS']:
+            return None
+        if madmp_stream is not None and madmp_stream.datasets_streamed:
+            return streamed_digest(madmp_stream.header, madmp_stream.datasets())
+        return document_digest(json_data)
 
     @staticmethod
-    def extract_data(all_data):
+    def uploaded(digest):
         """
-        Get only specific data from DMP to store.
+        Responses for a maDMP that was already uploaded.
 
-        :param all_data: dictionary with JSON data
-        :returns: dictionary with certain extracted values, None if the structure is not valid
-        """
+        The digest is ignored if any of its records was deleted since, so the
+        maDMP is uploaded again and the digest replaced.
 
-        def dataset_prim_keys():
-            return ('title', 'issued', 'type', 'personal_data', 'sensitive_data', 'description')
+        :param digest: the digest of the maDMP
+        :returns: list with a response per existing record, None if the maDMP was not uploaded
+        """
+        if digest is None:
+            return None
+
+        recids = MaDMPDigest.get_recids(digest)
+        if not recids:
+            return None
+
+        registered = PersistentIdentifier.query.filter(
+            PersistentIdentifier.pid_type == 'recid',
+            PersistentIdentifier.pid_value.in_([str(recid) for recid in recids]),
+            PersistentIdentifier.status == PIDStatus.REGISTERED,
+        ).count()
+        if registered != len(set(recids)):
+            return None
+
+        return [
+            {'id': calls, 'recid': recid, 'message': 'Metadata unchanged', 'status': 200}
+            for calls, recid in enumerate(recids, 1)
+        ]
 
-        def split_datasets():
-            final_values = []
+    @staticmethod
+    def remember(digest, responses, json_data=None, madmp_stream=None):
+        """
+        Store the digest and the datasets of an uploaded maDMP, if all its records were created.
 
-            for dt in range(1, dataset_counter):
-                tmp = {}
+        The stored maDMP can then be patched, see :class:`MaDMPResource`.
 
-                for field in list(desired_values):
-                    if field != 'dataset' + str(dt):
-                        tmp.update({field: desired_values[field]})
-                    else:
-                        tmp.update(desired_values.pop('dataset' + str(dt)))
-                        break
+        :param digest: the digest of the maDMP
+        :param responses: the responses of its datasets
+        :param json_data: the maDMP as dictionary
+        :param madmp_stream: :class:`invenio_madmp.streaming.MaDMPStream` of the maDMP, if streamed
+        """
+        if not responses or any(item['status'] != 201 for item in responses):
+            return
 
-                final_values.append(tmp)
+        recids = [item['recid'] for item in responses]
 
-            return final_values
+        try:
+            if digest is not None:
+                MaDMPDigest.store(digest, recids)
 
-        desired_values = {}
+            if madmp_stream is not None:
+                MaDMP.store(madmp_stream.header, madmp_stream.datasets(), recids)
+            elif json_data is not None:
+                header, datasets = split_document(json_data)
+                MaDMP.store(header, datasets or [], recids)
 
-        if all_data.get('dmp'):
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            print('Error storing maDMP: ' + exc.__str__())
 
-            for field in all_data['dmp']:
-                if field == 'ethical_issues_exist':
-                    desired_values.update({field: all_data['dmp'][field]})
+    @staticmethod
+    def validate_envelope(json_data, madmp_stream=None):
+        """
+        Validate a maDMP without validating its datasets.
 
-                elif field == 'contact':
+        :param json_data: the maDMP, or its header if streamed
+        :param madmp_stream: :class:`invenio_madmp.streaming.MaDMPStream` of the maDMP, if streamed
+        :raises jsonschema.ValidationError: if the envelope is not valid
+        """
+        schemas = current_madmp.schemas
 
-                    temp = {field: {}}
+        if madmp_stream is not None:
+            header, datasets_found = madmp_stream.header, madmp_stream.datasets_streamed
+            dataset_count = madmp_stream.dataset_count
+        else:
+            header, datasets = split_document(json_data)
+            datasets_found, dataset_count = datasets is not None, len(datasets or ())
 
-                    for key in all_data['dmp'][field]:
+        if schemas.splittable(header, datasets_found):
+            schemas.validate_envelope(header, dataset_count)
+        else:
+            schemas.validate(header)
 
-                        if key == 'name' or key == 'mbox':
-                            temp[field].update({key: all_data['dmp'][field][key]})
+    @staticmethod
+    def validate_license(value):
+        """
+        Checks if the License Reference is correct.
 
-                    desired_values.update(temp)
+        :param value: URL of license
+        :returns: True if license is found in the mapping, False otherwise.
+        """
+        return value in licenses
 
-                elif field == 'contributor':
-                    temp1 = {}
-                    temp2 = {field + 's': []}
+    @staticmethod
+    def extract_data(all_data):
+        """
+        Get only specific data from DMP to store.
 
-                    for item in all_data['dmp'][field]:
+        The values are extracted according to :data:`invenio_madmp.mapping.MADMP_MAPPING`.
 
-                        for key in item:
-                            if key == 'name' or key == 'mbox' or key == 'role':
-                                if key == 'mbox':
-                                    temp1.update({'email': item[key]})
-                                else:
-                                    temp1.update({key: item[key]})
+        :param all_data: dictionary with JSON data
+        :returns: list with the extracted values of every dataset, None if the structure is not valid
+        """
+        return extractor.extract(all_data)
 
-                        temp2[field + 's'].append(temp1.copy())
+    @staticmethod
+    def extract_stream(madmp_stream):
+        """
+        Get the data to store from a streamed DMP, one dataset at a time.
 
-                    desired_values.update(temp2)
+        :param madmp_stream: :class:`invenio_madmp.streaming.MaDMPStream` of a valid maDMP
+        :returns: generator of dictionaries with the extracted values of every dataset
+        """
+        common = extractor.extract_common(madmp_stream.header['dmp'])
 
-                elif field == 'dataset':
-                    temp = {}
+        for dataset in madmp_stream.datasets():
+            yield extractor.extract_dataset(dataset, common)
 
-                    # initialize dataset dicts
-                    for x in range(1, len(all_data['dmp'][field]) + 1):
-                        temp.update({
-                            field + str(x): {}
-                        })
-                    dataset_counter = 1
+    @staticmethod
+    def create_record(**kwargs):
+        """
+        Insert the record.
 
-                    # loop through dataset objects
-                    for dataset in all_data['dmp'][field]:
-                        license_exists = False
+        :returns: Created Record's Bucket ID
+        """
+        deferred = current_app.config['INVENIO_MADMP_INDEXER_DEFERRED']
 
-                        # loop through object keys
-                        for key in dataset:
+        with db.session.begin_nested():
+            rec_uuid = uuid.uuid4()
+            current_pidstore.minters['recid'](rec_uuid, kwargs)
+            created_record = Record.create(kwargs, id_=rec_uuid)
+            if not deferred:
+                MaDMPIndexer().index(created_record)
 
-                            if not isinstance(dataset[key], (dict, list)):
-                                if key in dataset_prim_keys():
-                                    temp[field + str(dataset_counter)].update({'upload_type': dataset[key]}) \
-                                        if key == 'type'\
-                                        else temp[field + str(dataset_counter)].update({key: dataset[key]})
+        db.session.commit()
 
-                            elif isinstance(dataset[key], list) and key == 'distribution':
-                                temp2 = []
-                                for item2 in dataset[key]:  # distribution obj
+        if deferred:
+            current_madmp.index_queue.enqueue(
+                [created_record.id], app=current_app._get_current_object()
+            )
 
-                                    for key2 in item2:  # distribution key
+        return created_record.get('_bucket')
 
-                                        if key2 == 'data_access':
-                                            temp[field + str(dataset_counter)].update({key2: item2[key2]})
+    @staticmethod
+    def ingest(data, batch_size=None, owner=None):
+        """
+        Create the records of the extracted data batch by batch.
 
-                                        # license is array so more nested loops are needed
-                                        elif key2 == 'license':
-                                            license_exists = True
-                                            license_fields = ('license_ref', 'start_date')
+        :param data: iterable with the extracted values of every dataset
+        :param batch_size: maximum number of records per transaction
+        :param owner: id of the user owning the records, None for records without owner
+        :returns: generator with the list of responses of every batch
+        """
+        calls = 1
+        pid_field = current_app.config['PIDSTORE_RECID_FIELD']
 
-                                            for dt_license in item2[key2]:
-                                                for key3 in dt_license:
+        for batch in UploadMaDMP.batches(data, batch_size):
+            if owner is not None:
+                for item in batch:
+                    item['owner'] = owner
 
-                                                    if key3 == 'license_ref':
-                                                        if not UploadMaDMP.validate_license(dt_license[key3]):
-                                                            continue
+            try:
+                results = UploadMaDMP.create_records(batch)
+            except Exception as exc:
+                db.session.rollback()
+                print("Error inserting records: " + exc.__str__())
+                results = [exc] * len(batch)
+
+            responses = []
+            for result in results:
+                if isinstance(result, Exception):
+                    response = {'id': calls, 'message': 'Something went wrong', 'status': 500}
+                    print("Error inserting record: " + result.__str__())
+                else:
+                    response = {
+                        'id': calls,
+                        'recid': result.get(pid_field),
+                        'message': 'Metadata created successfully',
+                        'status': 201
+                    }
+                responses.append(response)
+
+                calls += 1
+
+            yield responses
 
-                                                        temp2.append({key3: dt_license[key3]})
+    @staticmethod
+    def batches(data, size=None):
+        """
+        Split the extracted data in batches.
 
-                                                    elif key3 == 'start_date':
-                                                        temp[field + str(dataset_counter)].update(
-                                                            {'license_' + key3: dt_license[key3]}
-                                                        )
+        :param data: iterable with the extracted values of every dataset
+        :param size: maximum number of items per batch, all items in one batch if None
+        :returns: generator of lists
+        """
+        batch = []
+        for item in data:
+            batch.append(item)
+            if size and len(batch) >= size:
+                yield batch
+                batch = []
 
-                                            # check if license was appended and re-append
-                                            if len(temp2) is not 0:
-                                                temp[field + str(dataset_counter)].update({key2: temp2})
+        if batch:
+            yield batch
 
-                        if 'issued' in temp[field + str(dataset_counter)]:
-                            # rename key issued to publication_date
-                            temp[field + str(dataset_counter)]['publication_date'] = \
-                                temp[field + str(dataset_counter)].pop('issued')
+    @staticmethod
+    def create_records(batch):
+        """
+        Insert many records in a single transaction and index them in bulk.
 
-                        if license_exists and len(temp2) is not 0:
-                            found = False
-                            for k in get_license_mapping():
-                                if found: break
+        PIDs are minted in the same transaction and everything is committed
+        once, see :meth:`insert_records` and :meth:`index_records`.
 
-                                if isinstance(get_license_mapping()[k], dict):
-                                    for k_nested in get_license_mapping()[k]:
-                                        if get_license_mapping()[k][k_nested] == \
-                                                temp[field + str(dataset_counter)].get('license')[0].get('license_ref'):
+        :param batch: list of dictionaries with the metadata of each record
+        :returns: list with the created Record, or the raised exception, of every item
+        """
+        results = UploadMaDMP.insert_records(batch)
+        db.session.commit()
+        return UploadMaDMP.index_records(results)
 
-                                            temp[field + str(dataset_counter)]['license'] = k_nested
-                                            found = True
-                                            break
-                                else:
-                                    if get_license_mapping()[k] == \
-                                            temp[field + str(dataset_counter)].get('license')[0].get('license_ref'):
+    @staticmethod
+    def insert_records(batch):
+        """
+        Insert many records without committing the session.
 
-                                        temp[field + str(dataset_counter)]['license'] = k
-                                        break
+        Every record gets its own savepoint, so a failing dataset does not
+        roll back the rest of the batch.
 
-                        dataset_counter += 1
+        :param batch: list of dictionaries with the metadata of each record
+        :returns: list with the created Record, or the raised exception, of every item
+        """
+        results = []
 
-                    desired_values.update(temp)
+        for kwargs in batch:
+            try:
+                with db.session.begin_nested():
+                    rec_uuid = uuid.uuid4()
+                    current_pidstore.minters['recid'](rec_uuid, kwargs)
+                    results.append(Record.create(kwargs, id_=rec_uuid))
+            except Exception as exc:
+                results.append(exc)
 
-        return split_datasets() if desired_values else None
+        return results
 
     @staticmethod
-    def create_record(**kwargs):
+    def index_records(results):
         """
-        Insert the record.
+        Index committed records in bulk.
 
-        :returns: Created Record's Bucket ID
+        With ``INVENIO_MADMP_INDEXER_DEFERRED`` the records are put on the
+        indexing queue instead of being indexed within the request.
+
+        :param results: list with the created Record, or the raised exception, of every item
+        :returns: the results, with an :class:`IndexingError` for every record that was not indexed
         """
-        with db.session.begin_nested():
-            rec_uuid = uuid.uuid4()
-            current_pidstore.minters['recid'](rec_uuid, kwargs)
-            created_record = Record.create(kwargs, id_=rec_uuid)
-            RecordIndexer().index(created_record)
+        created = [result for result in results if not isinstance(result, Exception)]
 
-        db.session.commit()
+        if current_app.config['INVENIO_MADMP_INDEXER_DEFERRED']:
+            current_madmp.index_queue.enqueue(
+                [record.id for record in created],
+                app=current_app._get_current_object()
+            )
+            return results
 
-        return created_record.get('_bucket')
+        failed = set(MaDMPIndexer().bulk_index_records(created))
+
+        return [
+            IndexingError(result.id)
+            if not isinstance(result, Exception) and str(result.id) in failed
+            else result
+            for result in results
+        ]
 
     @staticmethod
     def create_object(bucket, key, file_instance):
@@ -379,23 +558,843 @@ class UploadMaDMP(ContentNegotiatedMethodView):
         else:
             size_limit = bucket.size_limit
 
+        if current_app.config['INVENIO_MADMP_DEDUPLICATE_FILES']:
+            obj = store_file(bucket, key, file_instance.stream, size_limit)
+        else:
+            with db.session.begin_nested():
+                obj = ObjectVersion.create(bucket, key)
+                obj.set_contents(
+                    stream=file_instance.stream,
+                    size_limit=size_limit
+                )
+
+            db.session.commit()
+
+        UploadMaDMP.verify(obj)
+        file_uploaded.send(obj)
+
+    @staticmethod
+    def verify(obj):
+        """
+        Verify the checksum of a new file, in the background if it is large.
+
+        Files smaller than ``INVENIO_MADMP_FILE_VERIFY_SIZE`` are not verified,
+        their checksum is computed while they are written.
+
+        :param obj: the object version of the file
+        """
+        verify_size = current_app.config['INVENIO_MADMP_FILE_VERIFY_SIZE']
+        if verify_size is None or obj.file.size < verify_size or \
+                obj.file.last_check_at is not None:
+            return
+
+        current_madmp.jobs.run(verify_file, str(obj.file_id))
+
+
+class UploadBatch(ContentNegotiatedMethodView):
+    """Upload many maDMPs as newline-delimited JSON."""
+
+    def post(self):
+        """
+        Validate and store every maDMP of the request body, one per line.
+
+        The body is read one line at a time and one result line is streamed
+        back per input line, with the line number as ``id``, a ``message``,
+        a ``status`` and, for stored maDMPs, the ``responses`` of their
+        datasets. Blank lines are skipped.
+
+        :returns: NDJSON response with the result of every line
+        """
+        if not request.content_length and not request.headers.get('Transfer-Encoding'):
+            response = jsonify({'message': 'No data in request', 'status': 400})
+            response.status_code = 400
+            return response
+
+        stream = request.files['file'].stream if 'file' in request.files else request.stream
+
+        def generate():
+            for line_number, line in enumerate(stream, 1):
+                if line.strip():
+                    yield json.dumps(UploadBatch.process_line(line, line_number)) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    @staticmethod
+    def process_line(line, line_number):
+        """
+        Validate and store the maDMP of one line.
+
+        :param line: the maDMP as JSON
+        :param line_number: number of the line in the request body
+        :returns: dictionary with the result of the line
+        """
+        try:
+            json_data = json.loads(line)
+            digest = UploadMaDMP.digest(json_data)
+            uploaded = UploadMaDMP.uploaded(digest)
+
+            if uploaded is not None:
+                return {'id': line_number, 'message': 'maDMP already uploaded',
+                        'responses': uploaded, 'status': 200}
+
+            current_madmp.schemas.validate(json_data)
+            data = UploadMaDMP.extract_data(json_data)
+            if not data:
+                raise BadRequest('Could not extract any data. Check again your json structure')
+        except UnknownSchemaVersion as version_exc:
+            return {'id': line_number, 'message': str(version_exc), 'status': 400}
+        except BadRequest as bad_req_exc:
+            return {'id': line_number, 'message': bad_req_exc.description, 'status': 400}
+        except ValidationError as validation_exc:
+            return {
+                'id': line_number,
+                'message': 'JSON does not validate against the schema',
+                'details': validation_exc.message,
+                'errors': getattr(validation_exc, 'errors', None) or [{
+                    'path': json_path(validation_exc.absolute_path),
+                    'message': validation_exc.message,
+                }],
+                'status': 400
+            }
+        except (JSONDecodeError, UnicodeDecodeError) as json_exc:
+            return {'id': line_number, 'message': 'JSON syntax error: ' + str(json_exc), 'status': 400}
+        except Exception as exc:
+            print('Batch line ' + str(line_number) + ': ' + exc.__str__())
+            return {'id': line_number, 'message': 'Something went wrong', 'status': 500}
+
+        responses = []
+        batch_size = current_app.config['INVENIO_MADMP_RECORDS_BATCH_SIZE']
+
+        for batch_responses in UploadMaDMP.ingest(data, batch_size, current_owner()):
+            responses.extend(batch_responses)
+
+        UploadMaDMP.remember(digest, responses, json_data)
+
+        if any(item['status'] == 500 for item in responses):
+            return {'id': line_number, 'message': 'Some records could not be created',
+                    'responses': responses, 'status': 500}
+
+        return {'id': line_number, 'message': 'Metadata created successfully',
+                'responses': responses, 'status': 201}
+
+
+class MaDMPResource(ContentNegotiatedMethodView):
+    """A stored maDMP, which can be patched by the owner of its records."""
+
+    decorators = [login_required]
+
+    def get(self, dmp_id):
+        """
+        Get a stored maDMP.
+
+        :param dmp_id: the identifier of the maDMP
+        :returns: the maDMP as last uploaded or patched
+        """
+        madmp = MaDMP.query.get(dmp_id)
+
+        if madmp is None:
+            response = jsonify({'message': 'maDMP not found', 'status': 404})
+            response.status_code = 404
+            return response
+
+        return jsonify(madmp.to_document())
+
+    def patch(self, dmp_id):
+        """
+        Update a stored maDMP with a JSON merge patch or a JSON patch.
+
+        The patched maDMP is validated, then only the records of the datasets that changed are
+        updated as new revisions and indexed again. Datasets are matched to their records through
+        ``dataset_id``, new datasets get new records and the records of removed datasets are deleted.
+
+        :param dmp_id: the identifier of the maDMP
+        :returns: the recids of the updated, created and deleted records
+        """
+        madmp = MaDMP.query.get(dmp_id)
+
+        if madmp is None:
+            response = jsonify({'message': 'maDMP not found', 'status': 404})
+            response.status_code = 404
+            return response
+
+        if not MaDMPResource.can_patch(madmp):
+            response = jsonify({'message': 'You are not allowed to patch this maDMP', 'status': 403})
+            response.status_code = 403
+            return response
+
+        try:
+            patch = json.loads(request.get_data())
+            document = apply_patch(madmp.to_document(), patch, request.mimetype)
+
+            if identifier_of(document.get('dmp'), 'dmp_id') != dmp_id:
+                raise BadRequest('The dmp_id of a maDMP cannot be changed')
+
+            current_madmp.schemas.validate(document)
+            header, datasets = split_document(document)
+
+            dataset_ids = [identifier_of(dataset, 'dataset_id') for dataset in datasets]
+            if None in dataset_ids or len(set(dataset_ids)) != len(dataset_ids):
+                raise BadRequest('Every dataset needs a unique dataset_id identifier')
+
+            result = MaDMPResource.update(madmp, header, datasets)
+
+        except (InvalidPatch, JSONDecodeError) as patch_exc:
+            response = jsonify({'message': 'Invalid patch: ' + str(patch_exc), 'status': 400})
+            response.status_code = 400
+            return response
+        except UnknownSchemaVersion as version_exc:
+            response = jsonify({'message': str(version_exc), 'status': 400})
+            response.status_code = 400
+            return response
+        except BadRequest as bad_req_exc:
+            response = jsonify({'message': bad_req_exc.description, 'status': 400})
+            response.status_code = 400
+            return response
+        except ValidationError as validation_exc:
+            response = jsonify({
+                'message': 'JSON does not validate against the schema',
+                'details': validation_exc.message,
+                'errors': getattr(validation_exc, 'errors', None) or [{
+                    'path': json_path(validation_exc.absolute_path),
+                    'message': validation_exc.message,
+                }],
+                'status': 400
+            })
+            response.status_code = 400
+            return response
+        except StaleDataError:
+            db.session.rollback()
+            response = jsonify({'message': 'The maDMP was modified concurrently', 'status': 409})
+            response.status_code = 409
+            return response
+        except Exception as exc:
+            db.session.rollback()
+            response = jsonify({'message': 'Something went wrong', 'status': 500})
+            response.status_code = 500
+            print('Patch maDMP: ' + exc.__str__())
+            return response
+
+        result.update({'message': 'maDMP updated', 'status': 200})
+        return jsonify(result)
+
+    @staticmethod
+    def can_patch(madmp):
+        """
+        Checks if the current user may patch a maDMP.
+
+        Users may patch the maDMPs whose records they all own. Other users need the permission
+        given by ``INVENIO_MADMP_PATCH_PERMISSION_FACTORY``.
+
+        :param madmp: the stored :class:`invenio_madmp.models.MaDMP`
+        :returns: True if the user may patch the maDMP, False otherwise
+        """
+        permission_factory = current_app.config['INVENIO_MADMP_PATCH_PERMISSION_FACTORY']
+        if permission_factory is not None:
+            if isinstance(permission_factory, str):
+                permission_factory = import_string(permission_factory)
+            if permission_factory(madmp).can():
+                return True
+
+        owners = {
+            record.get('owner')
+            for record in Record.get_records([row.record_id for row in madmp.datasets], with_deleted=True)
+        }
+        return owners == {current_owner()}
+
+    @staticmethod
+    def update(madmp, header, datasets):
+        """
+        Apply a patched maDMP to its records.
+
+        Records, PIDs and the stored maDMP are changed in a single transaction, and the records
+        are indexed once it is committed.
+
+        :param madmp: the stored :class:`invenio_madmp.models.MaDMP`
+        :param header: the patched maDMP without ``dmp.dataset``
+        :param datasets: the patched datasets, all with a unique identifier
+        :returns: dictionary with the recids of the updated, created and deleted records
+        """
+        pid_field = current_app.config['PIDSTORE_RECID_FIELD']
+        previous = document_digest(madmp.to_document())
+        common = extractor.extract_common(header['dmp'])
+        common_changed = common != extractor.extract_common(madmp.header['dmp'])
+
+        rows = {row.dataset_id: row for row in madmp.datasets}
+        kept = [identifier_of(dataset, 'dataset_id') for dataset in datasets]
+        kept_ids = frozenset(kept)
+        removed = [row for dataset_id, row in rows.items() if dataset_id not in kept_ids]
+
+        records = {
+            record.id: record
+            for record in Record.get_records(
+                [row.record_id for row in rows.values()], with_deleted=True
+            )
+        }
+
+        updated, created, deleted = [], [], []
+        new_datasets = []
+
         with db.session.begin_nested():
-            obj = ObjectVersion.create(bucket, key)
-            obj.set_contents(
-                stream=file_instance.stream,
-                size_limit=size_limit
+            for position, (dataset_id, dataset) in enumerate(zip(kept, datasets)):
+                row = rows.get(dataset_id)
+                if row is None:
+                    new_datasets.append((position, dataset_id, dataset))
+                    continue
+
+                row.position = position
+                if not common_changed and row.document == dataset:
+                    continue
+                row.document = dataset
+
+                record = records[row.record_id]
+                data = {key: value for key, value in record.items() if key not in extractor.record_keys}
+                data.update(extractor.extract_dataset(dataset, common))
+
+                if data != dict(record):
+                    record.clear()
+                    record.update(data)
+                    record.commit()
+                    updated.append(record)
+
+            for row in removed:
+                record = records[row.record_id]
+                deleted.append(record.get(pid_field))
+                PersistentIdentifier.get('recid', str(record.get(pid_field))).delete()
+                record.delete()
+                madmp.datasets.remove(row)
+
+            madmp.header = header
+
+        owner = current_owner()
+        results = UploadMaDMP.insert_records([
+            dict(extractor.extract_dataset(dataset, common), owner=owner)
+            for _, _, dataset in new_datasets
+        ])
+        for (position, dataset_id, dataset), result in zip(new_datasets, results):
+            if isinstance(result, Exception):
+                print('Error creating record of dataset ' + dataset_id + ': ' + result.__str__())
+                continue
+            created.append(result)
+            madmp.datasets.append(MaDMPDataset(
+                dataset_id=dataset_id, position=position, document=dataset, record_id=result.id,
+            ))
+
+        # Uploads of the maDMP as it was before must not return the patched records
+        MaDMPDigest.remove(previous)
+
+        db.session.commit()
+
+        MaDMPResource.reindex(updated + created, [records[row.record_id] for row in removed])
+
+        return {
+            'updated': [record.get(pid_field) for record in updated],
+            'created': [record.get(pid_field) for record in created],
+            'deleted': deleted,
+        }
+
+    @staticmethod
+    def reindex(updated, deleted):
+        """
+        Index the updated records and remove the deleted ones from the index.
+
+        :param updated: list of updated and created records
+        :param deleted: list of deleted records
+        """
+        if current_app.config['INVENIO_MADMP_INDEXER_DEFERRED']:
+            current_madmp.index_queue.enqueue(
+                [record.id for record in updated],
+                app=current_app._get_current_object()
             )
+        elif updated:
+            failed = MaDMPIndexer().bulk_index_records(updated)
+            for record_id in failed:
+                print('Error indexing record ' + record_id)
+
+        indexer = MaDMPIndexer()
+        for record in deleted:
+            try:
+                indexer.delete(record)
+            except Exception as exc:
+                print('Error removing record from index: ' + exc.__str__())
+
+
+class UploadJob(ContentNegotiatedMethodView):
+    """State of an asynchronous maDMP upload."""
+
+    def get(self, job_id):
+        """
+        Report the progress of an upload job.
+
+        :param job_id: the job id returned by the upload
+        :returns: the job state with the responses of the processed datasets
+        """
+        job = current_madmp.jobs.store.get(job_id)
+
+        if job is None:
+            response = jsonify({'message': 'Job not found', 'status': 404})
+            response.status_code = 404
+            return response
+
+        return jsonify(job.to_dict())
+
+
+class BulkExport(ContentNegotiatedMethodView):
+    """Export of all records as maDMPs."""
+
+    def get(self):
+        """
+        Stream every record as NDJSON or as a ZIP archive.
+
+        The format is given by the ``format`` query argument, ``ndjson`` by
+        default. Records are read and serialized while the response is sent.
+
+        :returns: NDJSON response with one maDMP per line, or ZIP archive
+            with one maDMP file per record
+        """
+        format = request.args.get('format', 'ndjson')
+
+        if format not in EXPORT_FORMATS:
+            response = jsonify({
+                'message': 'Unknown format, use one of: ' + ', '.join(EXPORT_FORMATS),
+                'status': 400,
+            })
+            response.status_code = 400
+            return response
+
+        output = export_records(format, current_app.config['INVENIO_MADMP_EXPORT_BATCH_SIZE'])
+
+        if format == 'zip':
+            response = Response(stream_with_context(output), mimetype='application/zip')
+            response.headers['Content-Disposition'] = 'attachment; filename=maDMP-export.zip'
+            return response
+
+        return Response(stream_with_context(output), mimetype='application/x-ndjson')
+
+
+class MaDMPSearch(ContentNegotiatedMethodView):
+    """Faceted search of the records."""
+
+    def error(self, message, status=400):
+        """Build an error response."""
+        response = jsonify({'message': message, 'status': status})
+        response.status_code = status
+        return response
+
+    def get(self):
+        """
+        Search the records and count the values of their facets.
+
+        The query string is given by the ``q`` query argument and the facet
+        values to keep by arguments named after the facets, e.g.
+        ``?license=CC-BY-4.0&license=CC0-1.0&personal_data=no``. Values of
+        the same facet are combined with OR, facets with AND. The next page
+        is requested with the ``search_after`` cursor of the response.
+
+        :returns: JSON with the ``hits``, the ``facets`` counts and the
+            ``links`` to the next page
+        """
+        config = current_app.config
+
+        try:
+            size = int(request.args.get('size', 10))
+        except ValueError:
+            return self.error('Invalid size')
+        if not 0 < size <= config['INVENIO_MADMP_SEARCH_MAX_SIZE']:
+            return self.error('Size must be between 1 and {0}'.format(
+                config['INVENIO_MADMP_SEARCH_MAX_SIZE']))
+
+        try:
+            result = search(
+                current_search_client,
+                config['INVENIO_MADMP_SEARCH_INDEX'],
+                q=request.args.get('q', ''),
+                filters={facet: request.args.getlist(facet) for facet in FACETS},
+                size=size,
+                search_after=request.args.get('search_after'),
+                facet_cache=current_madmp.facet_cache,
+                facet_size=config['INVENIO_MADMP_SEARCH_FACET_SIZE'],
+            )
+        except InvalidCursor as exc:
+            return self.error(str(exc))
+        except RequestError as exc:
+            return self.error('Invalid query: ' + str(exc.error))
+
+        links = {'self': request.url}
+        if result['next']:
+            args = request.args.to_dict(flat=False)
+            args['search_after'] = result['next']
+            links['next'] = url_for('.search', _external=True, **args)
+
+        return jsonify({
+            'hits': {'total': result['total'], 'hits': result['hits']},
+            'facets': result['facets'],
+            'links': links,
+        })
+
+
+class MaDMPSuggest(MaDMPSearch):
+    """Suggestions of record titles, while a title is typed."""
+
+    def get(self):
+        """
+        Suggest the titles starting with the ``q`` query argument.
+
+        The suggestions can be limited to the records of owners, given by
+        ``owner`` query arguments. Responses have an ETag and may be cached
+        by clients and proxies for ``INVENIO_MADMP_SUGGEST_MAX_AGE`` seconds.
+
+        :returns: JSON with the ``suggestions``, as ``{'id', 'title'}``
+        """
+        config = current_app.config
+        prefix = request.args.get('q', '')
+
+        if len(prefix) > 256:
+            return self.error('Query too long')
+
+        try:
+            owners = [int(owner) for owner in request.args.getlist('owner')]
+        except ValueError:
+            return self.error('Invalid owner')
+
+        suggestions = []
+        if prefix.strip():
+            try:
+                suggestions = suggest(
+                    current_search_client,
+                    config['INVENIO_MADMP_SEARCH_INDEX'],
+                    prefix,
+                    owners=owners,
+                    size=config['INVENIO_MADMP_SUGGEST_SIZE'],
+                    cache=current_madmp.suggest_cache,
+                )
+            except RequestError as exc:
+                return self.error('Invalid query: ' + str(exc.error))
+
+        response = jsonify({'suggestions': suggestions})
+        response.cache_control.public = True
+        response.cache_control.max_age = config['INVENIO_MADMP_SUGGEST_MAX_AGE']
+        response.add_etag()
+        return response.make_conditional(request)
+
+
+class MultipartUpload(ContentNegotiatedMethodView):
+    """Resumable upload of a large file of a record, in parts.
+
+    The file is stored in the bucket of the record as a multipart object of
+    ``invenio-files-rest``. Parts can be uploaded in any order and in
+    parallel, and uploading a part again replaces it. Once all parts are
+    uploaded, completing the upload merges them into a new object version.
+    """
+
+    decorators = [login_required]
+
+    @staticmethod
+    def error(message, status):
+        """JSON error response."""
+        response = jsonify({'message': message, 'status': status})
+        response.status_code = status
+        return response
+
+    @staticmethod
+    def get_multipart(rec_id, key, upload_id):
+        """
+        Get an unfinished upload of a record file.
+
+        :param rec_id: the record identifier
+        :param key: the file name
+        :param upload_id: the upload id
+        :returns: the :class:`invenio_files_rest.models.MultipartObject`, None
+            if it does not exist
+        """
+        bucket = get_record_bucket(rec_id)
+        if bucket is None:
+            return None
+
+        try:
+            upload_id = uuid.UUID(upload_id)
+        except ValueError:
+            return None
+
+        return MultipartObject.get(bucket, key, upload_id)
+
+    @staticmethod
+    def dump(multipart):
+        """
+        State of an upload.
+
+        :param multipart: the multipart object
+        :returns: dictionary with the upload id, the sizes and the uploaded
+            parts, so interrupted uploads can be resumed
+        """
+        return {
+            'upload_id': str(multipart.upload_id),
+            'key': multipart.key,
+            'size': multipart.size,
+            'part_size': multipart.chunk_size,
+            'last_part_number': multipart.last_part_number,
+            'parts': [
+                {'part_number': part.part_number, 'checksum': part.checksum}
+                for part in Part.query_by_multipart(multipart).order_by(Part.part_number)
+            ],
+        }
+
+    def post(self, rec_id, key):
+        """
+        Start the upload of a file.
 
+        The request body is a JSON object with the ``size`` of the file and
+        optionally the ``part_size``. All parts have this size, except the
+        last one.
+
+        :param rec_id: the record identifier
+        :param key: the file name
+        :returns: the state of the new upload
+        """
+        data = request.get_json(silent=True) or {}
+        size = data.get('size')
+        part_size = data.get('part_size', current_app.config['INVENIO_MADMP_UPLOAD_PART_SIZE'])
+
+        if not isinstance(size, int) or not isinstance(part_size, int):
+            return self.error('The size and part_size must be integers', 400)
+
+        bucket = get_record_bucket(rec_id)
+        if bucket is None:
+            return self.error('Record not found', 404)
+
+        try:
+            multipart = MultipartObject.create(bucket, key, size, part_size)
+            db.session.commit()
+        except FilesException as files_exc:
+            db.session.rollback()
+            return self.error(files_exc.description or files_exc.__class__.__name__, files_exc.code)
+
+        response = jsonify(self.dump(multipart))
+        response.status_code = 201
+        return response
+
+
+class MultipartUploadResource(MultipartUpload):
+    """An upload in progress."""
+
+    def get(self, rec_id, key, upload_id):
+        """
+        Report the uploaded parts, to resume an interrupted upload.
+
+        :param rec_id: the record identifier
+        :param key: the file name
+        :param upload_id: the upload id
+        :returns: the state of the upload
+        """
+        multipart = self.get_multipart(rec_id, key, upload_id)
+        if multipart is None:
+            return self.error('Upload not found', 404)
+
+        return jsonify(self.dump(multipart))
+
+    def delete(self, rec_id, key, upload_id):
+        """
+        Abort an upload and remove its parts.
+
+        :param rec_id: the record identifier
+        :param key: the file name
+        :param upload_id: the upload id
+        :returns: empty response
+        """
+        multipart = self.get_multipart(rec_id, key, upload_id)
+        if multipart is None:
+            return self.error('Upload not found', 404)
+
+        file_id = str(multipart.file_id)
+        multipart.delete()
         db.session.commit()
+        remove_file_data(file_id)
+
+        return Response(status=204)
+
+
+class MultipartUploadPart(MultipartUpload):
+    """A part of an upload."""
+
+    def put(self, rec_id, key, upload_id, part_number):
+        """
+        Store a part, replacing it if it was already uploaded.
+
+        Part numbers start at 0. The request body is streamed to the file of
+        the upload, at the offset of the part.
+
+        :param rec_id: the record identifier
+        :param key: the file name
+        :param upload_id: the upload id
+        :param part_number: the part number
+        :returns: the part number and checksum
+        """
+        multipart = self.get_multipart(rec_id, key, upload_id)
+        if multipart is None:
+            return self.error('Upload not found', 404)
+
+        if not 0 <= part_number <= multipart.last_part_number:
+            return self.error('Invalid part number', 400)
+
+        start = part_number * multipart.chunk_size
+        part_size = min(start + multipart.chunk_size, multipart.size) - start
+        if request.content_length != part_size:
+            return self.error('The part must have {0} bytes'.format(part_size), 400)
+
+        try:
+            part = Part.get_or_create(multipart, part_number)
+            part.set_contents(request.stream)
+            db.session.commit()
+        except FilesException as files_exc:
+            db.session.rollback()
+            return self.error(files_exc.description or files_exc.__class__.__name__, files_exc.code)
+
+        return jsonify({'part_number': part.part_number, 'checksum': part.checksum})
+
+
+class MultipartUploadComplete(MultipartUpload):
+    """Completion of an upload."""
+
+    def post(self, rec_id, key, upload_id):
+        """
+        Merge the parts of an upload into a new version of the file.
+
+        :param rec_id: the record identifier
+        :param key: the file name
+        :param upload_id: the upload id
+        :returns: the created object version
+        """
+        multipart = self.get_multipart(rec_id, key, upload_id)
+        if multipart is None:
+            return self.error('Upload not found', 404)
+
+        try:
+            multipart.complete()
+            obj = multipart.merge_parts()
+            db.session.commit()
+        except FilesException as files_exc:
+            db.session.rollback()
+            return self.error(files_exc.description or files_exc.__class__.__name__, files_exc.code)
+
+        UploadMaDMP.verify(obj)
         file_uploaded.send(obj)
 
+        response = jsonify({
+            'key': obj.key,
+            'version_id': str(obj.version_id),
+            'size': obj.file.size,
+            'checksum': obj.file.checksum,
+        })
+        response.status_code = 201
+        return response
+
 
 upload_view = UploadMaDMP.as_view(
     'validation'
 )
 
+batch_view = UploadBatch.as_view(
+    'batch'
+)
+
+madmp_view = MaDMPResource.as_view(
+    'dmp'
+)
+
+job_view = UploadJob.as_view(
+    'job'
+)
+
+export_view = BulkExport.as_view(
+    'export'
+)
+
+search_view = MaDMPSearch.as_view(
+    'search'
+)
+
+suggest_view = MaDMPSuggest.as_view(
+    'suggest'
+)
+
+multipart_view = MultipartUpload.as_view(
+    'multipart'
+)
+
+multipart_resource_view = MultipartUploadResource.as_view(
+    'multipart_upload'
+)
+
+multipart_part_view = MultipartUploadPart.as_view(
+    'multipart_part'
+)
+
+multipart_complete_view = MultipartUploadComplete.as_view(
+    'multipart_complete'
+)
+
 blueprint.add_url_rule(
     '/upload',
     view_func=upload_view,
     methods=['POST'],
 )
+
+blueprint.add_url_rule(
+    '/upload/batch',
+    view_func=batch_view,
+    methods=['POST'],
+)
+
+blueprint.add_url_rule(
+    '/dmps/<path:dmp_id>',
+    view_func=madmp_view,
+    methods=['GET', 'PATCH'],
+    merge_slashes=False,
+)
+
+blueprint.add_url_rule(
+    '/jobs/<string:job_id>',
+    view_func=job_view,
+    methods=['GET'],
+)
+
+blueprint.add_url_rule(
+    '/export',
+    view_func=export_view,
+    methods=['GET'],
+)
+
+blueprint.add_url_rule(
+    '/search',
+    view_func=search_view,
+    methods=['GET'],
+)
+
+blueprint.add_url_rule(
+    '/suggest',
+    view_func=suggest_view,
+    methods=['GET'],
+)
+
+blueprint.add_url_rule(
+    '/records/<rec_id>/files/<string:key>/uploads',
+    view_func=multipart_view,
+    methods=['POST'],
+)
+
+blueprint.add_url_rule(
+    '/records/<rec_id>/files/<string:key>/uploads/<string:upload_id>',
+    view_func=multipart_resource_view,
+    methods=['GET', 'DELETE'],
+)
+
+blueprint.add_url_rule(
+    '/records/<rec_id>/files/<string:key>/uploads/<string:upload_id>/parts/<int:part_number>',
+    view_func=multipart_part_view,
+    methods=['PUT'],
+)
+
+blueprint.add_url_rule(
+    '/records/<rec_id>/files/<string:key>/uploads/<string:upload_id>/complete',
+    view_func=multipart_complete_view,
+    methods=['POST'],
+)
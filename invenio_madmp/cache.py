@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Cache of exported records."""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCacheBackend(object):
+    """In-process LRU cache whose entries expire."""
+
+    def __init__(self, max_size=1024, ttl=300):
+        """Backend constructor.
+
+        :param max_size: maximum number of entries, 0 to disable the cache
+        :param ttl: seconds an entry is kept
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a value.
+
+        :param key: the key as string
+        :returns: the value, None if it is not cached or expired
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+
+            expires, value = item
+            if expires < time.monotonic():
+                del self._items[key]
+                return None
+
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Cache a value, evicting the least recently used entries."""
+        if not self.max_size:
+            return
+
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a value."""
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class RedisCacheBackend(object):
+    """Cache shared by the processes of all hosts, stored in Redis."""
+
+    def __init__(self, client, ttl=300):
+        """Backend constructor.
+
+        :param client: the ``redis.StrictRedis`` client
+        :param ttl: seconds an entry is kept
+        """
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key):
+        """Get a value, None if it is not cached."""
+        value = self.client.get(key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        """Cache a value."""
+        self.client.setex(key, self.ttl, pickle.dumps(value))
+
+    def delete(self, key):
+        """Remove a value."""
+        self.client.delete(key)
+
+
+def memory_cache_backend(app):
+    """In-process cache backend."""
+    return MemoryCacheBackend(
+        max_size=app.config['INVENIO_MADMP_RECORD_CACHE_SIZE'],
+        ttl=app.config['INVENIO_MADMP_RECORD_CACHE_TTL'],
+    )
+
+
+def redis_cache_backend(app):
+    """Redis cache backend, requires the ``redis`` package."""
+    import redis
+
+    return RedisCacheBackend(
+        redis.StrictRedis.from_url(
+            app.config['INVENIO_MADMP_RECORD_CACHE_REDIS_URL']),
+        ttl=app.config['INVENIO_MADMP_RECORD_CACHE_TTL'],
+    )
+
+
+class RecordCache(object):
+    """
+    Cache of record data, keyed by recid and revision.
+
+    Values are cached under the revision they were built from and looked up
+    with the current revision of the record, read from the database by the
+    caller. A value built from an older revision is thus never returned, even
+    if it was cached after the record was updated, and expires on its own.
+    """
+
+    def __init__(self, backend, prefix='madmp'):
+        """Cache constructor.
+
+        :param backend: cache backend, e.g. :class:`MemoryCacheBackend`
+        :param prefix: prefix of the cache keys
+        """
+        self.backend = backend
+        self.prefix = prefix
+
+    def key(self, rec_id, revision_id, name):
+        """Key of a value cached for a revision of a record."""
+        return '{0}:{1}:{2}:{3}'.format(self.prefix, name, rec_id, revision_id)
+
+    def get(self, rec_id, revision_id, name):
+        """
+        Get a value cached for a revision of a record.
+
+        :param rec_id: the record identifier
+        :param revision_id: the current revision of the record
+        :param name: name of the value, e.g. ``'export'``
+        :returns: the value, None if it is not cached
+        """
+        return self.backend.get(self.key(rec_id, revision_id, name))
+
+    def set(self, rec_id, revision_id, name, value):
+        """
+        Cache a value for a revision of a record.
+
+        :param rec_id: the record identifier
+        :param revision_id: the revision the value was built from
+        :param name: name of the value
+        :param value: the value, must be picklable for shared backends
+        """
+        self.backend.set(self.key(rec_id, revision_id, name), value)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Command line interface of invenio-maDMP."""
+
+import json
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from invenio_search import current_search_client
+
+from .export import EXPORT_FORMATS, export_records
+from .indexer import invalidate_search_caches, migrate_index
+
+
+@click.group()
+def madmp():
+    """Commands of invenio-maDMP."""
+
+
+@madmp.command('export')
+@click.option('--format', '-f', type=click.Choice(EXPORT_FORMATS),
+              default='ndjson', show_default=True, help='Output format.')
+@click.option('--output', '-o', type=click.File('wb'), default='-',
+              help='Output file, standard output by default.')
+@click.option('--batch-size', type=int, default=None,
+              help='Number of records fetched at a time.')
+@with_appcontext
+def export(format, output, batch_size):
+    """Export all records as maDMPs."""
+    batch_size = batch_size or \
+        current_app.config['INVENIO_MADMP_EXPORT_BATCH_SIZE']
+
+    for chunk in export_records(format, batch_size):
+        output.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+
+
+@madmp.command('reindex')
+@click.argument('source')
+@click.argument('target')
+@click.option('--alias', '-a', 'aliases', multiple=True,
+              help='Alias moved from the source to the target, repeatable.')
+@click.option('--mapping', '-m', type=click.File('r'), default=None,
+              help='Settings and mappings of the target, e.g. '
+                   'files/elasticsearch/record-v2.0.0.json.')
+@click.option('--batch-size', type=int, default=1000, show_default=True,
+              help='Number of documents copied per batch.')
+@with_appcontext
+def reindex(source, target, aliases, mapping, batch_size):
+    """Copy the SOURCE index to TARGET and move the aliases to it."""
+    body = json.load(mapping) if mapping else None
+
+    copied, caught_up = migrate_index(current_search_client, source, target,
+                                      aliases, body=body,
+                                      batch_size=batch_size)
+    invalidate_search_caches()
+
+    click.echo('Copied {0} documents, {1} more after moving {2}.'.format(
+        copied.get('total', 0),
+        caught_up.get('created', 0) + caught_up.get('updated', 0),
+        ', '.join(aliases) or 'no aliases',
+    ))
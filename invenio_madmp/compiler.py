@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Compilation of JSON schemas into specialised Python validation functions.
+
+Only the keywords used by the maDMP schema are supported. The compiled
+function only answers whether a document is valid, the errors of invalid
+documents are still reported by ``jsonschema``.
+"""
+
+from numbers import Number
+
+ANNOTATIONS = frozenset([
+    '$id', '$schema', '$comment', 'id', 'title', 'description', 'examples',
+    'default',
+])
+"""Keywords that do not take part in validation."""
+
+TYPE_CHECKS = {
+    'string': 'isinstance({0}, str)',
+    'object': 'isinstance({0}, dict)',
+    'array': 'isinstance({0}, list)',
+    'boolean': 'isinstance({0}, bool)',
+    'null': '{0} is None',
+    'number': 'isinstance({0}, _Number) and not isinstance({0}, bool)',
+    'integer': '(isinstance({0}, int) and not isinstance({0}, bool) or '
+               'isinstance({0}, float) and {0}.is_integer())',
+}
+"""Python expressions checking a value against a JSON type."""
+
+KEYWORDS = frozenset([
+    'type', 'enum', 'format', 'properties', 'required', 'additionalProperties',
+    'items', 'minItems', 'maxItems', 'uniqueItems',
+])
+"""Keywords supported by the compiler."""
+
+
+class UnsupportedSchema(Exception):
+    """The schema uses a keyword the compiler does not support."""
+
+
+def _equal(one, two):
+    """JSON equality, where booleans are not numbers."""
+    if isinstance(one, bool) or isinstance(two, bool):
+        return one is two
+    if isinstance(one, dict) and isinstance(two, dict):
+        return one.keys() == two.keys() and \
+            all(_equal(one[key], two[key]) for key in one)
+    if isinstance(one, list) and isinstance(two, list):
+        return len(one) == len(two) and all(map(_equal, one, two))
+    return one == two
+
+
+def _unique(items):
+    """Checks the items of an array are unique."""
+    if all(isinstance(item, str) for item in items):
+        return len(set(items)) == len(items)
+
+    seen = []
+    for item in items:
+        if any(_equal(item, other) for other in seen):
+            return False
+        seen.append(item)
+    return True
+
+
+class SchemaCompiler(object):
+    """Generates the source of one Python function per sub-schema."""
+
+    def __init__(self, format_checker=None):
+        """Compiler constructor.
+
+        :param format_checker: :class:`jsonschema.FormatChecker` of the
+            formats to check, formats are ignored if None
+        """
+        self.format_checker = format_checker
+        self.lines = []
+        self.constants = {}
+
+    def compile(self, schema):
+        """
+        Compile a schema.
+
+        :param schema: the JSON schema as dictionary
+        :returns: function taking a document and returning True if valid
+        :raises UnsupportedSchema: if the schema cannot be compiled
+        """
+        name = self.function(schema) or self.function(True, always=True)
+
+        namespace = {
+            '_Number': Number,
+            '_unique': _unique,
+            '_conforms': self.format_checker.conforms
+            if self.format_checker else None,
+        }
+        namespace.update(self.constants)
+        exec(compile('\n'.join(self.lines), '<compiled schema>', 'exec'),
+             namespace)
+        return namespace[name]
+
+    def constant(self, value):
+        """Name of a constant of the generated code."""
+        name = '_c{0}'.format(len(self.constants))
+        self.constants[name] = value
+        return name
+
+    def function(self, schema, always=None):
+        """
+        Generate the function of a sub-schema.
+
+        :param schema: the sub-schema
+        :param always: generate a function always returning this verdict
+        :returns: name of the function, None if the sub-schema accepts
+            everything
+        """
+        if schema is True or always is True:
+            body = []
+        elif schema is False or always is False:
+            body = ['    return False']
+        elif isinstance(schema, dict):
+            body = self.body(schema)
+        else:
+            raise UnsupportedSchema('Invalid sub-schema: {0!r}'.format(schema))
+
+        if not body and always is None:
+            return None
+
+        name = '_v{0}'.format(len(self.lines))
+        self.lines.append('def {0}(v):'.format(name))
+        self.lines.extend(body)
+        self.lines.append('    return True')
+        return name
+
+    def body(self, schema):
+        """Generate the statements checking a value against a sub-schema."""
+        unknown = set(schema) - ANNOTATIONS - KEYWORDS
+        if unknown:
+            raise UnsupportedSchema(
+                'Unsupported keywords: {0}'.format(', '.join(sorted(unknown)))
+            )
+
+        body = []
+        types = self.types(schema)
+
+        if types is not None:
+            body.append('    if not ({0}): return False'.format(
+                self.type_check(types, 'v')))
+
+        if 'enum' in schema:
+            values = schema['enum']
+            if not all(isinstance(value, str) for value in values):
+                raise UnsupportedSchema('Only string enums are supported')
+            body.append('    if not (isinstance(v, str) and v in {0}): '
+                        'return False'.format(self.constant(frozenset(values))))
+
+        if 'format' in schema and self.format_checker is not None and \
+                schema['format'] in self.format_checker.checkers:
+            body.append('    if not _conforms(v, {0!r}): return False'
+                        .format(schema['format']))
+
+        for checks, json_type in ((self.object_checks(schema), 'object'),
+                                  (self.array_checks(schema), 'array')):
+            if not checks:
+                continue
+            if types == [json_type]:
+                # the type check already returned for other values
+                body.extend('    ' + line for line in checks)
+            else:
+                body.append('    if {0}:'.format(
+                    TYPE_CHECKS[json_type].format('v')))
+                body.extend('        ' + line for line in checks)
+
+        return body
+
+    def types(self, schema):
+        """JSON types allowed by a sub-schema as list, None if any type."""
+        if 'type' not in schema:
+            return None
+
+        types = schema['type']
+        types = [types] if isinstance(types, str) else types
+        if not isinstance(types, list) or \
+                not all(t in TYPE_CHECKS for t in types):
+            raise UnsupportedSchema('Invalid type: {0!r}'.format(types))
+        return types
+
+    def type_check(self, types, value):
+        """Python expression checking a value against JSON types."""
+        return ' or '.join(
+            '(' + TYPE_CHECKS[t].format(value) + ')' for t in types
+        ) or 'False'
+
+    def inline(self, schema, value):
+        """
+        Python expression of a sub-schema that only checks the type.
+
+        :param schema: the sub-schema
+        :param value: Python expression of the value to check
+        :returns: the expression, None if the sub-schema needs a function
+        """
+        if not isinstance(schema, dict) or \
+                set(schema) - ANNOTATIONS != {'type'}:
+            return None
+        return self.type_check(self.types(schema), value)
+
+    def object_checks(self, schema):
+        """Generate the statements of the object keywords."""
+        checks = []
+        properties = schema.get('properties', {})
+
+        required = schema.get('required')
+        if required:
+            checks.append('if not ({0}): return False'.format(
+                ' and '.join('{0!r} in v'.format(key) for key in required)
+            ))
+
+        for key, subschema in properties.items():
+            value = 'v[{0!r}]'.format(key)
+            check = self.inline(subschema, value)
+            if check is None:
+                name = self.function(subschema)
+                check = name and '{0}({1})'.format(name, value)
+            if check:
+                checks.append('if {0!r} in v and not ({1}): '
+                              'return False'.format(key, check))
+
+        additional = schema.get('additionalProperties', True)
+        if additional is False:
+            checks.append('if not {0}.issuperset(v): return False'.format(
+                self.constant(frozenset(properties))
+            ))
+        elif additional is not True:
+            name = self.function(additional)
+            if name:
+                checks.append('for k in v:')
+                checks.append('    if k not in {0} and not {1}(v[k]): '
+                              'return False'.format(
+                                  self.constant(frozenset(properties)), name))
+
+        return checks
+
+    def array_checks(self, schema):
+        """Generate the statements of the array keywords."""
+        checks = []
+
+        if 'minItems' in schema:
+            checks.append('if len(v) < {0:d}: return False'.format(
+                schema['minItems']))
+        if 'maxItems' in schema:
+            checks.append('if len(v) > {0:d}: return False'.format(
+                schema['maxItems']))
+
+        if 'items' in schema:
+            if not isinstance(schema['items'], (dict, bool)):
+                raise UnsupportedSchema('Only single items schemas are '
+                                        'supported')
+            check = self.inline(schema['items'], 'x')
+            if check is None:
+                name = self.function(schema['items'])
+                check = name and '{0}(x)'.format(name)
+            if check:
+                checks.append('for x in v:')
+                checks.append('    if not ({0}): return False'.format(check))
+
+        if schema.get('uniqueItems'):
+            checks.append('if not _unique(v): return False')
+
+        return checks
+
+
+class CompiledValidator(object):
+    """A ``jsonschema`` validator with a compiled fast path.
+
+    Valid documents are only checked by the compiled function. Invalid
+    documents are validated again by ``jsonschema`` to report the errors.
+    Other attributes are those of the wrapped validator.
+    """
+
+    def __init__(self, validator, check):
+        """Validator constructor.
+
+        :param validator: the ``jsonschema`` validator
+        :param check: the compiled function of its schema
+        """
+        self.validator = validator
+        self.check = check
+
+    def __getattr__(self, name):
+        """Attributes of the wrapped validator."""
+        return getattr(self.validator, name)
+
+    def is_valid(self, instance):
+        """Checks if a document is valid."""
+        return self.check(instance)
+
+    def iter_errors(self, instance):
+        """Lazily yields the errors of a document."""
+        if self.check(instance):
+            return iter(())
+        return self.validator.iter_errors(instance)
+
+    def validate(self, instance):
+        """
+        Validate a document.
+
+        :raises jsonschema.ValidationError: if the document is not valid
+        """
+        for error in self.iter_errors(instance):
+            raise error
+
+
+def compile_validator(validator):
+    """
+    Add a compiled fast path to a ``jsonschema`` validator.
+
+    :param validator: the ``jsonschema`` validator
+    :returns: a :class:`CompiledValidator`, the validator itself if its
+        schema cannot be compiled
+    """
+    compiler = SchemaCompiler(validator.format_checker)
+    try:
+        check = compiler.compile(validator.schema)
+    except UnsupportedSchema:
+        return validator
+    return CompiledValidator(validator, check)
@@ -15,3 +15,228 @@ INVENIO_MADMP_DEFAULT_VALUE = 'foobar'
 
 INVENIO_MADMP_BASE_TEMPLATE = 'invenio_madmp/base.html'
 """Default base template for the demo page."""
+
+INVENIO_MADMP_SCHEMAS = {
+    '1.0': 'maDMP-schema.json',
+}
+"""maDMP JSON schemas by version.
+
+Relative paths are resolved against the ``invenio_madmp`` package directory.
+"""
+
+INVENIO_MADMP_DEFAULT_SCHEMA_VERSION = '1.0'
+"""Schema version used for maDMPs that do not declare one."""
+
+INVENIO_MADMP_FORMAT_CHECKS = None
+"""Names of the formats checked on upload, e.g. ``['date', 'email']``.
+
+If None, every format known to ``jsonschema`` is checked.
+"""
+
+INVENIO_MADMP_COMPILED_VALIDATION = True
+"""Check uploads with Python functions compiled from the maDMP schema.
+
+``jsonschema`` is then only used to report the errors of invalid maDMPs.
+Schemas using keywords the compiler does not support are always validated
+by ``jsonschema``.
+"""
+
+INVENIO_MADMP_VALIDATION_MAX_ERRORS = 1
+"""Number of errors reported for an invalid maDMP.
+
+With 1, validation stops at the first error. With 0, the whole maDMP is
+validated and all its errors are reported.
+"""
+
+INVENIO_MADMP_VALIDATION_PROCESSES = 0
+"""Number of processes validating the datasets of large maDMPs.
+
+If 0, maDMPs are always validated in the request's process.
+"""
+
+INVENIO_MADMP_VALIDATION_PARALLEL_THRESHOLD = 1000
+"""Minimum number of datasets for a maDMP to be validated in parallel."""
+
+INVENIO_MADMP_VALIDATION_CHUNK_SIZE = 100
+"""Number of datasets sent to a validation process at a time."""
+
+INVENIO_MADMP_DEDUPLICATE_UPLOADS = True
+"""Skip uploads of maDMPs whose records were already created.
+
+Uploads are identified by the SHA-256 of their canonical JSON, also when
+streamed, and return the existing records as long as none of them was
+deleted.
+"""
+
+INVENIO_MADMP_STREAMING_UPLOADS = False
+"""Read uploaded maDMP files one dataset at a time.
+
+Keeps memory bounded for maDMPs with many datasets. Requires ``ijson``.
+"""
+
+INVENIO_MADMP_RECORDS_BATCH_SIZE = None
+"""Number of datasets inserted per transaction and bulk indexing request.
+
+If None, all datasets of an upload are created in a single transaction.
+"""
+
+INVENIO_MADMP_PATCH_PERMISSION_FACTORY = None
+"""Factory of the permission to patch the maDMPs of other users.
+
+Called with the :class:`invenio_madmp.models.MaDMP`, it returns an object
+with a ``can()`` method, e.g. an ``invenio_access`` permission. It may be
+given as import path. If None, only the owner of the records of a maDMP can
+patch it.
+"""
+
+INVENIO_MADMP_RECORDS_INDEX = None
+"""Index or alias the records are written to.
+
+If None, records are written to the index of their ``$schema``. Set it to an
+alias moved by ``invenio madmp reindex``, so writes follow the alias to the
+new index.
+"""
+
+INVENIO_MADMP_SEARCH_INDEX = 'records'
+"""Index or alias searched by ``/madmp/search``, using the v2 mapping.
+
+The facets are aggregated on ``keyword`` fields, which the v1 mapping does
+not have.
+"""
+
+INVENIO_MADMP_SEARCH_MAX_SIZE = 100
+"""Maximum number of hits of a search page."""
+
+INVENIO_MADMP_SEARCH_FACET_SIZE = 20
+"""Maximum number of values returned per facet.
+
+Facet counts are cached per query and filters in the record cache backend,
+until the next index write.
+"""
+
+INVENIO_MADMP_SUGGEST_SIZE = 5
+"""Maximum number of titles suggested by ``/madmp/suggest``."""
+
+INVENIO_MADMP_SUGGEST_MAX_AGE = 60
+"""Seconds clients and proxies may cache the title suggestions.
+
+Suggestions are also cached per prefix and owners in the record cache
+backend, until the next index write.
+"""
+
+INVENIO_MADMP_INDEXER_DEFERRED = False
+"""Index created records from a queue instead of within the request."""
+
+INVENIO_MADMP_INDEXER_QUEUE_BACKEND = 'invenio_madmp.queue:memory_queue_backend'
+"""Factory of the deferred indexing queue backend, called with the app.
+
+Import path or callable, e.g. ``invenio_madmp.queue:sqlite_queue_backend``
+to share the queue between the processes of a host.
+"""
+
+INVENIO_MADMP_INDEXER_BATCH_SIZE = 500
+"""Maximum number of queued records sent in one bulk request."""
+
+INVENIO_MADMP_INDEXER_FLUSH_INTERVAL = 1.0
+"""Maximum seconds a queued record waits before being indexed."""
+
+INVENIO_MADMP_INDEXER_MAX_RETRIES = 3
+"""Times a queued record is retried after failing to index."""
+
+INVENIO_MADMP_INDEXER_RETRY_DELAY = 5.0
+"""Seconds before a record that failed to index is retried.
+
+The delay doubles on every further attempt.
+"""
+
+INVENIO_MADMP_RECORD_CACHE_BACKEND = 'invenio_madmp.cache:memory_cache_backend'
+"""Factory of the backend caching exported records, called with the app.
+
+Import path or callable, e.g. ``invenio_madmp.cache:redis_cache_backend`` to
+share the cache between processes.
+"""
+
+INVENIO_MADMP_RECORD_CACHE_SIZE = 1024
+"""Number of entries of the in-process record cache, 0 to disable it."""
+
+INVENIO_MADMP_RECORD_CACHE_TTL = 300
+"""Seconds a record is cached."""
+
+INVENIO_MADMP_RECORD_CACHE_REDIS_URL = 'redis://localhost:6379/0'
+"""Redis URL of the ``redis_cache_backend``."""
+
+INVENIO_MADMP_DEDUPLICATE_FILES = False
+"""Store the files attached to records once per content.
+
+Files are identified by the SHA-256 of their content, computed before they
+are written to the storage. A file with the same content as a stored file
+refers to the stored file instance and is not written again.
+"""
+
+INVENIO_MADMP_FILE_VERIFY_SIZE = None
+"""Size in bytes from which new files are verified in a background job.
+
+The job reads the stored file again and records in ``last_check`` whether it
+matches the checksum computed during the upload. If None, files are not
+verified.
+"""
+
+INVENIO_MADMP_FILES_SENDFILE = None
+"""How the front-end web server sends the files of records.
+
+``'x-accel-redirect'`` (nginx) or ``'x-sendfile'`` (Apache, lighttpd) hand
+the transfer of local files to the front-end server. If None, files are
+streamed by the application with support for ``Range`` requests.
+"""
+
+INVENIO_MADMP_FILES_ACCEL_LOCATIONS = {}
+"""Internal URI prefixes of nginx by storage directory, for X-Accel-Redirect.
+
+E.g. ``{'/data/files': '/protected-files'}`` with an ``internal`` nginx
+location ``/protected-files/`` whose ``alias`` is ``/data/files/``. Files
+outside of these directories are streamed by the application.
+"""
+
+INVENIO_MADMP_UPLOAD_PART_SIZE = 64 * 1024 * 1024
+"""Default size in bytes of the parts of multipart file uploads.
+
+It must be within ``FILES_REST_MULTIPART_CHUNKSIZE_MIN`` and
+``FILES_REST_MULTIPART_CHUNKSIZE_MAX``.
+"""
+
+INVENIO_MADMP_SERIALIZERS = {
+    'json': 'invenio_madmp.serializers:MaDMPJSONSerializer',
+    'jsonld': 'invenio_madmp.serializers:MaDMPJSONLDSerializer',
+    'csv': 'invenio_madmp.serializers:DatasetCSVSerializer',
+}
+"""Serializers of the export formats, by format.
+
+Every serializer is built once with the application. More formats can be
+added by other packages through the ``invenio_madmp.serializers`` entry
+point group, with the format as entry point name.
+"""
+
+INVENIO_MADMP_EXPORT_BATCH_SIZE = 500
+"""Number of records fetched at a time by the bulk export."""
+
+INVENIO_MADMP_ASYNC_UPLOADS = False
+"""Create the records of uploaded maDMPs in background jobs.
+
+The upload only validates the maDMP without its datasets and answers with
+``202`` and the job id. The job is reported at ``/madmp/jobs/<job_id>``.
+"""
+
+INVENIO_MADMP_JOBS_DIR = None
+"""Directory of the upload jobs, ``<instance_path>/madmp-jobs`` if None."""
+
+INVENIO_MADMP_JOBS_WORKERS = 2
+"""Maximum number of upload jobs running at the same time."""
+
+INVENIO_MADMP_JOBS_EXECUTOR = 'thread'
+"""Run upload jobs in a pool of ``'thread'`` or ``'process'`` workers."""
+
+INVENIO_MADMP_JOBS_APP_FACTORY = None
+"""Import path of the app factory used by ``'process'`` workers.
+
+E.g. ``invenio_app.factory:create_api``.
+"""
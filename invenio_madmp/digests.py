@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Digests identifying uploaded maDMPs."""
+
+import hashlib
+import json
+import uuid
+
+
+def canonical_json(document):
+    """
+    Serializes a document as canonical JSON.
+
+    Keys are sorted and no whitespace is added, so documents that only differ
+    in formatting or key order give the same bytes.
+
+    :param document: the maDMP as dictionary
+    :returns: UTF-8 encoded JSON
+    """
+    return json.dumps(document, sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+
+def document_digest(document):
+    """
+    SHA-256 of the canonical JSON of a document.
+
+    :param document: the maDMP as dictionary
+    :returns: the digest as hex string
+    """
+    return hashlib.sha256(canonical_json(document)).hexdigest()
+
+
+def streamed_digest(header, datasets):
+    """
+    SHA-256 of the canonical JSON of a maDMP read as a stream.
+
+    The digest equals :func:`document_digest` of the whole document, but the
+    datasets are serialized one at a time, so streamed and JSON uploads of the
+    same maDMP are identified by the same digest.
+
+    :param header: the maDMP without its datasets, as dictionary
+    :param datasets: iterable of the dataset dictionaries
+    :returns: the digest as hex string
+    """
+    marker = uuid.uuid4().hex
+    document = dict(header, dmp=dict(header['dmp'], dataset=marker))
+    before, after = canonical_json(document).split(
+        json.dumps(marker).encode('utf-8'), 1)
+
+    sha = hashlib.sha256(before)
+    sha.update(b'[')
+    for index, dataset in enumerate(datasets):
+        if index:
+            sha.update(b',')
+        sha.update(canonical_json(dataset))
+    sha.update(b']')
+    sha.update(after)
+    return sha.hexdigest()
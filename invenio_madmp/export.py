@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Bulk export of the records as maDMPs."""
+
+import io
+import zipfile
+
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_records.models import RecordMetadata
+from werkzeug.utils import secure_filename
+
+from .proxies import current_madmp
+
+EXPORT_FORMATS = ('ndjson', 'zip')
+"""Formats of the bulk export."""
+
+
+def iter_records(batch_size=500):
+    """
+    Iterate over the records with a registered recid.
+
+    Rows are fetched ``batch_size`` at a time with a server-side cursor where
+    the database supports it, and are not kept in the session, so memory use
+    does not grow with the number of records.
+
+    :param batch_size: number of rows fetched at a time
+    :returns: generator of ``(recid, updated, record JSON)`` tuples
+    """
+    query = db.session.query(
+        PersistentIdentifier.pid_value,
+        RecordMetadata.updated,
+        RecordMetadata.json,
+    ).join(
+        RecordMetadata,
+        PersistentIdentifier.object_uuid == RecordMetadata.id,
+    ).filter(
+        PersistentIdentifier.pid_type == 'recid',
+        PersistentIdentifier.status == PIDStatus.REGISTERED,
+        RecordMetadata.json.isnot(None),
+    ).order_by(PersistentIdentifier.id)
+
+    for row in query.yield_per(batch_size):
+        yield row.pid_value, row.updated, row.json
+
+
+def export_ndjson(records, serializer):
+    """
+    Serialize records as newline-delimited JSON.
+
+    Every line is the maDMP of one record, as sent by the download view.
+
+    :param records: iterable of ``(recid, updated, record JSON)`` tuples
+    :param serializer: the serializer of the ``json`` format, which writes
+        a maDMP on a single line
+    :returns: generator of lines
+    """
+    for _, _, record_json in records:
+        yield ''.join(serializer.serialize([record_json]))
+
+
+class _Chunks(io.RawIOBase):
+    """Write-only stream collecting the bytes written since the last drain."""
+
+    def __init__(self):
+        """Stream constructor."""
+        self.chunks = []
+
+    def writable(self):
+        """The stream is writable."""
+        return True
+
+    def write(self, data):
+        """Collect written bytes."""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        """Return and forget the collected bytes."""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def export_zip(records, serializer):
+    """
+    Serialize records as a ZIP archive with one maDMP file per record.
+
+    The archive is written to a non-seekable stream, so every file is yielded
+    as soon as it is compressed and only one record is held in memory. Files
+    are named after the recid and the download file name of their record.
+
+    :param records: iterable of ``(recid, updated, record JSON)`` tuples
+    :param serializer: the serializer of the ``json`` format
+    :returns: generator of byte chunks
+    """
+    stream = _Chunks()
+
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for rec_id, updated, record_json in records:
+            info = zipfile.ZipInfo(
+                secure_filename('{0}-{1}'.format(rec_id, serializer.filename(record_json))),
+                date_time=updated.timetuple()[:6],
+            )
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, ''.join(serializer.serialize([record_json])))
+            yield stream.drain()
+
+    yield stream.drain()
+
+
+def export_records(format, batch_size=500):
+    """
+    Export all records in a format.
+
+    The maDMPs are written by the serializer of the ``json`` export format.
+
+    :param format: one of :data:`EXPORT_FORMATS`
+    :param batch_size: number of rows fetched at a time
+    :returns: generator of the output as strings for ``ndjson``, as bytes
+        for ``zip``
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError('Unknown export format: {0}'.format(format))
+
+    serializer = current_madmp.serializers.get('json')
+    records = iter_records(batch_size)
+    if format == 'zip':
+        return export_zip(records, serializer)
+    return export_ndjson(records, serializer)
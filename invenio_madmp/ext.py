@@ -9,9 +9,18 @@
 
 from __future__ import absolute_import, print_function
 
+import os
+
 from flask_babelex import gettext as _
+from werkzeug.utils import import_string
 
 from . import config
+from .cache import RecordCache
+from .jobs import JobManager, JobStore
+from .queue import IndexQueue
+from .schemas import SchemaRegistry
+from .search import SearchCache
+from .serializers import SerializerRegistry
 
 
 class inveniomaDMP(object):
@@ -29,8 +38,74 @@ class inveniomaDMP(object):
     def init_app(self, app):
         """Flask application initialization."""
         self.init_config(app)
+        self.schemas = SchemaRegistry(
+            app.config['INVENIO_MADMP_SCHEMAS'],
+            app.config['INVENIO_MADMP_DEFAULT_SCHEMA_VERSION'],
+            processes=app.config['INVENIO_MADMP_VALIDATION_PROCESSES'],
+            parallel_threshold=app.config[
+                'INVENIO_MADMP_VALIDATION_PARALLEL_THRESHOLD'],
+            chunk_size=app.config['INVENIO_MADMP_VALIDATION_CHUNK_SIZE'],
+            formats=app.config['INVENIO_MADMP_FORMAT_CHECKS'],
+            max_errors=app.config['INVENIO_MADMP_VALIDATION_MAX_ERRORS'],
+            compiled=app.config['INVENIO_MADMP_COMPILED_VALIDATION'],
+        )
+        self.schemas.load_all()
+        self.index_queue = self.create_index_queue(app)
+        self.record_cache = self.create_record_cache(app)
+        self.facet_cache = self.create_facet_cache(app)
+        self.suggest_cache = self.create_suggest_cache(app)
+        self.serializers = self.create_serializers(app)
+        self.jobs = JobManager(
+            JobStore(app.config['INVENIO_MADMP_JOBS_DIR'] or
+                     os.path.join(app.instance_path, 'madmp-jobs')),
+            max_workers=app.config['INVENIO_MADMP_JOBS_WORKERS'],
+            executor=app.config['INVENIO_MADMP_JOBS_EXECUTOR'],
+            app_factory=app.config['INVENIO_MADMP_JOBS_APP_FACTORY'],
+        )
         app.extensions['invenio-madmp'] = self
 
+    def create_serializers(self, app):
+        """Create the serializers of the export formats."""
+        serializers = SerializerRegistry()
+        serializers.load(app, app.config['INVENIO_MADMP_SERIALIZERS'])
+        serializers.load_entry_point_group(app, 'invenio_madmp.serializers')
+        return serializers
+
+    def create_cache_backend(self, app):
+        """Create a backend of the configured cache."""
+        backend_factory = app.config['INVENIO_MADMP_RECORD_CACHE_BACKEND']
+        if isinstance(backend_factory, str):
+            backend_factory = import_string(backend_factory)
+
+        return backend_factory(app)
+
+    def create_record_cache(self, app):
+        """Create the cache of exported records."""
+        return RecordCache(self.create_cache_backend(app))
+
+    def create_facet_cache(self, app):
+        """Create the cache of the facet counts of the search."""
+        return SearchCache(self.create_cache_backend(app))
+
+    def create_suggest_cache(self, app):
+        """Create the cache of the title suggestions."""
+        return SearchCache(self.create_cache_backend(app),
+                           prefix='madmp:suggest')
+
+    def create_index_queue(self, app):
+        """Create the deferred indexing queue."""
+        backend_factory = app.config['INVENIO_MADMP_INDEXER_QUEUE_BACKEND']
+        if isinstance(backend_factory, str):
+            backend_factory = import_string(backend_factory)
+
+        return IndexQueue(
+            backend_factory(app),
+            batch_size=app.config['INVENIO_MADMP_INDEXER_BATCH_SIZE'],
+            flush_interval=app.config['INVENIO_MADMP_INDEXER_FLUSH_INTERVAL'],
+            max_retries=app.config['INVENIO_MADMP_INDEXER_MAX_RETRIES'],
+            retry_delay=app.config['INVENIO_MADMP_INDEXER_RETRY_DELAY'],
+        )
+
     def init_config(self, app):
         """Initialize configuration."""
         # Use theme's base template if theme is installed
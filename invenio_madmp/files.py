@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Storage and sending of the files attached to records."""
+
+import hashlib
+import os
+import tempfile
+import unicodedata
+from urllib.parse import quote, urlparse
+
+from flask import current_app, send_file
+from invenio_db import db
+from invenio_files_rest.models import FileInstance, ObjectVersion, as_bucket
+from invenio_files_rest.storage.base import check_sizelimit
+
+from .models import MaDMPFile
+
+
+class HashingStream(object):
+    """Computes the SHA-256 of a stream while it is read."""
+
+    def __init__(self, stream):
+        """Stream constructor.
+
+        :param stream: the binary stream to read
+        """
+        self.stream = stream
+        self.sha = hashlib.sha256()
+        self.size = 0
+
+    def read(self, *args):
+        """Read from the stream and hash the data."""
+        data = self.stream.read(*args)
+        self.sha.update(data)
+        self.size += len(data)
+        return data
+
+    def hexdigest(self):
+        """SHA-256 of the data read so far, as hex string."""
+        return self.sha.hexdigest()
+
+
+def store_file(bucket, key, stream, size_limit=None, spool_size=1024 * 1024,
+               chunk_size=65536):
+    """
+    Store a file once per content and add it to a bucket.
+
+    The content is hashed while it is copied to a temporary file, held in
+    memory up to ``spool_size`` bytes. If the same content is already stored,
+    the new object version refers to the existing file instance and nothing
+    is written to the storage. The session is committed.
+
+    :param bucket: the bucket id or instance
+    :param key: the file name
+    :param stream: the binary stream of the content
+    :param size_limit: maximum size of the file
+    :param spool_size: maximum size of the content kept in memory
+    :param chunk_size: number of bytes read at a time
+    :returns: the new object version
+    :raises invenio_files_rest.errors.FileSizeError: if the file is larger
+        than the size limit
+    """
+    bucket = as_bucket(bucket)
+    hashing = HashingStream(stream)
+
+    with tempfile.SpooledTemporaryFile(max_size=spool_size) as spooled:
+        for chunk in iter(lambda: hashing.read(chunk_size), b''):
+            check_sizelimit(size_limit, hashing.size, None)
+            spooled.write(chunk)
+        spooled.seek(0)
+
+        with db.session.begin_nested():
+            fileinstance = MaDMPFile.get_file(hashing.hexdigest(), hashing.size)
+            if fileinstance is None:
+                fileinstance = FileInstance.create()
+                fileinstance.set_contents(
+                    spooled,
+                    size=hashing.size,
+                    size_limit=size_limit,
+                    default_location=bucket.location.uri,
+                    default_storage_class=bucket.default_storage_class,
+                )
+                MaDMPFile.store(hashing.hexdigest(), hashing.size, fileinstance)
+
+            obj = ObjectVersion.create(bucket, key, _file_id=fileinstance)
+
+    db.session.commit()
+
+    return obj
+
+
+def verify_file(file_id):
+    """
+    Verify the stored data of a file against its checksum.
+
+    The result is stored in ``last_check`` of the file instance.
+
+    :param file_id: the file instance id
+    :returns: True if the checksum matches
+    """
+    fileinstance = FileInstance.get(file_id)
+    result = fileinstance.verify_checksum(throws=False)
+    db.session.commit()
+    return result
+
+
+def local_path(fileinstance):
+    """
+    Path of a file stored on the local file system.
+
+    :param fileinstance: the file instance
+    :returns: the absolute path, None if the file is stored elsewhere
+    """
+    uri = urlparse(fileinstance.uri or '')
+    if uri.scheme not in ('', 'file') or not os.path.isabs(uri.path):
+        return None
+    return uri.path
+
+
+def accel_redirect_uri(path, locations):
+    """
+    Internal URI of the front-end server for a file path.
+
+    :param path: the absolute path of the file
+    :param locations: dictionary of internal URI prefixes by directory
+    :returns: the internal URI, None if the file is in none of the directories
+    """
+    for directory, prefix in locations.items():
+        directory = directory.rstrip('/') + '/'
+        if path.startswith(directory):
+            return prefix.rstrip('/') + '/' + path[len(directory):]
+    return None
+
+
+def content_disposition(filename):
+    """
+    Content-Disposition header of a downloaded file, as in RFC 6266.
+
+    The ``filename*`` parameter has the UTF-8 file name, percent-encoded. The
+    quoted ``filename`` parameter has its ASCII transliteration, for clients
+    without RFC 5987 support.
+
+    :param filename: the file name
+    :returns: the header value
+    """
+    fallback = unicodedata.normalize('NFKD', filename) \
+        .encode('ascii', 'ignore').decode('ascii')
+    fallback = ''.join(char for char in fallback if char.isprintable()) \
+        .replace('\\', '\\\\').replace('"', '\\"')
+    return 'attachment; filename="{0}"; filename*=UTF-8\'\'{1}'.format(
+        fallback, quote(filename, safe=''))
+
+
+def send_object(obj):
+    """
+    Send the file of an object version.
+
+    Depending on ``INVENIO_MADMP_FILES_SENDFILE``, local files are sent by
+    the front-end server with ``X-Accel-Redirect`` or ``X-Sendfile``, which
+    also handles ``Range`` requests. Otherwise the file is sent with
+    :func:`flask.send_file`, which uses the ``wsgi.file_wrapper`` of the
+    server (e.g. ``sendfile``) and answers ``Range`` requests with ``206``.
+    Files of other storages are sent by their storage.
+
+    :param obj: the object version
+    :returns: the response
+    """
+    path = local_path(obj.file)
+    if path is None:
+        return obj.send_file(as_attachment=True)
+
+    mode = current_app.config['INVENIO_MADMP_FILES_SENDFILE']
+    redirect_uri = accel_redirect_uri(
+        path, current_app.config['INVENIO_MADMP_FILES_ACCEL_LOCATIONS']
+    ) if mode == 'x-accel-redirect' else None
+
+    if redirect_uri is not None:
+        response = current_app.response_class(mimetype=obj.mimetype)
+        response.headers['X-Accel-Redirect'] = redirect_uri
+    elif mode == 'x-sendfile':
+        response = current_app.response_class(mimetype=obj.mimetype)
+        response.headers['X-Sendfile'] = path
+    else:
+        response = send_file(path, mimetype=obj.mimetype, conditional=True)
+
+    response.headers['Content-Disposition'] = content_disposition(obj.basename)
+    return response
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Bulk indexing of maDMP records."""
+
+from elasticsearch.helpers import bulk
+from flask import current_app
+from invenio_indexer.api import RecordIndexer
+from invenio_indexer.proxies import current_record_to_index
+
+
+def alias_record_to_index(alias):
+    """
+    Function sending every record to an index alias.
+
+    :param alias: the index or alias
+    :returns: function taking a record and returning its index and doc type
+    """
+    def record_to_index(record):
+        _, doc_type = current_record_to_index(record)
+        return alias, doc_type
+    return record_to_index
+
+
+def invalidate_search_caches():
+    """Drop the cached facet counts and suggestions, after an index write."""
+    ext = current_app.extensions.get('invenio-madmp')
+    if ext is not None:
+        ext.facet_cache.invalidate()
+        ext.suggest_cache.invalidate()
+
+
+class MaDMPIndexer(RecordIndexer):
+    """Record indexer that sends already loaded records in one bulk request.
+
+    If ``INVENIO_MADMP_RECORDS_INDEX`` is set, records are written to that
+    index or alias instead of the index of their ``$schema``. Every write
+    drops the cached facet counts and title suggestions.
+    """
+
+    def __init__(self, **kwargs):
+        """Indexer constructor."""
+        alias = current_app.config['INVENIO_MADMP_RECORDS_INDEX']
+        if alias and 'record_to_index' not in kwargs:
+            kwargs['record_to_index'] = alias_record_to_index(alias)
+        super(MaDMPIndexer, self).__init__(**kwargs)
+
+    def index(self, record, arguments=None, **kwargs):
+        """Index a record."""
+        try:
+            return super(MaDMPIndexer, self).index(record, arguments, **kwargs)
+        finally:
+            invalidate_search_caches()
+
+    def delete(self, record, **kwargs):
+        """Delete a record from the index."""
+        try:
+            return super(MaDMPIndexer, self).delete(record, **kwargs)
+        finally:
+            invalidate_search_caches()
+
+    def bulk_index_records(self, records):
+        """
+        Index records with a single bulk request.
+
+        Unlike :meth:`RecordIndexer.bulk_index`, the records are not sent
+        through the message queue and are not fetched again from the DB.
+
+        :param records: iterable of records to index
+        :returns: list with the ids of the records that failed to index
+        """
+        actions = [self._record_action(record) for record in records]
+        if not actions:
+            return []
+
+        try:
+            _, errors = bulk(self.client, actions, raise_on_error=False,
+                             raise_on_exception=False)
+        finally:
+            invalidate_search_caches()
+
+        return [
+            str(item.get('_id'))
+            for error in errors for item in error.values()
+        ]
+
+    def _record_action(self, record):
+        """
+        Bulk index action of a loaded record.
+
+        :param record: the record to index
+        :returns: Dictionary defining an Elasticsearch bulk 'index' action.
+        """
+        index, doc_type = self.record_to_index(record)
+
+        arguments = {}
+        body = self._prepare_record(record, index, doc_type, arguments)
+        index, doc_type = self._prepare_index(index, doc_type)
+
+        action = {
+            '_op_type': 'index',
+            '_index': index,
+            '_type': doc_type,
+            '_id': str(record.id),
+            '_version': record.revision_id,
+            '_version_type': self._version_type,
+            '_source': body,
+        }
+        action.update(arguments)
+
+        return action
+
+
+def migrate_index(client, source, target, aliases, body=None, batch_size=1000):
+    """
+    Copy an index into a new one and move its aliases without downtime.
+
+    The documents are copied with their versions, then the aliases are
+    moved to the target in one atomic update, so searches and writes through
+    the aliases switch at once. Documents written to the source while it was
+    copied are then copied again, only if their version is newer.
+
+    :param client: the Elasticsearch client
+    :param source: the index or alias to copy
+    :param target: the new index, created with ``body`` if it does not exist
+    :param aliases: names of the aliases to move to the target
+    :param body: settings and mappings of the target
+    :param batch_size: number of documents copied per batch
+    :returns: tuple with the results of the copy and of the catch-up copy
+    """
+    if not client.indices.exists(index=target):
+        client.indices.create(index=target, body=body)
+
+    copy = {
+        'conflicts': 'proceed',
+        'source': {'index': source, 'size': batch_size},
+        'dest': {'index': target, 'version_type': 'external'},
+    }
+    copied = client.reindex(body=copy, refresh=True, wait_for_completion=True)
+
+    source_indices = list(client.indices.get(index=source))
+
+    actions = []
+    for alias in aliases:
+        for index in source_indices:
+            if client.indices.exists_alias(index=index, name=alias):
+                actions.append({'remove': {'index': index, 'alias': alias}})
+        actions.append({'add': {'index': target, 'alias': alias}})
+    if actions:
+        client.indices.update_aliases(body={'actions': actions})
+
+    caught_up = client.reindex(body=copy, refresh=True, wait_for_completion=True)
+    return copied, caught_up
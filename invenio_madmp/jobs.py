@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Asynchronous maDMP upload jobs."""
+
+import json
+import os
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from json import JSONDecodeError
+
+from flask import current_app
+from jsonschema import ValidationError
+from werkzeug.utils import import_string
+
+from .api import UploadMaDMP
+from .proxies import current_madmp
+from .streaming import InvalidStream, MaDMPStream, ijson
+
+
+class Job(object):
+    """State of an upload job."""
+
+    def __init__(self, id, status='queued', total=None, processed=0,
+                 responses=None, message=None, details=None, digest=None,
+                 owner=None):
+        """Job constructor."""
+        self.id = id
+        self.status = status
+        self.total = total
+        self.processed = processed
+        self.responses = responses or []
+        self.message = message
+        self.details = details
+        self.digest = digest
+        self.owner = owner
+
+    def to_dict(self):
+        """Job as dictionary."""
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'responses': self.responses,
+        }
+        if self.message:
+            data['message'] = self.message
+        if self.details:
+            data['details'] = self.details
+        if self.digest:
+            data['digest'] = self.digest
+        if self.owner is not None:
+            data['owner'] = self.owner
+        return data
+
+
+class JobStore(object):
+    """Upload payloads and job states kept as files.
+
+    Any process of the host can report the state of a job.
+    """
+
+    def __init__(self, path):
+        """Store constructor.
+
+        :param path: directory of the job files
+        """
+        self.path = path
+
+    def payload_path(self, job_id):
+        """Path of the uploaded maDMP of a job."""
+        return os.path.join(self.path, job_id + '.json')
+
+    def state_path(self, job_id):
+        """Path of the state of a job."""
+        return os.path.join(self.path, job_id + '.state.json')
+
+    def create(self, payload, digest=None, owner=None):
+        """
+        Store a payload and create its job.
+
+        :param payload: the maDMP as dictionary or as a binary stream
+        :param digest: digest of the maDMP, stored once its records exist
+        :param owner: id of the user owning the created records
+        :returns: the new :class:`Job`
+        """
+        job = Job(uuid.uuid4().hex, digest=digest, owner=owner)
+        os.makedirs(self.path, exist_ok=True)
+
+        with open(self.payload_path(job.id), 'wb') as fp:
+            if isinstance(payload, dict):
+                fp.write(json.dumps(payload).encode('utf-8'))
+            else:
+                payload.seek(0)
+                shutil.copyfileobj(payload, fp)
+
+        self.save(job)
+        return job
+
+    def save(self, job):
+        """Persist the state of a job."""
+        tmp_path = self.state_path(job.id) + '.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(job.to_dict(), fp)
+        os.replace(tmp_path, self.state_path(job.id))
+
+    def get(self, job_id):
+        """
+        Get a job.
+
+        :param job_id: the job id
+        :returns: the :class:`Job`, None if it does not exist
+        """
+        try:
+            uuid.UUID(hex=job_id)
+            with open(self.state_path(job_id)) as fp:
+                return Job(**json.load(fp))
+        except (ValueError, IOError):
+            return None
+
+    def remove_payload(self, job_id):
+        """Delete the stored payload of a finished job."""
+        try:
+            os.remove(self.payload_path(job_id))
+        except OSError:
+            pass
+
+
+class JobManager(object):
+    """Runs upload jobs in a bounded pool of threads or processes."""
+
+    def __init__(self, store, max_workers=2, executor='thread',
+                 app_factory=None):
+        """Manager constructor.
+
+        :param store: the :class:`JobStore`
+        :param max_workers: size of the worker pool
+        :param executor: ``'thread'`` or ``'process'``
+        :param app_factory: import path of the application factory used by
+            worker processes, required for the ``'process'`` executor
+        """
+        if executor == 'process' and not app_factory:
+            raise RuntimeError('Process upload workers need an app factory.')
+
+        self.store = store
+        self.max_workers = max_workers
+        self.executor = executor
+        self.app_factory = app_factory
+        self._pool = None
+
+    @property
+    def pool(self):
+        """The worker pool, created on first use."""
+        if self._pool is None:
+            cls = ProcessPoolExecutor if self.executor == 'process' \
+                else ThreadPoolExecutor
+            self._pool = cls(max_workers=self.max_workers)
+        return self._pool
+
+    def submit(self, payload, digest=None, owner=None):
+        """
+        Store a payload and queue its job.
+
+        :param payload: the maDMP as dictionary or as a binary stream
+        :param digest: digest of the maDMP, stored once its records exist
+        :param owner: id of the user owning the created records
+        :returns: the queued :class:`Job`
+        """
+        job = self.store.create(payload, digest=digest, owner=owner)
+
+        if self.executor == 'process':
+            self.pool.submit(run_job, self.store.path, job.id,
+                             app_factory=self.app_factory)
+        else:
+            self.pool.submit(run_job, self.store.path, job.id,
+                             app=current_app._get_current_object())
+
+        return job
+
+    def run(self, func, *args):
+        """
+        Run a background task in the worker pool.
+
+        :param func: the function, defined at module level for process workers
+        :param args: the positional arguments of the function
+        :returns: the :class:`concurrent.futures.Future` of the task
+        """
+        if self.executor == 'process':
+            return self.pool.submit(run_task, func, args,
+                                    app_factory=self.app_factory)
+        return self.pool.submit(run_task, func, args,
+                                app=current_app._get_current_object())
+
+
+_worker_app = None
+
+
+def worker_app(app=None, app_factory=None):
+    """
+    Application of a worker.
+
+    :param app: the application, created with ``app_factory`` if not given
+    :param app_factory: import path of the application factory
+    :returns: the application, created once per worker process
+    """
+    global _worker_app
+
+    if app is None:
+        if _worker_app is None:
+            _worker_app = import_string(app_factory)()
+        app = _worker_app
+
+    return app
+
+
+def run_job(path, job_id, app=None, app_factory=None):
+    """
+    Run an upload job within an application context.
+
+    :param path: directory of the job files
+    :param job_id: the job id
+    :param app: the application, created with ``app_factory`` if not given
+    :param app_factory: import path of the application factory
+    """
+    with worker_app(app, app_factory).app_context():
+        process_job(JobStore(path), job_id)
+
+
+def run_task(func, args, app=None, app_factory=None):
+    """
+    Run a function within an application context.
+
+    :param func: the function, defined at module level for process workers
+    :param args: the positional arguments of the function
+    :param app: the application, created with ``app_factory`` if not given
+    :param app_factory: import path of the application factory
+    :returns: the result of the function
+    """
+    with worker_app(app, app_factory).app_context():
+        return func(*args)
+
+
+def process_job(store, job_id):
+    """
+    Validate the datasets of a stored maDMP and create their records.
+
+    :param store: the :class:`JobStore`
+    :param job_id: the job id
+    """
+    job = store.get(job_id)
+    job.status = 'running'
+    store.save(job)
+
+    try:
+        with open(store.payload_path(job_id), 'rb') as fp:
+            madmp_stream = json_data = None
+
+            if current_app.config['INVENIO_MADMP_STREAMING_UPLOADS'] and ijson:
+                madmp_stream = MaDMPStream(fp)
+                current_madmp.schemas.validate_stream(madmp_stream)
+                job.total = madmp_stream.dataset_count
+                data = UploadMaDMP.extract_stream(madmp_stream)
+            else:
+                json_data = json.load(fp)
+                current_madmp.schemas.validate(json_data)
+                job.total = len(json_data['dmp']['dataset'])
+                data = UploadMaDMP.extract_data(json_data) or []
+
+            store.save(job)
+            batch_size = current_app.config['INVENIO_MADMP_RECORDS_BATCH_SIZE']
+
+            for responses in UploadMaDMP.ingest(data, batch_size, job.owner):
+                job.responses.extend(responses)
+                job.processed = len(job.responses)
+                store.save(job)
+
+            UploadMaDMP.remember(job.digest, job.responses, json_data,
+                                 madmp_stream)
+
+    except ValidationError as validation_exc:
+        job.status = 'failed'
+        job.message = 'JSON does not validate against the schema'
+        job.details = validation_exc.message
+    except (InvalidStream, JSONDecodeError) as json_exc:
+        job.status = 'failed'
+        job.message = 'JSON syntax error: ' + str(json_exc)
+    except Exception as exc:
+        job.status = 'failed'
+        job.message = 'Something went wrong'
+        print('Upload job ' + job_id + ': ' + exc.__str__())
+    else:
+        job.status = 'finished'
+        if any(item['status'] == 500 for item in job.responses):
+            job.message = 'Some records could not be created'
+    finally:
+        store.save(job)
+        store.remove_payload(job_id)
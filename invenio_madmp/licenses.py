@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Valid licenses of maDMP distributions."""
+
+import re
+from types import MappingProxyType
+
+
+def get_license_mapping():
+    """Maps valid licenses."""
+    license_mapping = {
+        'Apache License 2.0': 'https://opensource.org/licenses/Apache-2.0',
+        '3-Clause BSD License': 'https://opensource.org/licenses/BSD-3-Clause',
+        '2-Clause BSD License': 'https://opensource.org/licenses/BSD-2-Clause',
+        'GNU General Public License': {
+            'GNU Library General Public License version 2': 'https://opensource.org/licenses/LGPL-2.0',
+            'GNU Lesser General Public License version 2.1': 'https://opensource.org/licenses/LGPL-2.1',
+            'GNU Lesser General Public License version 3': 'https://opensource.org/licenses/LGPL-3.0'
+        },
+        'GNU LGPL': {
+            'GNU General Public License version 2': 'https://opensource.org/licenses/GPL-2.0',
+            'GNU General Public License version 3': 'https://opensource.org/licenses/GPL-3.0'
+        },
+        'MIT': 'https://opensource.org/licenses/MIT',
+        'Mozilla Public License 2.0': 'https://opensource.org/licenses/MPL-2.0',
+        'Common Development and Distribution License 1.0': 'https://opensource.org/licenses/CDDL-1.0',
+        'Eclipse Public License version 2.0': 'https://opensource.org/licenses/EPL-2.0',
+
+        'CC BY': 'https://creativecommons.org/licenses/by/4.0/',
+        'CC BY-SA': 'https://creativecommons.org/licenses/by-sa/4.0/',
+        'CC BY-ND': 'https://creativecommons.org/licenses/by-nd/4.0/',
+        'CC BY-NC': 'https://creativecommons.org/licenses/by-nc/4.0/',
+        'CC BY-NC-SA': 'https://creativecommons.org/licenses/by-nc-sa/4.0/',
+        'CC BY-NC-ND': 'https://creativecommons.org/licenses/by-nc-nd/4.0/'
+    }
+    return license_mapping
+
+
+def normalize_license_url(url):
+    """
+    Normalizes a license URL, so that its variants get the same key.
+
+    Scheme, ``www.``, letter case, trailing slashes and the ``licenses/``
+    path segment are ignored, e.g. ``http://creativecommons.org/by/4.0`` and
+    ``https://creativecommons.org/licenses/by/4.0/`` are the same license.
+
+    :param url: URL of license
+    :returns: the normalized URL
+    """
+    url = re.sub(r'^[a-z]+://', '', url.strip().lower())
+    if url.startswith('www.'):
+        url = url[4:]
+
+    host, _, path = url.partition('/')
+    path = path.strip('/')
+    if path.startswith('licenses/'):
+        path = path[len('licenses/'):]
+
+    return host + '/' + path
+
+
+class LicenseIndex(object):
+    """Immutable lookup of licenses by name and by URL."""
+
+    __slots__ = ('_urls', '_names')
+
+    def __init__(self, mapping):
+        """Index constructor.
+
+        :param mapping: license mapping as returned by :func:`get_license_mapping`
+        """
+        urls = {}
+        names = {}
+
+        for key, value in mapping.items():
+            group = value.items() if isinstance(value, dict) else ((key, value),)
+            for name, url in group:
+                urls[name] = url
+                names.setdefault(normalize_license_url(url), name)
+
+        object.__setattr__(self, '_urls', MappingProxyType(urls))
+        object.__setattr__(self, '_names', MappingProxyType(names))
+
+    def __setattr__(self, key, value):
+        """The index is immutable."""
+        raise AttributeError('LicenseIndex is immutable')
+
+    def __contains__(self, url):
+        """Checks if a URL belongs to a valid license."""
+        return self.name(url) is not None
+
+    def name(self, url):
+        """
+        Get the name of a license.
+
+        :param url: URL of license, in any of its variants
+        :returns: the license name, None if the license is not valid
+        """
+        if not isinstance(url, str):
+            return None
+        return self._names.get(normalize_license_url(url))
+
+    def url(self, name):
+        """
+        Get the URL of a license.
+
+        :param name: the license name
+        :returns: the canonical license URL, None if the license is not valid
+        """
+        return self._urls.get(name)
+
+    @property
+    def names(self):
+        """Names of the valid licenses."""
+        return tuple(self._urls)
+
+
+licenses = LicenseIndex(get_license_mapping())
+"""Index of the valid licenses, built once at import."""
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Mapping of maDMP documents to records and back."""
+
+from .licenses import licenses
+
+
+class Pick(object):
+    """Keep and rename some keys of an object."""
+
+    def __init__(self, **keys):
+        """Converter constructor.
+
+        :param keys: the maDMP keys to keep, as keywords with the record key
+            or with a ``(record key, converter)`` tuple
+        """
+        self.keys = {
+            source: target if isinstance(target, tuple) else (target, None)
+            for source, target in keys.items()
+        }
+        self.inverse_keys = {
+            target: (source, load) for source, (target, load) in self.keys.items()
+        }
+
+    def __call__(self, value):
+        """Convert a maDMP object to a record object."""
+        keys = self.keys
+        result = {}
+        for key in value:
+            if key in keys:
+                target, load = keys[key]
+                result[target] = load(value[key]) if load else value[key]
+        return result
+
+    def inverse(self, value):
+        """Convert a record object back to a maDMP object."""
+        keys = self.inverse_keys
+        result = {}
+        for key in value:
+            if key in keys:
+                source, load = keys[key]
+                result[source] = load.inverse(value[key]) if load else value[key]
+        return result
+
+
+class Each(object):
+    """Convert every item of an array, dropping the items converted to None."""
+
+    def __init__(self, load):
+        """Converter constructor."""
+        self.load = load
+
+    def __call__(self, value):
+        """Convert the items of a maDMP array."""
+        return [item for item in map(self.load, value) if item is not None]
+
+    def inverse(self, value):
+        """Convert the items of a record array back."""
+        return [self.load.inverse(item) for item in value]
+
+
+class LicenseRef(object):
+    """Keep a license item only if its license is valid.
+
+    The reference is replaced by the canonical URL of the license.
+    """
+
+    def __call__(self, value):
+        """Convert a maDMP license item."""
+        name = licenses.name(value.get('license_ref'))
+        if name is None:
+            return None
+
+        item = dict(value)
+        item['license_ref'] = licenses.url(name)
+        return item
+
+    def inverse(self, value):
+        """License items are stored as maDMP license items."""
+        return dict(value)
+
+
+class Field(object):
+    """Maps a maDMP key to a record key."""
+
+    def __init__(self, source, target=None, load=None, scalar=False):
+        """Field constructor.
+
+        :param source: the maDMP key
+        :param target: the record key, same as ``source`` if not given
+        :param load: converter of the maDMP value to the record value, with
+            an ``inverse`` method for the way back
+        :param scalar: if True, lists and objects are ignored
+        """
+        self.source = source
+        self.target = target or source
+        self.load = load
+        self.scalar = scalar
+
+    def extract(self, value, record):
+        """
+        Store a maDMP value in the record.
+
+        :param value: the maDMP value
+        :param record: dictionary of the record being extracted
+        """
+        if self.scalar and isinstance(value, (dict, list)):
+            return
+        record[self.target] = self.load(value) if self.load else value
+
+    def dump(self, record, result):
+        """
+        Store the record value of the field in a maDMP object.
+
+        :param record: the record as dictionary
+        :param result: dictionary of the maDMP object being built
+        """
+        if self.target in record:
+            value = record[self.target]
+            result[self.source] = self.load.inverse(value) if self.load else value
+
+    def keys(self):
+        """Record keys written by the field."""
+        return (self.target,)
+
+
+class Nested(Field):
+    """Maps an array of maDMP objects into the keys of the same record.
+
+    If a ``target`` is given, the converted array is stored as well, so the
+    array can be dumped back without loss.
+    """
+
+    def __init__(self, source, level, target=None, load=None):
+        """Field constructor.
+
+        :param source: the maDMP key of the array
+        :param level: the mapping level of the array items
+        :param target: the record key of the converted array
+        :param load: converter of the array
+        """
+        super(Nested, self).__init__(source, target, load)
+        self.level = level
+        self.stored = target is not None
+        self.fields = {}
+
+    def bind(self, fields):
+        """
+        Copy of the field that extracts the given fields of every item.
+
+        :param fields: dictionary of the item fields by maDMP key
+        """
+        bound = Nested(self.source, self.level,
+                       self.target if self.stored else None, self.load)
+        bound.fields = fields
+        return bound
+
+    def extract(self, value, record):
+        """Extract every item of the array into the record."""
+        if not isinstance(value, list):
+            return
+
+        fields = self.fields
+        for item in value:
+            for key in item:
+                field = fields.get(key)
+                if field is not None:
+                    field.extract(item[key], record)
+
+        if self.stored:
+            super(Nested, self).extract(value, record)
+
+    def dump(self, record, result):
+        """
+        Dump the stored array, or a single item built from the record keys.
+
+        :param record: the record as dictionary
+        :param result: dictionary of the maDMP object being built
+        """
+        if self.stored and self.target in record:
+            return super(Nested, self).dump(record, result)
+
+        item = {}
+        for field in self.fields.values():
+            field.dump(record, item)
+        if item:
+            result[self.source] = [item]
+
+    def keys(self):
+        """Record keys written by the field and the fields of its items."""
+        keys = (self.target,) if self.stored else ()
+        for field in self.fields.values():
+            keys += field.keys()
+        return keys
+
+
+class LicenseField(Field):
+    """Maps the license array of a distribution.
+
+    The name of the first valid license is stored as ``license`` and the
+    last start date as ``license_start_date``. Licenses that are not in
+    :data:`invenio_madmp.licenses.licenses` are ignored.
+    """
+
+    def __init__(self, source='license', target='license'):
+        """Field constructor."""
+        super(LicenseField, self).__init__(source, target)
+
+    def extract(self, value, record):
+        """Store the license name and start date in the record."""
+        for item in value:
+            name = licenses.name(item.get('license_ref'))
+            if name and self.target not in record:
+                record[self.target] = name
+            if 'start_date' in item:
+                record[self.target + '_start_date'] = item['start_date']
+
+    def dump(self, record, result):
+        """Store the license of the record as maDMP license array."""
+        url = licenses.url(record.get(self.target))
+        if url is None:
+            return
+
+        item = {'license_ref': url}
+        if self.target + '_start_date' in record:
+            item['start_date'] = record[self.target + '_start_date']
+        result[self.source] = [item]
+
+    def keys(self):
+        """Record keys of the license name and start date."""
+        return (self.target, self.target + '_start_date')
+
+
+MADMP_MAPPING = {
+    'dmp': (
+        Field('dmp_id', load=Pick(identifier='identifier', type='type')),
+        Field('ethical_issues_exist'),
+        Field('contact', load=Pick(name='name', mbox='mbox')),
+        Field('contributor', 'contributors',
+              load=Each(Pick(name='name', mbox='email', role='role'))),
+    ),
+    'dataset': (
+        Field('dataset_id', load=Pick(identifier='identifier', type='type')),
+        Field('title', scalar=True),
+        Field('description', scalar=True),
+        Field('issued', 'publication_date', scalar=True),
+        Field('type', 'upload_type', scalar=True),
+        Field('personal_data', scalar=True),
+        Field('sensitive_data', scalar=True),
+        Nested('distribution', 'distribution', 'distributions',
+               load=Each(Pick(
+                   title='title',
+                   description='description',
+                   access_url='access_url',
+                   download_url='download_url',
+                   format='format',
+                   byte_size='byte_size',
+                   available_until='available_until',
+                   data_access='data_access',
+                   license=('license', Each(LicenseRef())),
+               ))),
+    ),
+    'distribution': (
+        Field('data_access'),
+        LicenseField(),
+    ),
+}
+"""Which maDMP keys become which record keys, per level of the maDMP.
+
+The keys of ``dmp`` are stored in every record, the keys of each ``dataset``
+in the record of the dataset. ``dmp_id`` and ``dataset_id`` link the records
+back to their maDMP and dataset. The ``data_access`` and first license of the
+distributions are stored as record keys for searching, while the
+distributions themselves are kept in ``distributions``.
+"""
+
+
+class Mapping(object):
+    """Mapping with its fields indexed by maDMP key."""
+
+    def __init__(self, mapping):
+        """Compile a mapping.
+
+        :param mapping: dictionary with the fields of every maDMP level
+        """
+        self.levels = {
+            level: {field.source: field for field in fields}
+            for level, fields in mapping.items()
+        }
+
+        for fields in self.levels.values():
+            for key, field in fields.items():
+                if isinstance(field, Nested):
+                    fields[key] = field.bind(self.levels[field.level])
+
+        self.record_keys = frozenset(
+            key for level in ('dmp', 'dataset')
+            for field in self.levels[level].values() for key in field.keys()
+        )
+        """Record keys written by the mapping."""
+
+
+class Extractor(Mapping):
+    """Single pass extractor compiled from a mapping."""
+
+    def extract(self, document):
+        """
+        Extract one record per dataset of a maDMP.
+
+        Every key of the document is visited once, so the cost is linear in
+        the size of the document.
+
+        :param document: the maDMP as dictionary
+        :returns: list of dictionaries, None if the document has no ``dmp``
+        """
+        dmp = document.get('dmp') if isinstance(document, dict) else None
+        if not dmp:
+            return None
+
+        common = self.extract_common(dmp)
+
+        datasets = dmp.get('dataset')
+        if not isinstance(datasets, list):
+            return []
+
+        return [self.extract_dataset(dataset, common) for dataset in datasets]
+
+    def extract_common(self, dmp):
+        """
+        Extract the values shared by the records of all datasets.
+
+        :param dmp: the ``dmp`` object of the maDMP
+        :returns: dictionary with the record values
+        """
+        common = {}
+        dmp_fields = self.levels['dmp']
+
+        for key in dmp:
+            field = dmp_fields.get(key)
+            if field is not None:
+                field.extract(dmp[key], common)
+
+        return common
+
+    def extract_dataset(self, dataset, common=None):
+        """
+        Extract the record of a single dataset.
+
+        :param dataset: the dataset as dictionary
+        :param common: values extracted from the ``dmp`` level
+        :returns: dictionary with the record values
+        """
+        record = dict(common or {})
+        dataset_fields = self.levels['dataset']
+
+        for key in dataset:
+            field = dataset_fields.get(key)
+            if field is not None:
+                field.extract(dataset[key], record)
+
+        return record
+
+
+class Serializer(Mapping):
+    """maDMP serializer compiled from the same mapping as the extractor."""
+
+    def __init__(self, mapping):
+        """Compile a mapping."""
+        super(Serializer, self).__init__(mapping)
+        self.dmp_fields = tuple(self.levels['dmp'].values())
+        self.dataset_fields = tuple(self.levels['dataset'].values())
+
+    def serialize(self, records):
+        """
+        Build a maDMP with one dataset per record.
+
+        The ``dmp`` values are taken from the first record.
+
+        :param records: list of record dictionaries
+        :returns: the maDMP as dictionary
+        """
+        dmp = {}
+        if records:
+            for field in self.dmp_fields:
+                field.dump(records[0], dmp)
+
+        dmp['dataset'] = [self.serialize_dataset(record) for record in records]
+        return {'dmp': dmp}
+
+    def serialize_dataset(self, record):
+        """
+        Build the maDMP dataset of a record.
+
+        :param record: the record as dictionary
+        :returns: the dataset as dictionary
+        """
+        dataset = {}
+        for field in self.dataset_fields:
+            field.dump(record, dataset)
+        return dataset
+
+
+extractor = Extractor(MADMP_MAPPING)
+"""Extractor of the maDMP mapping, compiled once at import."""
+
+serializer = Serializer(MADMP_MAPPING)
+"""Serializer of the maDMP mapping, compiled once at import."""
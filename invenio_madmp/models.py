@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Database models of invenio-maDMP."""
+
+from invenio_db import db
+from invenio_files_rest.models import FileInstance
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.models import RecordMetadata
+from sqlalchemy.dialects import postgresql
+from sqlalchemy_utils.models import Timestamp
+from sqlalchemy_utils.types import JSONType, UUIDType
+
+JSON_TYPE = db.JSON().with_variant(
+    postgresql.JSONB(none_as_null=True), 'postgresql',
+).with_variant(
+    JSONType(), 'sqlite',
+)
+"""Column type of JSON documents."""
+
+
+class MaDMPDigest(db.Model, Timestamp):
+    """Digest of an uploaded maDMP with the records created from it."""
+
+    __tablename__ = 'madmp_digest'
+
+    digest = db.Column(db.String(64), primary_key=True)
+    """SHA-256 of the canonical JSON of the maDMP, as hex string."""
+
+    recids = db.Column(JSON_TYPE, default=list, nullable=False)
+    """Record identifiers of the datasets of the maDMP, in order."""
+
+    @classmethod
+    def get_recids(cls, digest):
+        """
+        Get the records created from a maDMP.
+
+        :param digest: the digest of the maDMP
+        :returns: list of record identifiers, None if the digest is unknown
+        """
+        obj = cls.query.get(digest)
+        return obj.recids if obj is not None else None
+
+    @classmethod
+    def store(cls, digest, recids):
+        """
+        Remember the records created from a maDMP.
+
+        The digest is replaced if it exists. The caller commits the session.
+
+        :param digest: the digest of the maDMP
+        :param recids: list of record identifiers
+        """
+        with db.session.begin_nested():
+            db.session.merge(cls(digest=digest, recids=list(recids)))
+
+    @classmethod
+    def remove(cls, digest):
+        """
+        Forget the records created from a maDMP.
+
+        The caller commits the session.
+
+        :param digest: the digest of the maDMP
+        """
+        cls.query.filter_by(digest=digest).delete()
+
+
+def identifier_of(value, key):
+    """
+    Reads an identifier object of a maDMP, e.g. ``dmp_id``.
+
+    :param value: the maDMP object holding the identifier
+    :param key: key of the identifier object
+    :returns: the identifier as string, None if there is none
+    """
+    value = value.get(key) if isinstance(value, dict) else None
+    identifier = value.get('identifier') if isinstance(value, dict) else None
+    return identifier if isinstance(identifier, str) and identifier else None
+
+
+class MaDMP(db.Model, Timestamp):
+    """An uploaded maDMP, stored without its datasets."""
+
+    __tablename__ = 'madmp_dmp'
+
+    id = db.Column(db.String(255), primary_key=True)
+    """Identifier of the maDMP, from ``dmp.dmp_id``."""
+
+    header = db.Column(JSON_TYPE, nullable=False)
+    """The maDMP without ``dmp.dataset``."""
+
+    version_id = db.Column(db.Integer, nullable=False)
+    """Used by SQLAlchemy for optimistic concurrency control."""
+
+    datasets = db.relationship(
+        'MaDMPDataset',
+        order_by='MaDMPDataset.position',
+        cascade='all, delete-orphan',
+        backref='madmp',
+    )
+
+    __mapper_args__ = {
+        'version_id_col': version_id
+    }
+
+    def to_document(self):
+        """The whole maDMP as dictionary."""
+        document = dict(self.header)
+        document['dmp'] = dict(document['dmp'])
+        document['dmp']['dataset'] = [row.document for row in self.datasets]
+        return document
+
+    @classmethod
+    def store(cls, header, datasets, recids):
+        """
+        Store an uploaded maDMP and link its datasets to their records.
+
+        An earlier maDMP with the same identifier is replaced. Nothing is
+        stored if the maDMP or any of its datasets has no identifier, or if
+        dataset identifiers repeat. The caller commits the session.
+
+        :param header: the maDMP without ``dmp.dataset``
+        :param datasets: iterable of the dataset dictionaries
+        :param recids: record identifiers of the datasets, in the same order
+        :returns: the :class:`MaDMP`, None if it was not stored
+        """
+        dmp_id = identifier_of(header.get('dmp'), 'dmp_id')
+        if dmp_id is None:
+            return None
+
+        record_ids = dict(
+            db.session.query(
+                PersistentIdentifier.pid_value,
+                PersistentIdentifier.object_uuid,
+            ).filter(
+                PersistentIdentifier.pid_type == 'recid',
+                PersistentIdentifier.pid_value.in_([str(r) for r in recids]),
+            )
+        )
+
+        rows = []
+        seen = set()
+        for position, (dataset, recid) in enumerate(zip(datasets, recids)):
+            dataset_id = identifier_of(dataset, 'dataset_id')
+            record_id = record_ids.get(str(recid))
+            if dataset_id is None or record_id is None or dataset_id in seen:
+                return None
+            seen.add(dataset_id)
+
+            rows.append(MaDMPDataset(
+                dataset_id=dataset_id,
+                position=position,
+                document=dataset,
+                record_id=record_id,
+            ))
+
+        with db.session.begin_nested():
+            madmp = cls.query.get(dmp_id)
+            if madmp is None:
+                madmp = cls(id=dmp_id)
+                db.session.add(madmp)
+            madmp.header = header
+            madmp.datasets = rows
+
+        return madmp
+
+
+class MaDMPDataset(db.Model):
+    """A dataset of a stored maDMP and the record created from it."""
+
+    __tablename__ = 'madmp_dataset'
+
+    dmp_id = db.Column(
+        db.String(255),
+        db.ForeignKey(MaDMP.id, ondelete='CASCADE'),
+        primary_key=True,
+    )
+    """Identifier of the maDMP."""
+
+    dataset_id = db.Column(db.String(255), primary_key=True)
+    """Identifier of the dataset, from ``dataset_id``."""
+
+    position = db.Column(db.Integer, nullable=False)
+    """Index of the dataset in the dataset array of the maDMP."""
+
+    document = db.Column(JSON_TYPE, nullable=False)
+    """The dataset as uploaded."""
+
+    record_id = db.Column(
+        UUIDType,
+        db.ForeignKey(RecordMetadata.id, ondelete='CASCADE'),
+        nullable=False,
+        index=True,
+    )
+    """Record of the dataset."""
+
+
+class MaDMPFile(db.Model, Timestamp):
+    """The stored file of some content, so identical files are stored once."""
+
+    __tablename__ = 'madmp_file'
+
+    digest = db.Column(db.String(64), primary_key=True)
+    """SHA-256 of the content, as hex string."""
+
+    size = db.Column(db.BigInteger, primary_key=True)
+    """Size of the content in bytes."""
+
+    file_id = db.Column(
+        UUIDType,
+        db.ForeignKey(FileInstance.id, ondelete='CASCADE'),
+        nullable=False,
+        index=True,
+    )
+    """File instance with the content."""
+
+    file = db.relationship(FileInstance)
+
+    @classmethod
+    def get_file(cls, digest, size):
+        """
+        Get the stored file of some content.
+
+        :param digest: the SHA-256 of the content
+        :param size: the size of the content
+        :returns: the readable :class:`invenio_files_rest.models.FileInstance`,
+            None if the content is not stored
+        """
+        obj = cls.query.get((digest, size))
+        if obj is None or not obj.file.readable:
+            return None
+        return obj.file
+
+    @classmethod
+    def store(cls, digest, size, fileinstance):
+        """
+        Remember the stored file of some content.
+
+        The caller commits the session.
+
+        :param digest: the SHA-256 of the content
+        :param size: the size of the content
+        :param fileinstance: the file instance with the content
+        """
+        with db.session.begin_nested():
+            db.session.merge(cls(digest=digest, size=size, file_id=fileinstance.id))
+
+
+__all__ = ('MaDMP', 'MaDMPDataset', 'MaDMPDigest', 'MaDMPFile')
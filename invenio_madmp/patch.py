@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Patches of stored maDMPs."""
+
+import copy
+
+import jsonpatch
+from jsonpointer import JsonPointerException
+
+MERGE_PATCH = 'application/merge-patch+json'
+"""Media type of JSON merge patches (RFC 7386)."""
+
+JSON_PATCH = 'application/json-patch+json'
+"""Media type of JSON patches (RFC 6902)."""
+
+
+class InvalidPatch(ValueError):
+    """The patch cannot be applied to the maDMP."""
+
+
+def merge_patch(target, patch):
+    """
+    Applies a JSON merge patch.
+
+    Objects are merged recursively, ``null`` removes a key and any other
+    value, arrays included, replaces the target value.
+
+    :param target: the document
+    :param patch: the merge patch
+    :returns: the patched document, the target is not modified
+    """
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def apply_patch(document, patch, mimetype):
+    """
+    Applies a merge patch or a JSON patch to a maDMP.
+
+    :param document: the maDMP as dictionary
+    :param patch: the decoded patch
+    :param mimetype: media type of the patch
+    :returns: the patched maDMP
+    :raises InvalidPatch: if the patch is not valid or cannot be applied
+    """
+    if mimetype == JSON_PATCH:
+        try:
+            return jsonpatch.apply_patch(document, patch)
+        except (jsonpatch.JsonPatchException, JsonPointerException,
+                TypeError) as exc:
+            raise InvalidPatch(str(exc))
+
+    if mimetype == MERGE_PATCH:
+        return merge_patch(document, patch)
+
+    raise InvalidPatch('Unsupported patch media type: {0}'.format(mimetype))
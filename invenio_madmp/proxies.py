@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Proxies for the invenio-maDMP extension."""
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+current_madmp = LocalProxy(lambda: current_app.extensions['invenio-madmp'])
+"""Proxy to the current invenio-maDMP extension."""
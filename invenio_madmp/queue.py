@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Deferred indexing of maDMP records."""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from invenio_records.api import Record
+
+from .indexer import MaDMPIndexer
+
+
+class MemoryQueueBackend(object):
+    """In-process queue of record ids."""
+
+    def __init__(self):
+        """Backend constructor."""
+        self._items = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of queued record ids."""
+        return len(self._items)
+
+    def push(self, record_ids, attempt=0, not_before=0):
+        """
+        Append record ids to the queue.
+
+        :param record_ids: iterable of record UUIDs
+        :param attempt: how many times indexing of the records has failed
+        :param not_before: time before which the records are not popped
+        """
+        with self._lock:
+            self._items.extend(
+                (str(rid), attempt, not_before) for rid in record_ids)
+
+    def pop(self, max_items, now=None):
+        """
+        Remove the first record ids that are due from the queue.
+
+        :param max_items: maximum number of ids to remove
+        :param now: the current time, from :func:`time.time` if None
+        :returns: list of ``(record_id, attempt)`` tuples
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            items, kept = [], deque()
+            while self._items and len(items) < max_items:
+                item = self._items.popleft()
+                if item[2] <= now:
+                    items.append(item[:2])
+                else:
+                    kept.append(item)
+            self._items.extendleft(reversed(kept))
+            return items
+
+
+class SQLiteQueueBackend(object):
+    """Queue of record ids persisted in a SQLite file.
+
+    The file can be shared by the worker processes of one host.
+    """
+
+    def __init__(self, path):
+        """Backend constructor.
+
+        :param path: path of the SQLite database file
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS madmp_index_queue ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'record_id TEXT NOT NULL, '
+                'attempt INTEGER NOT NULL DEFAULT 0, '
+                'not_before REAL NOT NULL DEFAULT 0)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection to the queue database."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def __len__(self):
+        """Number of queued record ids."""
+        with self._connect() as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM madmp_index_queue').fetchone()[0]
+
+    def push(self, record_ids, attempt=0, not_before=0):
+        """
+        Append record ids to the queue.
+
+        :param record_ids: iterable of record UUIDs
+        :param attempt: how many times indexing of the records has failed
+        :param not_before: time before which the records are not popped
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT INTO madmp_index_queue '
+                '(record_id, attempt, not_before) VALUES (?, ?, ?)',
+                [(str(rid), attempt, not_before) for rid in record_ids]
+            )
+            conn.execute('COMMIT')
+
+    def pop(self, max_items, now=None):
+        """
+        Remove the first record ids that are due from the queue.
+
+        :param max_items: maximum number of ids to remove
+        :param now: the current time, from :func:`time.time` if None
+        :returns: list of ``(record_id, attempt)`` tuples
+        """
+        now = time.time() if now is None else now
+
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                'SELECT id, record_id, attempt FROM madmp_index_queue '
+                'WHERE not_before <= ? ORDER BY id LIMIT ?', (now, max_items)
+            ).fetchall()
+            conn.executemany('DELETE FROM madmp_index_queue WHERE id = ?',
+                             [(row[0],) for row in rows])
+            conn.execute('COMMIT')
+
+        return [(row[1], row[2]) for row in rows]
+
+
+def memory_queue_backend(app):
+    """In-process queue backend."""
+    return MemoryQueueBackend()
+
+
+def sqlite_queue_backend(app):
+    """Queue backend in an SQLite database of the instance folder."""
+    return SQLiteQueueBackend(
+        os.path.join(app.instance_path, 'madmp-index-queue.db')
+    )
+
+
+class IndexQueue(object):
+    """
+    Queue of records waiting to be indexed.
+
+    Record ids are put on the queue after the transaction that created them
+    is committed. A consumer thread drains the queue in micro-batches of at
+    most ``batch_size`` ids, at least every ``flush_interval`` seconds,
+    through a single shared :class:`invenio_madmp.indexer.MaDMPIndexer`.
+
+    Records that fail to index are put back on the queue and retried after
+    ``retry_delay`` seconds, doubled on every further attempt, so an
+    unavailable cluster does not use up the retries at once.
+    """
+
+    def __init__(self, backend, batch_size=500, flush_interval=1.0,
+                 max_retries=3, retry_delay=5.0):
+        """Queue constructor.
+
+        :param backend: queue backend, e.g. :class:`MemoryQueueBackend`
+        :param batch_size: maximum number of records per bulk request
+        :param flush_interval: maximum seconds a record waits on the queue
+        :param max_retries: times a record is put back on the queue after
+            failing to index
+        :param retry_delay: seconds before the first retry of a record
+        """
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._indexer = None
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def indexer(self):
+        """Indexer shared by all batches."""
+        if self._indexer is None:
+            self._indexer = MaDMPIndexer()
+        return self._indexer
+
+    def enqueue(self, record_ids, app=None):
+        """
+        Put records on the queue.
+
+        :param record_ids: iterable of record UUIDs
+        :param app: the application, to start the consumer thread
+        """
+        self.backend.push(record_ids)
+
+        if app is not None:
+            self.start(app)
+        if len(self.backend) >= self.batch_size:
+            self._wakeup.set()
+
+    def consume(self, now=None):
+        """
+        Index one micro-batch of the records that are due.
+
+        Must be called within an application context.
+
+        :param now: the current time, from :func:`time.time` if None
+        :returns: number of records taken from the queue
+        """
+        now = time.time() if now is None else now
+        items = self.backend.pop(self.batch_size, now=now)
+        if not items:
+            return 0
+
+        attempts = dict(items)
+        try:
+            records = Record.get_records(list(attempts))
+            failed = self.indexer.bulk_index_records(records)
+        except Exception as exc:
+            print('Error indexing queued records: ' + exc.__str__())
+            failed = list(attempts)
+
+        for record_id in failed:
+            attempt = attempts[record_id] + 1
+            if attempt <= self.max_retries:
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                self.backend.push([record_id], attempt=attempt,
+                                  not_before=now + delay)
+            else:
+                print('Giving up indexing record ' + record_id)
+
+        return len(items)
+
+    def start(self, app):
+        """Start the consumer thread if it is not running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            self._thread = threading.Thread(
+                target=self.run, args=(app,), name='madmp-index-queue'
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def run(self, app):
+        """
+        Drain the queue until the process exits.
+
+        :param app: the application used for the consumer's app context
+        """
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            with app.app_context():
+                try:
+                    while self.consume() == self.batch_size:
+                        pass
+                except Exception as exc:
+                    print('Error indexing queued records: ' + exc.__str__())
+                    time.sleep(self.flush_interval)
@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""maDMP schema registry."""
+
+import copy
+import itertools
+import json
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from jsonschema import FormatChecker, ValidationError
+from jsonschema.validators import validator_for
+
+from .compiler import compile_validator
+
+SCHEMA_VERSION_RE = re.compile(r'(\d+(?:\.\d+)+)/?(?:[^/]*\.json)?$')
+"""Matches the version segment of a maDMP schema URL."""
+
+
+class UnknownSchemaVersion(Exception):
+    """The document declares a maDMP schema version that is not registered."""
+
+    def __init__(self, version):
+        """Initialize exception."""
+        super(UnknownSchemaVersion, self).__init__(
+            'Unsupported maDMP schema version: {0}'.format(version)
+        )
+        self.version = version
+
+
+class SchemaValidationErrors(ValidationError):
+    """Several errors of a maDMP, or errors found by parallel validation.
+
+    The message is the one of the first error, ``errors`` lists all errors
+    found as ``{'path': ..., 'message': ...}``.
+    """
+
+    def __init__(self, errors):
+        """Initialize exception."""
+        super(SchemaValidationErrors, self).__init__(errors[0]['message'])
+        self.errors = errors
+
+
+def json_path(path):
+    """
+    Formats the path of a value as JSON path, e.g. ``$.dmp.dataset[0]``.
+
+    :param path: iterable of object keys and array indexes
+    """
+    return '$' + ''.join(
+        '[{0}]'.format(key) if isinstance(key, int) else '.' + key
+        for key in path
+    )
+
+
+def error_item(error):
+    """Path and message of a validation error, as dictionary."""
+    return {'path': json_path(error.absolute_path), 'message': error.message}
+
+
+def first_errors(errors, max_errors, prefix=()):
+    """
+    Takes the first errors of a validation, without looking for the others.
+
+    :param errors: iterable of :class:`jsonschema.ValidationError`
+    :param max_errors: maximum number of errors to take, 0 for all
+    :param prefix: path of the validated value in the maDMP
+    :returns: list of errors
+    """
+    result = []
+    for error in errors:
+        error.path.extendleft(reversed(prefix))
+        result.append(error)
+        if len(result) == max_errors:
+            break
+    return result
+
+
+def split_schema(schema):
+    """
+    Splits a maDMP schema into its envelope and dataset array schemas.
+
+    The envelope schema validates the document without ``dmp.dataset``.
+
+    :param schema: the maDMP schema as dictionary
+    :returns: tuple with the envelope and dataset array schemas, Nones if the
+        schema has no dataset array
+    """
+    try:
+        datasets = schema['properties']['dmp']['properties']['dataset']
+    except (KeyError, TypeError):
+        return None, None
+
+    envelope = copy.deepcopy(schema)
+    dmp = envelope['properties']['dmp']
+    del dmp['properties']['dataset']
+    if 'required' in dmp:
+        dmp['required'] = [key for key in dmp['required'] if key != 'dataset']
+
+    return envelope, datasets
+
+
+def split_document(document):
+    """
+    Splits a maDMP into its header and its dataset array.
+
+    :param document: the maDMP as dictionary
+    :returns: tuple with the maDMP without ``dmp.dataset`` and the datasets
+        list, the unchanged document and None if it has no dataset array
+    """
+    dmp = document.get('dmp') if isinstance(document, dict) else None
+    if not isinstance(dmp, dict) or not isinstance(dmp.get('dataset'), list):
+        return document, None
+
+    header = dict(document)
+    header['dmp'] = {key: value for key, value in dmp.items() if key != 'dataset'}
+    return header, dmp['dataset']
+
+
+class SchemaEntry(object):
+    """A loaded schema file together with its compiled validators."""
+
+    def __init__(self, path, formats=None, compiled=True):
+        """Entry constructor.
+
+        :param path: path of the schema file
+        :param formats: names of the formats to check, all if None
+        :param compiled: if True, the validators check documents with
+            functions compiled from the schema and only use ``jsonschema``
+            to report errors
+        """
+        self.path = path
+        self.formats = formats
+        self.compiled = compiled
+        self.mtime = None
+        self.schema = None
+        self.validator = None
+        self.envelope_validator = None
+        self.datasets_validator = None
+        self.dataset_validator = None
+
+    def is_stale(self):
+        """Checks if the schema file changed since it was last loaded."""
+        return self.mtime != os.stat(self.path).st_mtime
+
+    def load(self):
+        """Parse the schema file and build its validator."""
+        mtime = os.stat(self.path).st_mtime
+
+        with open(self.path) as json_file:
+            schema = json.load(json_file)
+
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+
+        envelope, datasets = split_schema(schema)
+        format_checker = FormatChecker(self.formats)
+
+        def build(subschema):
+            validator = cls(subschema, format_checker=format_checker)
+            return compile_validator(validator) if self.compiled else validator
+
+        self.schema = schema
+        self.validator = build(schema)
+        if envelope is not None:
+            self.envelope_validator = build(envelope)
+            self.datasets_validator = build(datasets)
+            self.dataset_validator = build(datasets.get('items', {}))
+        self.mtime = mtime
+
+
+class SchemaRegistry(object):
+    """Versioned maDMP schemas with precompiled validators.
+
+    Every schema is parsed and checked once. The file is only read again when
+    its modification time changes.
+    """
+
+    def __init__(self, schemas, default_version, processes=0,
+                 parallel_threshold=1000, chunk_size=100, formats=None,
+                 max_errors=1, compiled=True):
+        """Registry constructor.
+
+        :param schemas: dictionary mapping a schema version to its file path.
+            Relative paths are resolved against the package directory.
+        :param default_version: version used for documents that do not
+            declare one.
+        :param processes: size of the process pool validating datasets in
+            parallel, 0 to always validate in-process
+        :param parallel_threshold: minimum number of datasets of a maDMP for
+            its datasets to be validated in the process pool
+        :param chunk_size: number of datasets sent to a process at a time
+        :param formats: names of the formats to check, all registered formats
+            if None
+        :param max_errors: number of errors reported for an invalid maDMP.
+            With 1, validation stops at the first error. With 0, the whole
+            maDMP is validated and all errors are reported.
+        :param compiled: if True, valid documents are checked by functions
+            compiled from the schemas instead of ``jsonschema``
+        """
+        path = os.path.dirname(os.path.abspath(__file__))
+        formats = tuple(formats) if formats is not None else None
+
+        self.default_version = default_version
+        self.max_errors = max_errors
+        self._entry_args = {
+            version: (os.path.join(path, filename), formats, compiled)
+            for version, filename in schemas.items()
+        }
+        self._entries = {
+            version: SchemaEntry(*args)
+            for version, args in self._entry_args.items()
+        }
+        self._lock = threading.Lock()
+
+        self.processes = processes
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    @property
+    def pool(self):
+        """The validation process pool, created on first use."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        return self._pool
+
+    def parallel(self, dataset_count):
+        """Checks if datasets are validated in the process pool."""
+        return bool(self.processes) and \
+            dataset_count is not None and \
+            dataset_count >= self.parallel_threshold
+
+    @property
+    def versions(self):
+        """Registered schema versions."""
+        return tuple(self._entries)
+
+    def load_all(self):
+        """Load every registered schema."""
+        for version in self._entries:
+            self.entry(version)
+
+    def entry(self, version=None):
+        """Get the up-to-date schema entry of a version.
+
+        :param version: schema version, the default one if not given
+        :returns: the loaded :class:`SchemaEntry`
+        """
+        version = version or self.default_version
+
+        try:
+            entry = self._entries[version]
+        except KeyError:
+            raise UnknownSchemaVersion(version)
+
+        if entry.validator is None or entry.is_stale():
+            with self._lock:
+                if entry.validator is None or entry.is_stale():
+                    entry.load()
+
+        return entry
+
+    def get(self, version=None):
+        """Get the validator of a schema version.
+
+        :param version: schema version, the default one if not given
+        :returns: jsonschema validator instance
+        """
+        return self.entry(version).validator
+
+    def validator_for(self, document):
+        """Get the validator matching the version declared by a document."""
+        return self.get(self.version_of(document))
+
+    def raise_errors(self, errors):
+        """
+        Raise the errors of a validation, if any.
+
+        :param errors: list of :class:`jsonschema.ValidationError`
+        :raises jsonschema.ValidationError: the error itself when stopping at
+            the first error, else :class:`SchemaValidationErrors`
+        """
+        if not errors:
+            return
+        if self.max_errors == 1:
+            raise errors[0]
+        raise SchemaValidationErrors([error_item(error) for error in errors])
+
+    def validate(self, document):
+        """
+        Validate a document against the schema version it declares.
+
+        maDMPs with at least ``parallel_threshold`` datasets are validated as
+        envelope plus datasets, the datasets in the process pool.
+
+        :param document: the maDMP as dictionary
+        :raises jsonschema.ValidationError: if the document is not valid
+        """
+        header, datasets = split_document(document)
+        if datasets is not None and self.parallel(len(datasets)) and \
+                self.splittable(header):
+            self.validate_envelope(header, len(datasets))
+            return self.validate_datasets(header, datasets, len(datasets))
+
+        validator = self.validator_for(document)
+        self.raise_errors(
+            first_errors(validator.iter_errors(document), self.max_errors)
+        )
+
+    def validate_envelope(self, header, dataset_count):
+        """
+        Validate a maDMP without its datasets.
+
+        :param header: the maDMP without ``dmp.dataset``
+        :param dataset_count: number of items of the dataset array
+        :raises jsonschema.ValidationError: if the envelope is not valid
+        """
+        entry = self.entry(self.version_of(header))
+
+        errors = first_errors(entry.envelope_validator.iter_errors(header),
+                              self.max_errors)
+        if not errors and dataset_count == 0:
+            errors = first_errors(entry.datasets_validator.iter_errors([]),
+                                  self.max_errors, ('dmp', 'dataset'))
+        self.raise_errors(errors)
+
+    def validate_datasets(self, header, datasets, dataset_count=None):
+        """
+        Validate datasets one at a time against the dataset sub-schema.
+
+        :param header: the maDMP without ``dmp.dataset``, for its version
+        :param datasets: iterable of dataset dictionaries
+        :param dataset_count: number of datasets, to decide on validating
+            them in the process pool
+        :raises jsonschema.ValidationError: if any dataset is not valid, or
+            :class:`SchemaValidationErrors` when validated in the process pool
+        """
+        version = self.version_of(header)
+        entry = self.entry(version)
+
+        if self.parallel(dataset_count):
+            return self.validate_datasets_parallel(version, datasets)
+
+        errors = []
+        for index, dataset in enumerate(datasets):
+            errors.extend(first_errors(
+                entry.dataset_validator.iter_errors(dataset),
+                self.max_errors - len(errors) if self.max_errors else 0,
+                ('dmp', 'dataset', index)
+            ))
+            if self.max_errors and len(errors) >= self.max_errors:
+                break
+        self.raise_errors(errors)
+
+    def validate_datasets_parallel(self, version, datasets):
+        """
+        Validate datasets in chunks in the process pool.
+
+        At most two chunks per process are pending at a time, so streamed
+        datasets are not all read into memory. No more chunks are sent once
+        ``max_errors`` errors are found.
+
+        :param version: schema version of the maDMP
+        :param datasets: iterable of dataset dictionaries
+        :raises SchemaValidationErrors: if any dataset is not valid
+        """
+        entry_args = self._entry_args[version or self.default_version]
+        max_errors = self.max_errors
+        errors = []
+        pending = deque()
+        datasets = iter(datasets)
+        offset = 0
+
+        def enough():
+            return max_errors and len(errors) >= max_errors
+
+        while not enough():
+            chunk = list(itertools.islice(datasets, self.chunk_size))
+            if not chunk:
+                break
+
+            pending.append(self.pool.submit(
+                validate_chunk, entry_args, max_errors, offset, chunk
+            ))
+            offset += len(chunk)
+
+            if len(pending) >= 2 * self.processes:
+                errors.extend(pending.popleft().result())
+
+        while pending and not enough():
+            errors.extend(pending.popleft().result())
+        for future in pending:
+            future.cancel()
+
+        if errors:
+            raise SchemaValidationErrors(errors[:max_errors or None])
+
+    def validate_stream(self, madmp_stream):
+        """
+        Validate a streamed maDMP one dataset at a time.
+
+        The envelope is validated first, then every dataset against the
+        dataset sub-schema, so only one dataset is in memory at any time.
+
+        :param madmp_stream: :class:`invenio_madmp.streaming.MaDMPStream`
+        :raises jsonschema.ValidationError: if the document is not valid
+        """
+        header = madmp_stream.header
+
+        if not self.splittable(header, madmp_stream.datasets_streamed):
+            # no dataset array to stream, the header is the whole document
+            return self.validate(header)
+
+        self.validate_envelope(header, madmp_stream.dataset_count)
+        self.validate_datasets(header, madmp_stream.datasets(),
+                               madmp_stream.dataset_count)
+
+    def splittable(self, header, datasets_found=True):
+        """Checks if a maDMP can be validated separately from its datasets."""
+        return datasets_found and \
+            self.entry(self.version_of(header)).envelope_validator is not None
+
+    @staticmethod
+    def version_of(document):
+        """
+        Reads the maDMP schema version declared by a document.
+
+        The version is taken from ``dmp.schema`` or the top level ``$schema``
+        URL, e.g. ``.../JSON-schema/1.0``.
+
+        :param document: the maDMP as dictionary
+        :returns: the version as string, None if the document declares none
+        """
+        if not isinstance(document, dict):
+            return None
+
+        dmp = document.get('dmp')
+        declared = dmp.get('schema') if isinstance(dmp, dict) else None
+        declared = declared or document.get('$schema')
+
+        if not isinstance(declared, str):
+            return None
+
+        match = SCHEMA_VERSION_RE.search(declared)
+        return match.group(1) if match else None
+
+
+_worker_entries = {}
+
+
+def validate_chunk(entry_args, max_errors, offset, datasets):
+    """
+    Validate a chunk of datasets in a validation process.
+
+    The schema is loaded once per process.
+
+    :param entry_args: arguments of the :class:`SchemaEntry` of the maDMP
+    :param max_errors: maximum number of errors to report, 0 for all
+    :param offset: index of the first dataset of the chunk in the maDMP
+    :param datasets: list of dataset dictionaries
+    :returns: list with the path and message of every error found
+    """
+    entry = _worker_entries.get(entry_args)
+    if entry is None or entry.is_stale():
+        entry = _worker_entries[entry_args] = SchemaEntry(*entry_args)
+        entry.load()
+
+    errors = []
+    for index, dataset in enumerate(datasets, offset):
+        errors.extend(first_errors(
+            entry.dataset_validator.iter_errors(dataset),
+            max_errors - len(errors) if max_errors else 0,
+            ('dmp', 'dataset', index)
+        ))
+        if max_errors and len(errors) >= max_errors:
+            break
+    return [error_item(error) for error in errors]
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Faceted search and title suggestions of the maDMP records."""
+
+import base64
+import binascii
+import hashlib
+import json
+import uuid
+
+FACETS = {
+    'license': 'license',
+    'access_right': 'access_right',
+    'data_access': 'data_access',
+    'personal_data': 'personal_data',
+    'sensitive_data': 'sensitive_data',
+    'upload_type': 'upload_type',
+}
+"""Indexed keyword fields of the facets, by query argument."""
+
+SORT = [
+    {'publication_date': {'order': 'desc', 'missing': '_last'}},
+    {'id': {'order': 'asc'}},
+]
+"""Order of the hits, ending with the unique recid for ``search_after``."""
+
+
+class InvalidCursor(ValueError):
+    """The ``search_after`` cursor cannot be decoded."""
+
+
+def encode_cursor(sort_values):
+    """
+    Opaque cursor of the position after a hit.
+
+    :param sort_values: the ``sort`` values of the hit
+    :returns: the cursor as URL-safe string
+    """
+    data = json.dumps(sort_values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Sort values of a cursor.
+
+    :param cursor: the cursor from :func:`encode_cursor`
+    :returns: list of sort values
+    :raises InvalidCursor: if the cursor is invalid
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise InvalidCursor('Invalid search_after cursor')
+    if not isinstance(values, list) or len(values) != len(SORT):
+        raise InvalidCursor('Invalid search_after cursor')
+    return values
+
+
+def normalise_filters(filters):
+    """
+    Filters in a canonical order, so equal filter sets give equal keys.
+
+    :param filters: dictionary of the lists of values by facet
+    :returns: tuple of ``(facet, sorted values)`` tuples without empty facets
+    """
+    return tuple(
+        (facet, tuple(sorted(set(values))))
+        for facet, values in sorted(filters.items()) if values
+    )
+
+
+def build_query(q, filters):
+    """
+    Query of a search.
+
+    :param q: the query string, all records if empty
+    :param filters: normalised filters from :func:`normalise_filters`
+    :returns: the Elasticsearch query
+    """
+    must = {'query_string': {'query': q}} if q else {'match_all': {}}
+    return {
+        'bool': {
+            'must': [must],
+            'filter': [
+                {'terms': {FACETS[facet]: list(values)}}
+                for facet, values in filters
+            ],
+        }
+    }
+
+
+def build_aggregations(size):
+    """
+    Aggregations of the facets.
+
+    :param size: maximum number of values per facet
+    :returns: the Elasticsearch aggregations
+    """
+    return {
+        facet: {'terms': {'field': field, 'size': size}}
+        for facet, field in FACETS.items()
+    }
+
+
+def facet_counts(aggregations):
+    """
+    Counts of the facet values from Elasticsearch aggregations.
+
+    :param aggregations: the ``aggregations`` of a search response
+    :returns: dictionary of the lists of ``{'key', 'doc_count'}`` by facet
+    """
+    return {
+        facet: [
+            {'key': bucket['key'], 'doc_count': bucket['doc_count']}
+            for bucket in aggregations[facet]['buckets']
+        ]
+        for facet in FACETS if facet in aggregations
+    }
+
+
+class SearchCache(object):
+    """Cache of search results, dropped at once whenever the index changes.
+
+    The keys include a generation, which is replaced on every index write,
+    so results computed before a write are never returned again and expire
+    on their own.
+    """
+
+    def __init__(self, backend, prefix='madmp:facets'):
+        """Cache constructor.
+
+        :param backend: cache backend, e.g.
+            :class:`invenio_madmp.cache.MemoryCacheBackend`
+        :param prefix: prefix of the cache keys
+        """
+        self.backend = backend
+        self.prefix = prefix
+
+    def generation(self):
+        """Current generation of the cached results."""
+        generation = self.backend.get(self.prefix + ':generation')
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.backend.set(self.prefix + ':generation', generation)
+        return generation
+
+    def key(self, q, filters):
+        """
+        Key of the results of a search.
+
+        :param q: the query string
+        :param filters: normalised filters from :func:`normalise_filters`
+        :returns: the key as string
+        """
+        search = json.dumps([q or '', filters], separators=(',', ':'))
+        return '{0}:{1}:{2}'.format(
+            self.prefix, self.generation(),
+            hashlib.sha1(search.encode('utf-8')).hexdigest(),
+        )
+
+    def get(self, q, filters):
+        """Get the cached results of a search, None if not cached."""
+        return self.backend.get(self.key(q, filters))
+
+    def set(self, q, filters, results):
+        """Cache the results of a search."""
+        self.backend.set(self.key(q, filters), results)
+
+    def invalidate(self):
+        """Drop all cached results."""
+        self.backend.set(self.prefix + ':generation', uuid.uuid4().hex)
+
+
+def search(client, index, q='', filters=None, size=10, search_after=None,
+           facet_cache=None, facet_size=20):
+    """
+    Search the records, with the counts of the facet values.
+
+    Facet counts are read from the cache when possible, otherwise they are
+    computed by the same request as the hits and cached.
+
+    :param client: the Elasticsearch client
+    :param index: the index or alias to search
+    :param q: the query string, all records if empty
+    :param filters: dictionary of the lists of facet values to filter on
+    :param size: number of hits
+    :param search_after: cursor of the last hit of the previous page
+    :param facet_cache: the :class:`SearchCache`, counts are not cached if None
+    :param facet_size: maximum number of values per facet
+    :returns: dictionary with the ``hits``, the ``facets`` and the ``next``
+        cursor, None on the last page
+    :raises InvalidCursor: if the cursor is invalid
+    """
+    filters = normalise_filters(filters or {})
+    body = {
+        'query': build_query(q, filters),
+        'size': size,
+        'sort': SORT,
+        'track_total_hits': True,
+    }
+    if search_after:
+        body['search_after'] = decode_cursor(search_after)
+
+    counts = facet_cache.get(q, filters) if facet_cache is not None else None
+    if counts is None:
+        body['aggs'] = build_aggregations(facet_size)
+
+    response = client.search(index=index, body=body)
+
+    if counts is None:
+        counts = facet_counts(response.get('aggregations', {}))
+        if facet_cache is not None:
+            facet_cache.set(q, filters, counts)
+
+    hits = response['hits']['hits']
+    total = response['hits']['total']
+
+    return {
+        'total': total['value'] if isinstance(total, dict) else total,
+        'hits': [
+            {'id': hit['_id'], 'metadata': hit.get('_source')} for hit in hits
+        ],
+        'facets': counts,
+        'next': encode_cursor(hits[-1]['sort'])
+        if len(hits) == size and hits else None,
+    }
+
+
+def suggest(client, index, prefix, owners=None, size=5, cache=None):
+    """
+    Suggest record titles starting with a prefix.
+
+    Titles are completed by the ``suggest_title`` completion field of the
+    v2 mapping, which has the owner of the record as ``owner`` context.
+
+    :param client: the Elasticsearch client
+    :param index: the index or alias to search
+    :param prefix: the beginning of the title
+    :param owners: ids of the owners to suggest the records of, all records
+        if empty
+    :param size: maximum number of suggestions
+    :param cache: the :class:`SearchCache`, suggestions are not cached if None
+    :returns: list of ``{'id', 'title'}`` dictionaries
+    """
+    # The completion field is analyzed by the simple analyzer, which ignores
+    # the case, so prefixes differing only by case share an entry.
+    filters = (
+        ('owner', tuple(sorted(set(str(owner) for owner in owners or ())))),
+        ('size', size),
+    )
+    key = prefix.lower()
+
+    suggestions = cache.get(key, filters) if cache is not None else None
+    if suggestions is not None:
+        return suggestions
+
+    completion = {
+        'field': 'suggest_title',
+        'size': size,
+        'skip_duplicates': True,
+    }
+    if filters[0][1]:
+        completion['contexts'] = {'owner': list(filters[0][1])}
+
+    response = client.search(index=index, body={
+        '_source': ['id'],
+        'size': 0,
+        'suggest': {
+            'title': {'prefix': prefix, 'completion': completion},
+        },
+    })
+
+    suggestions = [
+        {'id': option.get('_source', {}).get('id'), 'title': option['text']}
+        for option in response['suggest']['title'][0]['options']
+    ]
+    if cache is not None:
+        cache.set(key, filters, suggestions)
+    return suggestions
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Serializers of records to the export formats."""
+
+import csv
+import io
+import itertools
+import json
+
+import pkg_resources
+from werkzeug.utils import import_string
+
+from .mapping import serializer as madmp_serializer
+
+DCSO_CONTEXT = {
+    '@vocab': 'https://w3id.org/dcso/ns/core#',
+    'dcso': 'https://w3id.org/dcso/ns/core#',
+    'identifier': '@id',
+}
+"""JSON-LD context of the maDMP keys, in the DMP Common Standard Ontology."""
+
+
+class Serializer(object):
+    """Base class of the export serializers.
+
+    A serializer is built once when the application starts and converts
+    records to a format as an iterator of strings, which can be sent as a
+    streaming response.
+    """
+
+    mimetype = None
+    """Mimetype of the output."""
+
+    extension = None
+    """File extension of the output."""
+
+    def __init__(self, app=None):
+        """Serializer constructor.
+
+        :param app: the application the serializer is built for
+        """
+
+    def document(self, records):
+        """
+        Build the maDMP of records.
+
+        :param records: list of record dictionaries
+        :returns: the maDMP as dictionary
+        """
+        return madmp_serializer.serialize(records)
+
+    def serialize(self, records):
+        """
+        Serialize records.
+
+        :param records: list of record dictionaries
+        :returns: iterator of strings
+        """
+        raise NotImplementedError()
+
+    def filename(self, record):
+        """
+        Name of the downloaded file of a record.
+
+        :param record: the record as dictionary
+        :returns: the file name
+        """
+        return str(record.get('title', '') + '-maDMP.' + self.extension).replace(" ", "_")
+
+
+class MaDMPJSONSerializer(Serializer):
+    """maDMP as JSON, according to the RDA DMP Common Standard."""
+
+    mimetype = 'application/json'
+    extension = 'json'
+
+    def __init__(self, app=None):
+        """Serializer constructor."""
+        super(MaDMPJSONSerializer, self).__init__(app)
+        self.encoder = json.JSONEncoder(sort_keys=True)
+
+    def serialize(self, records):
+        """Serialize records as a maDMP, one chunk per encoded value."""
+        for chunk in self.encoder.iterencode(self.document(records)):
+            yield chunk
+        yield '\n'
+
+
+class MaDMPJSONLDSerializer(MaDMPJSONSerializer):
+    """maDMP as JSON-LD, with the terms of the DMP Common Standard Ontology."""
+
+    mimetype = 'application/ld+json'
+    extension = 'jsonld'
+
+    def document(self, records):
+        """Build the maDMP of records with its JSON-LD context."""
+        document = super(MaDMPJSONLDSerializer, self).document(records)
+        document['@context'] = DCSO_CONTEXT
+        return document
+
+
+class DatasetCSVSerializer(Serializer):
+    """Datasets of the maDMP as CSV, one row per dataset."""
+
+    mimetype = 'text/csv'
+    extension = 'csv'
+
+    columns = (
+        'dmp_id', 'dataset_id', 'title', 'description', 'issued', 'type',
+        'personal_data', 'sensitive_data', 'data_access', 'license_ref',
+    )
+    """Columns of the CSV."""
+
+    def rows(self, document):
+        """
+        Rows of the datasets of a maDMP.
+
+        Only the first distribution and license of every dataset are kept.
+
+        :param document: the maDMP as dictionary
+        :returns: generator of tuples ordered as :attr:`columns`
+        """
+        dmp = document['dmp']
+        dmp_id = dmp.get('dmp_id', {}).get('identifier')
+
+        for dataset in dmp['dataset']:
+            distribution = (dataset.get('distribution') or [{}])[0]
+            license = (distribution.get('license') or [{}])[0]
+            yield (
+                dmp_id,
+                dataset.get('dataset_id', {}).get('identifier'),
+                dataset.get('title'),
+                dataset.get('description'),
+                dataset.get('issued'),
+                dataset.get('type'),
+                dataset.get('personal_data'),
+                dataset.get('sensitive_data'),
+                distribution.get('data_access'),
+                license.get('license_ref'),
+            )
+
+    def serialize(self, records):
+        """Serialize the datasets of records, one line per dataset."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        for row in itertools.chain([self.columns], self.rows(self.document(records))):
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+
+class SerializerRegistry(object):
+    """Serializers by export format."""
+
+    def __init__(self, serializers=None):
+        """Registry constructor.
+
+        :param serializers: dictionary of the serializers by format
+        """
+        self.serializers = dict(serializers or {})
+
+    def __contains__(self, format):
+        """Checks if a format has a serializer."""
+        return format in self.serializers
+
+    def __iter__(self):
+        """Iterate over the formats."""
+        return iter(self.serializers)
+
+    def get(self, format):
+        """
+        Get the serializer of a format.
+
+        :param format: the format, e.g. ``'json'``
+        :returns: the serializer, None if the format is unknown
+        """
+        return self.serializers.get(format)
+
+    def register(self, format, serializer):
+        """Add the serializer of a format, replacing the current one."""
+        self.serializers[format] = serializer
+
+    def load(self, app, factories):
+        """
+        Build the serializers of the configured formats.
+
+        :param app: the application
+        :param factories: dictionary of serializer classes or factories, or
+            of their import paths, by format
+        """
+        for format, factory in factories.items():
+            if isinstance(factory, str):
+                factory = import_string(factory)
+            self.register(format, factory(app))
+
+    def load_entry_point_group(self, app, group):
+        """
+        Build the serializers of an entry point group.
+
+        The name of every entry point is the format, its object is a
+        serializer class or factory taking the application.
+
+        :param app: the application
+        :param group: name of the entry point group
+        """
+        for entry_point in pkg_resources.iter_entry_points(group=group):
+            self.register(entry_point.name, entry_point.load()(app))
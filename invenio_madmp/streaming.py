@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris Tsepelakis.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Incremental reading of uploaded maDMP files."""
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+DATASET_PREFIX = 'dmp.dataset'
+"""ijson prefix of the dataset array."""
+
+SCALAR_EVENTS = ('null', 'boolean', 'integer', 'double', 'number', 'string')
+"""ijson events of values that are not containers."""
+
+
+class InvalidStream(ValueError):
+    """The uploaded file is not valid JSON."""
+
+
+class MaDMPStream(object):
+    """
+    A maDMP file read without materialising its datasets.
+
+    The file is scanned once for everything except ``dmp.dataset`` (the
+    header) and the datasets are then yielded one by one on every call of
+    :meth:`datasets`. The stream must therefore be seekable, which is the
+    case for the spooled files of Werkzeug's form parser.
+    """
+
+    def __init__(self, stream):
+        """Stream constructor.
+
+        :param stream: seekable binary stream with the maDMP JSON
+        """
+        if ijson is None:
+            raise RuntimeError('Streaming uploads require the ijson package.')
+
+        self.stream = stream
+        self.dataset_count = 0
+        self.datasets_streamed = False
+        self._header = None
+
+    @property
+    def header(self):
+        """The maDMP without its datasets, as dictionary."""
+        if self._header is None:
+            self._header = self._read_header()
+        return self._header
+
+    def _events(self):
+        """Parse events from the beginning of the stream."""
+        self.stream.seek(0)
+        try:
+            for event in ijson.parse(self.stream, use_float=True):
+                yield event
+        except ijson.JSONError as exc:
+            raise InvalidStream(str(exc))
+
+    def _read_header(self):
+        """
+        Builds the document skipping the items of the dataset array.
+
+        The datasets are only counted. A ``dataset`` value that is not an array
+        is kept in the header, so that schema validation reports it.
+        """
+        builder = ijson.ObjectBuilder()
+        dataset_key = False
+        skipping = False
+
+        for prefix, event, value in self._events():
+            if dataset_key:
+                dataset_key = False
+                if event == 'start_array':
+                    skipping = self.datasets_streamed = True
+                    continue
+                builder.event('map_key', 'dataset')
+
+            if skipping:
+                if prefix == DATASET_PREFIX and event == 'end_array':
+                    skipping = False
+                elif prefix == DATASET_PREFIX + '.item' and \
+                        (event in SCALAR_EVENTS or event.startswith('start_')):
+                    self.dataset_count += 1
+                continue
+
+            if prefix == 'dmp' and event == 'map_key' and value == 'dataset':
+                dataset_key = True
+                continue
+
+            builder.event(event, value)
+
+        return getattr(builder, 'value', None)
+
+    def datasets(self):
+        """
+        Yields the dataset objects one at a time.
+
+        :returns: generator of dataset dictionaries
+        """
+        if not self.datasets_streamed:
+            return
+
+        self.stream.seek(0)
+        try:
+            for dataset in ijson.items(self.stream, DATASET_PREFIX + '.item',
+                                       use_float=True):
+                yield dataset
+        except ijson.JSONError as exc:
+            raise InvalidStream(str(exc))
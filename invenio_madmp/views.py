@@ -17,11 +17,18 @@ from flask import Blueprint, abort, current_app, flash, \
 from flask_login import login_required
 from flask_security import current_user
 from invenio_db import db
-from sqlalchemy import text
+from invenio_files_rest.models import ObjectVersion
+from invenio_files_rest.proxies import current_permission_factory
+from invenio_files_rest.views import check_permission
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.models import RecordMetadata
 from werkzeug.utils import secure_filename
 
-from invenio_madmp.api import UploadMaDMP, get_license_mapping
+from invenio_madmp.api import UploadMaDMP, get_record_bucket, recid_filter
+from invenio_madmp.files import content_disposition, send_object
 from invenio_madmp.forms import MaDMPForm, FileForm
+from invenio_madmp.licenses import licenses
+from invenio_madmp.proxies import current_madmp
 
 # define a new Flask Blueprint that is registered under the url path /madmp
 blueprint = Blueprint(
@@ -67,24 +74,105 @@ class Error:
 
 def valid_formats():
     """
-    Defines valid formats for export.
+    Defines valid formats for export, those of the registered serializers.
 
     :returns: Tuple with valid formats
     """
-    return ('json',)
+    return tuple(current_madmp.serializers)
 
 
-def query_db(query, **kwargs):
+def get_record_metadata(rec_id):
     """
-    Make a query to the Invenio DB.
+    Get the DB row of a record from its recid.
 
-    :param query: Query to run
-    :returns: Result of the query as list
+    :param rec_id: the record identifier
+    :returns: Dictionary with the columns of the record, None if it does not exist
     """
-    instance = db.session.execute(text(query), kwargs)
-    result = [{column: value for column, value in rowproxy.items()} for rowproxy in instance]
-    result = result.pop(0)
-    return result
+    model = db.session.query(RecordMetadata).join(
+        PersistentIdentifier,
+        PersistentIdentifier.object_uuid == RecordMetadata.id,
+    ).filter(*recid_filter(rec_id)).one_or_none()
+
+    if model is None or model.json is None:
+        return None
+
+    return {
+        'created': model.created,
+        'updated': model.updated,
+        'id': model.id,
+        'json': model.json,
+        'version_id': model.version_id,
+    }
+
+
+def get_record_revision(rec_id):
+    """
+    Get the revision of a record from its recid, without loading its JSON.
+
+    :param rec_id: the record identifier
+    :returns: Tuple with the revision id and the update time, None if it does not exist
+    """
+    row = db.session.query(
+        RecordMetadata.version_id, RecordMetadata.updated,
+    ).join(
+        PersistentIdentifier,
+        PersistentIdentifier.object_uuid == RecordMetadata.id,
+    ).filter(
+        RecordMetadata.json.isnot(None), *recid_filter(rec_id)
+    ).one_or_none()
+
+    if row is None:
+        return None
+
+    return row.version_id - 1, row.updated
+
+
+def record_etag(rec_id, revision_id, name):
+    """
+    Strong ETag of a representation of a record revision.
+
+    :param rec_id: the record identifier
+    :param revision_id: the revision of the record
+    :param name: name of the representation, e.g. ``'download'``
+    :returns: the ETag, without quotes
+    """
+    return '{0}-{1}-{2}'.format(rec_id, revision_id, name)
+
+
+def is_fresh(etag, updated):
+    """
+    Checks the conditional headers of the request.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+
+    :param etag: the current ETag of the representation
+    :param updated: the update time of the record, in UTC
+    :returns: True if the copy of the client is current
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    since = request.if_modified_since
+    if since is None or updated is None:
+        return False
+
+    # HTTP dates have no fractions of seconds
+    return updated.replace(microsecond=0, tzinfo=None) <= \
+        since.replace(tzinfo=None)
+
+
+def conditional(response, etag, updated):
+    """
+    Add the validators of a record revision to a response.
+
+    :param response: the response
+    :param etag: the ETag of the representation
+    :param updated: the update time of the record, in UTC
+    :returns: the response
+    """
+    response.set_etag(etag)
+    response.last_modified = updated
+    return response
 
 
 @blueprint.route('/upload', methods=('GET', 'POST'))
@@ -115,15 +203,7 @@ def create():
         # we create one contributor object with the submitted name
         contributors = [dict(name=form.contributors.data)]
 
-        license_name = None
-        for key, value in get_license_mapping().items():
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    if form.license_ref.data == v:
-                        license_name = k
-            elif isinstance(value, str):
-                if form.license_ref.data == value:
-                    license_name = key
+        license_name = licenses.name(form.license_ref.data)
 
         data = dict(
                 owner=owner,
@@ -185,12 +265,11 @@ def upload_file(rec_id):
             if file:
                 filename = secure_filename(file.filename)
 
-                query = "SELECT json FROM records_metadata WHERE json ->> 'id' = :id"
-                result = query_db(query, **{'id': str(rec_id)})
-
-                bucket = result.get('json').get('_bucket')
+                bucket = get_record_bucket(rec_id)
+                if bucket is None:
+                    abort(404)
 
-                UploadMaDMP.create_object(bucket, filename, file)
+                UploadMaDMP.create_object(str(bucket), filename, file)
 
                 flash('File successfully uploaded')
                 return redirect(url_for('invenio_records_ui.recid', pid_value=str(rec_id)))
@@ -198,14 +277,28 @@ def upload_file(rec_id):
     return render_template('invenio_madmp/upload.html', file_form=file_form, rec_id=rec_id)
 
 
+@blueprint.route('<int:rec_id>/files/<string:key>', methods=['GET'])
+def download_file(rec_id, key):
+    """Sends a file attached to the record."""
+    bucket = get_record_bucket(rec_id)
+    obj = ObjectVersion.get(bucket, key) if bucket else None
+
+    if obj is None:
+        abort(404)
+
+    check_permission(current_permission_factory(obj, 'object-read'))
+    return send_object(obj)
+
+
 @blueprint.route('<int:rec_id>/export/<string:format>', methods=['GET'])
 def export(rec_id, format=None):
     """Metadata export."""
+    cache = current_madmp.record_cache
+
     try:
-        query = "SELECT * FROM records_metadata WHERE json ->> 'id' = :id"
-        result = query_db(query, **{'id': str(rec_id)})
+        revision = get_record_revision(rec_id)
 
-        if not result:
+        if not revision:
             raise Exception
 
     except Exception:
@@ -216,90 +309,80 @@ def export(rec_id, format=None):
             error_response = error.make_error()
             return error_response
 
-        record_json = result
-        record_json['metadata'] = record_json.pop('json')
+        revision_id, updated = revision
+        etag = record_etag(rec_id, revision_id, 'export')
+        if is_fresh(etag, updated):
+            return conditional(make_response('', 304), etag, updated)
+
+        record = cache.get(rec_id, revision_id, 'export')
+
+        if record is None:
+            record_json = get_record_metadata(rec_id)
+            if not record_json:
+                abort(404)
+
+            record_json['metadata'] = record_json.pop('json')
+            record = json.dumps(record_json, indent=2, default=str)
 
-        return render_template(
+            # The record may have changed since its revision was read
+            revision_id, updated = record_json['version_id'] - 1, record_json['updated']
+            cache.set(rec_id, revision_id, 'export', record)
+            etag = record_etag(rec_id, revision_id, 'export')
+
+        response = make_response(render_template(
             'invenio_madmp/export.html',
-            record=json.dumps(record_json, indent=2, default=str),
+            record=record,
             rec_id=rec_id
-        )
+        ))
+        return conditional(response, etag, updated)
 
 
 @blueprint.route('<int:rec_id>/export/<string:format>/download', methods=['GET'])
 def download(rec_id, format=None):
-    """Sends a file for download containing the metadata."""
+    """Sends a file for download containing the metadata in the given format."""
+    cache = current_madmp.record_cache
+    serializer = current_madmp.serializers.get(format)
+    name = 'download.' + format
+
     try:
-        query = "SELECT json FROM records_metadata WHERE json ->> 'id' = :id"
-        result = query_db(query, **{'id': str(rec_id)})
+        revision = get_record_revision(rec_id)
 
-        if not result:
+        if not revision:
             raise Exception
 
     except Exception:
         abort(404)
     else:
-        if format not in valid_formats():
+        if serializer is None:
             error = Error(400, "Invalid Format")
-            error.make_error()
-
-        record_json = result.pop('json')
-
-        dmp_children = (
-            'contact', 'contributors', 'ethical_issues_exist'
-        )
-        dt_lvl1_children = (
-            'description', 'personal_data', 'publication_date',
-            'sensitive_data', 'title'
-        )
-        dt_lvl2_children = (
-            'access_url', 'available_until', 'size',
-            'data_access', 'download_url', 'format',
-            'license',
-        )
-
-        data = {'dmp': {}}  # parent dictionary
-
-        dataset_dict = {'dataset': []}
-        dataset_fields = {}  # dataset as object
-
-        distribution_dict = {'distribution': []}
-        distribution_fields = {}  # distribution as object
+            return error.make_error()
 
-        for key in record_json:
+        revision_id, updated = revision
+        etag = record_etag(rec_id, revision_id, name)
+        if is_fresh(etag, updated):
+            return conditional(make_response('', 304), etag, updated)
 
-            if key in dmp_children:
-                data['dmp'].update({key: record_json[key]}) if key != 'contributors' \
-                    else data['dmp'].update({key[:-1]: record_json[key]})
+        cached = cache.get(rec_id, revision_id, name)
 
-            elif key in dt_lvl1_children:
-                dataset_fields.update({key: record_json[key]}) if key != 'publication_date' \
-                    else dataset_fields.update({'issued': record_json[key]})
+        if cached is None:
+            result = get_record_metadata(rec_id)
+            if not result:
+                abort(404)
 
-            elif key in dt_lvl2_children:
-                distribution_fields.update({key: record_json[key]}) \
-                    if key != 'license' \
-                    else distribution_fields.update(
-                    {
-                        'license': [{
-                            'license_ref': v for k, v in get_license_mapping().items()
-                            if k == record_json[key]
-                            if not isinstance(v, dict)
-                        }]
-                    }
-                )
-            elif key == 'license_start_date':
-                distribution_fields.get('license')[0].update({'start_date': record_json[key]})
+            record_json = result.pop('json')
 
-        distribution_dict['distribution'].append(distribution_fields)
-        dataset_fields.update(distribution_dict)
+            cached = {
+                'body': ''.join(serializer.serialize([record_json])),
+                'filename': serializer.filename(record_json),
+            }
 
-        dataset_dict['dataset'].append(dataset_fields)
-        data['dmp'].update(dataset_dict)
+            # The record may have changed since its revision was read
+            revision_id, updated = result['version_id'] - 1, result['updated']
+            cache.set(rec_id, revision_id, name, cached)
+            etag = record_etag(rec_id, revision_id, name)
 
-        response = make_response(data)
-        response.mimetype = 'application/json'
+        response = make_response(cached['body'])
+        response.mimetype = serializer.mimetype
 
-        filename = str(record_json['title'] + '-maDMP.json').replace(" ", "_")
-        response.headers['Content-Disposition'] = 'attachment; filename=%s' % filename
-        return response
+        response.headers['Content-Disposition'] = content_disposition(cached['filename'])
+        return conditional(response, etag, updated)
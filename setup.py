@@ -28,6 +28,12 @@ extras_require = {
     'docs': [
         'Sphinx>=1.5.1',
     ],
+    'redis': [
+        'redis>=3',
+    ],
+    'streaming': [
+        'ijson>=3.1',
+    ],
     'tests': tests_require,
 }
 
@@ -53,6 +59,7 @@ install_requires = [
     'invenio-records',
     'invenio-records-files',
     'invenio-search',
+    'jsonpatch>=1.15',
     'werkzeug>=0.14.1',
 ]
 
@@ -80,6 +87,9 @@ setup(
     include_package_data=True,
     platforms='any',
     entry_points={
+        'flask.commands': [
+            'madmp = invenio_madmp.cli:madmp',
+        ],
         'invenio_base.apps': [
             'invenio_madmp = invenio_madmp:inveniomaDMP',
         ],
@@ -92,14 +102,22 @@ setup(
         # 'invenio_access.actions': [],
         # 'invenio_admin.actions': [],
         # 'invenio_assets.bundles': [],
-        # 'invenio_base.api_apps': [],
+        'invenio_base.api_apps': [
+            'invenio_madmp = invenio_madmp:inveniomaDMP',
+        ],
         'invenio_base.api_blueprints': [
             'invenio_madmp = invenio_madmp.api:blueprint'
         ],
         # 'invenio_celery.tasks': [],
-        # 'invenio_db.models': [],
+        'invenio_db.alembic': [
+            'invenio_madmp = invenio_madmp:alembic',
+        ],
+        'invenio_db.models': [
+            'invenio_madmp = invenio_madmp.models',
+        ],
         # 'invenio_pidstore.minters': [],
         # 'invenio_records.jsonresolver': [],
+        # 'invenio_madmp.serializers': [],
     },
     extras_require=extras_require,
     install_requires=install_requires,
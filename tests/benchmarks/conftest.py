@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Benchmark configuration.
+
+The benchmarks are skipped unless ``INVENIO_MADMP_BENCHMARKS`` is set, and
+print their results:
+
+.. code-block:: console
+
+    $ INVENIO_MADMP_BENCHMARKS=1 pytest -s -o addopts='' tests/benchmarks
+"""
+
+from __future__ import absolute_import, print_function
+
+import copy
+import os
+import timeit
+
+import pytest
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Skip the benchmarks, unless they are enabled."""
+    if not os.environ.get('INVENIO_MADMP_BENCHMARKS'):
+        pytest.skip('Set INVENIO_MADMP_BENCHMARKS=1 to run the benchmarks.')
+
+
+@pytest.fixture()
+def measure():
+    """Measure the mean duration of a call in milliseconds.
+
+    The call is repeated until it took at least 0.2 seconds, and the best of
+    three such runs is kept.
+    """
+    def measure(func):
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        return min(timer.repeat(repeat=3, number=number)) / number * 1000
+    return measure
+
+
+@pytest.fixture()
+def make_madmp(madmp):
+    """Build a maDMP with a number of datasets, copies of the test ones."""
+    def make_madmp(count):
+        document = copy.deepcopy(madmp)
+        templates = document['dmp']['dataset']
+        datasets = []
+        for index in range(count):
+            dataset = copy.deepcopy(templates[index % len(templates)])
+            dataset['dataset_id']['identifier'] += '.{0}'.format(index)
+            datasets.append(dataset)
+        document['dmp']['dataset'] = datasets
+        return document
+    return make_madmp
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Benchmark of the extraction of records from a maDMP.
+
+Only ``UploadMaDMP.extract_data`` is called, so the benchmark also runs on
+versions before the declarative mapping, for comparison.
+"""
+
+from __future__ import absolute_import, print_function
+
+from invenio_madmp.api import UploadMaDMP
+
+
+def test_extract_data(make_madmp, measure):
+    """Time the extraction of maDMPs with 1 to 10000 datasets."""
+    print('\ndatasets  extract_data')
+    for count in (1, 10, 100, 1000, 10000):
+        document = make_madmp(count)
+        assert len(UploadMaDMP.extract_data(document)) == count
+
+        duration = measure(lambda: UploadMaDMP.extract_data(document))
+        print('{0:>8}  {1:>9.2f} ms'.format(count, duration))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Benchmark of the lookup of a record from its recid.
+
+The records are inserted in bulk in the test database, with a registered
+recid and a bucket each, and the JSON scan of earlier versions is compared
+with the PID store lookups.
+"""
+
+from __future__ import absolute_import, print_function
+
+import uuid
+
+import pytest
+from invenio_files_rest.models import Bucket
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_records.models import RecordMetadata
+from invenio_records_files.models import RecordsBuckets
+from sqlalchemy import text
+
+from invenio_madmp.api import get_record_bucket
+from invenio_madmp.views import get_record_metadata
+
+
+@pytest.fixture(scope='module', name='create_app')
+def api_app_factory(create_api_app):
+    """Benchmark the lookups with the records and PID store models."""
+    return create_api_app
+
+
+def insert_records(db, start, stop, bucket_id):
+    """Insert the records with recids ``start`` to ``stop - 1``."""
+    ids = [uuid.uuid4() for _ in range(start, stop)]
+    db.session.execute(RecordMetadata.__table__.insert(), [
+        {'id': id_, 'json': {'id': str(recid), 'title': 'Record'},
+         'version_id': 1}
+        for recid, id_ in zip(range(start, stop), ids)
+    ])
+    db.session.execute(PersistentIdentifier.__table__.insert(), [
+        {'pid_type': 'recid', 'pid_value': str(recid), 'object_type': 'rec',
+         'object_uuid': id_, 'status': PIDStatus.REGISTERED}
+        for recid, id_ in zip(range(start, stop), ids)
+    ])
+    db.session.execute(RecordsBuckets.__table__.insert(), [
+        {'record_id': id_, 'bucket_id': bucket_id} for id_ in ids
+    ])
+    db.session.commit()
+
+
+def test_lookup(base_app, db, location, measure):
+    """Time the lookups of a record among 1000 to 100000 records."""
+    bucket = Bucket.create()
+    db.session.commit()
+
+    scan = text("SELECT json FROM records_metadata WHERE json ->> 'id' = :id")
+
+    print('\n records   json scan  pid lookup  bucket lookup')
+    inserted = 0
+    for count in (1000, 10000, 100000):
+        insert_records(db, inserted, count, bucket.id)
+        inserted = count
+        rec_id = str(count // 2)
+
+        assert db.session.execute(scan, {'id': rec_id}).scalar()
+        assert get_record_metadata(rec_id)['json']['id'] == rec_id
+        assert get_record_bucket(rec_id) == bucket.id
+
+        durations = [
+            measure(lambda: db.session.execute(scan, {'id': rec_id}).scalar()),
+            measure(lambda: get_record_metadata(rec_id)),
+            measure(lambda: get_record_bucket(rec_id)),
+        ]
+        print('{0:>8}  {1:>7.3f} ms  {2:>7.3f} ms     {3:>7.3f} ms'.format(
+            count, *durations))
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Benchmark of the serializers of the export formats."""
+
+from __future__ import absolute_import, print_function
+
+from invenio_madmp.mapping import extractor
+from invenio_madmp.serializers import DatasetCSVSerializer, \
+    MaDMPJSONLDSerializer, MaDMPJSONSerializer
+
+
+def test_serialize(make_madmp, measure):
+    """Time the serialization of 1000 records in one document."""
+    records = extractor.extract(make_madmp(1000))
+    serializers = [
+        ('json', MaDMPJSONSerializer()),
+        ('jsonld', MaDMPJSONLDSerializer()),
+        ('csv', DatasetCSVSerializer()),
+    ]
+
+    print('\nformat       records/s    MB/s')
+    for name, serializer in serializers:
+        size = len(''.join(serializer.serialize(records)).encode('utf-8'))
+        duration = measure(lambda: ''.join(serializer.serialize(records)))
+        print('{0:<8}  {1:>10.0f}  {2:>6.1f}'.format(
+            name, len(records) / duration * 1000, size / duration / 1000))
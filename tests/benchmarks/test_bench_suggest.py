@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Benchmark of the latency of the title suggestions.
+
+Elasticsearch is replaced by a client answering at once, so only the time
+spent in the application is measured.
+"""
+
+from __future__ import absolute_import, print_function
+
+import timeit
+
+import pytest
+
+from invenio_madmp import api
+
+
+@pytest.fixture(scope='module', name='create_app')
+def api_app_factory(create_api_app):
+    """Benchmark the suggestions in the API application."""
+    return create_api_app
+
+
+class Client(object):
+    """Elasticsearch client returning two suggestions."""
+
+    def search(self, index, body):
+        """Search an index."""
+        return {'suggest': {'title': [{'options': [
+            {'text': 'Test data', '_source': {'id': '1'}},
+            {'text': 'Test plan', '_source': {'id': '2'}},
+        ]}]}}
+
+
+def percentiles(durations):
+    """Median and 99th percentile of durations in seconds, in ms."""
+    durations = sorted(durations)
+    return (durations[len(durations) // 2] * 1000,
+            durations[int(len(durations) * 0.99)] * 1000)
+
+
+def test_suggest(base_app, monkeypatch):
+    """Time 2000 suggestion requests served from the cache or not."""
+    monkeypatch.setattr(api, 'current_search_client', Client())
+
+    with base_app.test_client() as client:
+        def request(url):
+            start = timeit.default_timer()
+            res = client.get(url)
+            duration = timeit.default_timer() - start
+            assert res.status_code == 200
+            return duration
+
+        request('/madmp/suggest?q=Tes&owner=1')
+        cached = [request('/madmp/suggest?q=Tes&owner=1')
+                  for _ in range(2000)]
+        missed = [request('/madmp/suggest?q=Tes{0}&owner=1'.format(index))
+                  for index in range(2000)]
+
+    print('\n         p50       p99')
+    for name, durations in (('cached', cached), ('missed', missed)):
+        print('{0:<6}  {1:>5.2f} ms  {2:>5.2f} ms'.format(
+            name, *percentiles(durations)))
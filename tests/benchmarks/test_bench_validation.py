@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Benchmark of the validation of a maDMP against its schema."""
+
+from __future__ import absolute_import, print_function
+
+import json
+import os
+
+import pytest
+from jsonschema import FormatChecker
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+from invenio_madmp.compiler import CompiledValidator, compile_validator
+from invenio_madmp.schemas import first_errors
+
+
+@pytest.fixture()
+def schema():
+    """The maDMP schema."""
+    path = os.path.join(os.path.dirname(__file__), '..', '..',
+                        'invenio_madmp', 'maDMP-schema.json')
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def test_is_valid(schema, make_madmp, measure):
+    """Time the validators of valid maDMPs, with fewer format checks."""
+    cls = validator_for(schema)
+
+    validators = [
+        ('jsonschema', cls(schema, format_checker=FormatChecker())),
+        ('jsonschema-formats', cls(schema, format_checker=FormatChecker([]))),
+        ('compiled', compile_validator(
+            cls(schema, format_checker=FormatChecker()))),
+        ('compiled+email', compile_validator(
+            cls(schema, format_checker=FormatChecker(['email'])))),
+        ('compiled-formats', compile_validator(
+            cls(schema, format_checker=FormatChecker([])))),
+    ]
+    assert isinstance(validators[2][1], CompiledValidator)
+
+    print('\n{0:>8}'.format('datasets') + ''.join(
+        '{0:>19}'.format(name) for name, _ in validators))
+    for count in (10, 1000):
+        document = make_madmp(count)
+        durations = []
+        for _, validator in validators:
+            assert validator.is_valid(document)
+            durations.append(measure(lambda: validator.is_valid(document)))
+        print('{0:>8}'.format(count) + ''.join(
+            '{0:>16.2f} ms'.format(duration) for duration in durations))
+
+
+def test_first_errors(schema, make_madmp, measure):
+    """Time the errors reported for a maDMP invalid in its first dataset."""
+    validator = validator_for(schema)(schema, format_checker=FormatChecker())
+
+    print('\n{0:>8}{1:>18}{2:>18}{3:>18}'.format(
+        'datasets', 'best_match', 'max_errors=10', 'max_errors=1'))
+    for count in (10, 1000):
+        document = make_madmp(count)
+        document['dmp']['dataset'][0]['personal_data'] = 'maybe'
+        assert best_match(validator.iter_errors(document))
+        assert len(first_errors(validator.iter_errors(document), 1)) == 1
+
+        durations = [
+            measure(lambda: best_match(validator.iter_errors(document))),
+            measure(lambda: first_errors(validator.iter_errors(document), 10)),
+            measure(lambda: first_errors(validator.iter_errors(document), 1)),
+        ]
+        print('{0:>8}'.format(count) + ''.join(
+            '{0:>15.2f} ms'.format(duration) for duration in durations))
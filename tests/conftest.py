@@ -16,11 +16,19 @@ from __future__ import absolute_import, print_function
 import shutil
 import tempfile
 
+import pkg_resources
 import pytest
 from flask import Flask
 from flask_babelex import Babel
+from flask_login import LoginManager, UserMixin
+from invenio_db import InvenioDB
+from invenio_files_rest import InvenioFilesREST
+from invenio_pidstore import InvenioPIDStore
+from invenio_records import InvenioRecords
+from invenio_rest import InvenioREST
 
 from invenio_madmp import inveniomaDMP
+from invenio_madmp.indexer import MaDMPIndexer
 from invenio_madmp.views import blueprint
 
 
@@ -44,3 +52,148 @@ def create_app(instance_path):
         app.register_blueprint(blueprint)
         return app
     return factory
+
+
+class User(UserMixin):
+    """User of the test applications."""
+
+    def __init__(self, id):
+        """User constructor."""
+        self.id = id
+
+
+def load_user(request):
+    """Authenticate the user whose id is given by the X-User-Id header."""
+    user_id = request.headers.get('X-User-Id')
+    return User(user_id) if user_id else None
+
+
+@pytest.fixture(scope='module')
+def create_api_app(instance_path):
+    """API application factory fixture.
+
+    The extension and the blueprint of invenio-maDMP are loaded from the
+    ``invenio_base.api_apps`` and ``invenio_base.api_blueprints`` entry
+    points, as in the API application of an Invenio instance. Requests are
+    authenticated by the ``X-User-Id`` header. Override the ``create_app``
+    fixture with it to test the REST API:
+
+    .. code-block:: python
+
+        @pytest.fixture(scope='module', name='create_app')
+        def api_app_factory(create_api_app):
+            return create_api_app
+    """
+    def factory(**config):
+        app = Flask('testapi', instance_path=instance_path)
+        app.config.update(**config)
+        Babel(app)
+        InvenioDB(app)
+        InvenioPIDStore(app)
+        InvenioRecords(app)
+        InvenioFilesREST(app)
+        InvenioREST(app)
+        LoginManager(app).request_loader(load_user)
+        for entry_point in pkg_resources.iter_entry_points(
+                'invenio_base.api_apps', 'invenio_madmp'):
+            entry_point.resolve()(app)
+        for entry_point in pkg_resources.iter_entry_points(
+                'invenio_base.api_blueprints', 'invenio_madmp'):
+            app.register_blueprint(entry_point.resolve())
+        return app
+    return factory
+
+
+@pytest.fixture()
+def indexed(monkeypatch):
+    """Records sent to the indexer, instead of being sent to Elasticsearch.
+
+    :returns: dictionary with the list of the indexed records under
+        ``index`` and of the records removed from the index under ``delete``
+    """
+    calls = {'index': [], 'delete': []}
+
+    def bulk_index_records(self, records):
+        calls['index'].extend(records)
+        return []
+
+    monkeypatch.setattr(MaDMPIndexer, 'bulk_index_records', bulk_index_records)
+    monkeypatch.setattr(MaDMPIndexer, 'index',
+                        lambda self, record, *args, **kwargs:
+                        calls['index'].append(record))
+    monkeypatch.setattr(MaDMPIndexer, 'delete',
+                        lambda self, record, **kwargs:
+                        calls['delete'].append(record))
+    return calls
+
+
+@pytest.fixture()
+def madmp():
+    """A valid maDMP with two datasets."""
+    return {
+        'dmp': {
+            'title': 'DMP for our new project',
+            'language': 'eng',
+            'modified': '2020-03-14T10:53:49+00:00',
+            'ethical_issues_exist': 'unknown',
+            'dmp_id': {
+                'identifier': 'https://doi.org/10.15497/rda00039',
+                'type': 'doi',
+            },
+            'contact': {
+                'contact_id': {
+                    'identifier': 'https://orcid.org/0000-0000-0000-0000',
+                    'type': 'orcid',
+                },
+                'mbox': 'cc@example.com',
+                'name': 'Charlie Chaplin',
+            },
+            'contributor': [{
+                'contributor_id': {
+                    'identifier': 'https://orcid.org/0000-0000-0000-0001',
+                    'type': 'orcid',
+                },
+                'mbox': 'john@example.com',
+                'name': 'John Smith',
+                'role': ['Data Steward'],
+            }],
+            'dataset': [{
+                'dataset_id': {
+                    'identifier': 'https://hdl.handle.net/11353/10.923628',
+                    'type': 'handle',
+                },
+                'title': 'Field observations',
+                'description': 'Field observation',
+                'issued': '2020-03-01',
+                'type': 'Dataset',
+                'personal_data': 'no',
+                'sensitive_data': 'no',
+                'distribution': [{
+                    'title': 'Full resolution images',
+                    'data_access': 'open',
+                    'license': [{
+                        'license_ref':
+                            'https://creativecommons.org/licenses/by/4.0/',
+                        'start_date': '2020-03-01',
+                    }],
+                }],
+            }, {
+                'dataset_id': {
+                    'identifier': 'https://hdl.handle.net/11353/10.923629',
+                    'type': 'handle',
+                },
+                'title': 'Analysis software',
+                'type': 'Software',
+                'personal_data': 'unknown',
+                'sensitive_data': 'no',
+                'distribution': [{
+                    'title': 'Source code',
+                    'data_access': 'shared',
+                    'license': [{
+                        'license_ref': 'https://opensource.org/licenses/MIT',
+                        'start_date': '2020-04-01',
+                    }],
+                }],
+            }],
+        }
+    }
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""REST API tests."""
+
+from __future__ import absolute_import, print_function
+
+import copy
+import hashlib
+import io
+import json
+import uuid
+
+import pytest
+from invenio_files_rest.models import ObjectVersion
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_records_files.api import Record
+from sqlalchemy.orm.exc import StaleDataError
+
+from invenio_madmp.api import IndexingError, MaDMPResource, UploadMaDMP, \
+    blueprint, get_record_bucket
+from invenio_madmp.digests import document_digest
+from invenio_madmp.indexer import MaDMPIndexer
+from invenio_madmp.models import MaDMPDigest
+from invenio_madmp.patch import JSON_PATCH, MERGE_PATCH
+from invenio_madmp.proxies import current_madmp
+from invenio_madmp.streaming import MaDMPStream
+
+
+@pytest.fixture(scope='module', name='create_app')
+def api_app_factory(create_api_app):
+    """Test the REST API in the API application."""
+    return create_api_app
+
+
+def new_madmp(madmp):
+    """Copy of a maDMP with new identifiers, so it is not a known upload."""
+    madmp = copy.deepcopy(madmp)
+    suffix = '/' + uuid.uuid4().hex
+    madmp['dmp']['dmp_id']['identifier'] += suffix
+    for dataset in madmp['dmp']['dataset']:
+        dataset['dataset_id']['identifier'] += suffix
+    return madmp
+
+
+def test_api_app(base_app, db, location, indexed, madmp):
+    """Test the extension is loaded by the API application."""
+    assert 'invenio-madmp' in base_app.extensions
+    assert base_app.blueprints['madmp'] is blueprint
+
+    with base_app.test_client() as client:
+        res = client.post('/madmp/upload', json=madmp)
+
+    assert res.status_code == 201
+    responses = res.get_json()['responses']
+    assert [item['status'] for item in responses] == [201, 201]
+    assert len(indexed['index']) == 2
+    for item in responses:
+        assert PersistentIdentifier.get('recid', item['recid'])
+
+
+def test_upload_deduplicated(base_app, db, location, indexed, madmp):
+    """Test a maDMP is uploaded again once one of its records is deleted."""
+    base_app.config['INVENIO_MADMP_DEDUPLICATE_UPLOADS'] = True
+    document = new_madmp(madmp)
+
+    with base_app.test_client() as client:
+        res = client.post('/madmp/upload', json=document)
+        assert res.status_code == 201
+        recids = [item['recid'] for item in res.get_json()['responses']]
+
+        res = client.post('/madmp/upload', json=document)
+        assert res.status_code == 200
+        assert res.get_json()['message'] == 'maDMP already uploaded'
+        assert [item['recid'] for item in res.get_json()['responses']] == \
+            recids
+
+        PersistentIdentifier.get('recid', recids[0]).delete()
+        db.session.commit()
+
+        res = client.post('/madmp/upload', json=document)
+        assert res.status_code == 201
+        assert not set(recids) & set(
+            item['recid'] for item in res.get_json()['responses'])
+
+
+def test_streamed_digest(base_app, madmp):
+    """Test streamed and JSON uploads of a maDMP have the same digest."""
+    stream = MaDMPStream(io.BytesIO(json.dumps(madmp, indent=4).encode()))
+
+    with base_app.app_context():
+        assert UploadMaDMP.digest(stream.header, stream) == \
+            UploadMaDMP.digest(madmp)
+
+
+def upload_file(client, content):
+    """Upload a maDMP file."""
+    return client.post('/madmp/upload', data={
+        'file': (io.BytesIO(content), 'madmp.json'),
+    })
+
+
+def test_streaming_upload(base_app, db, location, indexed, madmp,
+                          monkeypatch):
+    """Test maDMP files are read, validated and stored as a stream."""
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_STREAMING_UPLOADS',
+                        True)
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_DEDUPLICATE_UPLOADS',
+                        True)
+    document = new_madmp(madmp)
+    content = json.dumps(document, indent=4).encode('utf-8')
+
+    with base_app.test_client() as client:
+        res = upload_file(client, content)
+        assert res.status_code == 201
+        recids = [item['recid'] for item in res.get_json()['responses']]
+        assert len(recids) == 2
+        assert [record['title'] for record in indexed['index']] == \
+            [dataset['title'] for dataset in document['dmp']['dataset']]
+
+        res = upload_file(client, content)
+        assert res.status_code == 200
+        assert [item['recid'] for item in res.get_json()['responses']] == \
+            recids
+
+        invalid = new_madmp(madmp)
+        invalid['dmp']['dataset'][1]['personal_data'] = 'maybe'
+        res = upload_file(client, json.dumps(invalid).encode('utf-8'))
+        assert res.status_code == 400
+        assert res.get_json()['errors'][0]['path'] == \
+            '$.dmp.dataset[1].personal_data'
+
+        res = upload_file(client, content[:len(content) // 2])
+        assert res.status_code == 400
+        assert res.get_json()['message'].startswith('JSON syntax error')
+
+        assert upload_file(client, b'').get_json()['message'] == \
+            'File is empty'
+
+    assert len(indexed['index']) == 2
+
+
+def test_upload_batch(base_app, db, location, indexed, madmp):
+    """Test the maDMPs of a batch are stored, one result line per line."""
+    first, second = new_madmp(madmp), new_madmp(madmp)
+    body = '\n'.join(json.dumps(doc) for doc in (first, second, first))
+
+    with base_app.test_client() as client:
+        res = client.post('/madmp/upload/batch', data=body,
+                          content_type='application/x-ndjson')
+        assert res.status_code == 200
+        lines = [json.loads(line) for line in res.data.splitlines()]
+
+    assert [(line['id'], line['status']) for line in lines] == \
+        [(1, 201), (2, 201), (3, 200)]
+    recids = [[item['recid'] for item in line['responses']] for line in lines]
+    assert len(set(recids[0] + recids[1])) == 4
+    assert recids[2] == recids[0]
+    for recid in recids[0] + recids[1]:
+        assert PersistentIdentifier.get('recid', recid)
+    assert len(indexed['index']) == 4
+
+
+def test_upload_batch_errors(base_app, madmp):
+    """Test one result line is streamed back per line of a batch."""
+    base_app.config['INVENIO_MADMP_DEDUPLICATE_UPLOADS'] = False
+    del madmp['dmp']['title']
+
+    body = '\n'.join([
+        '{"dmp": ',
+        '',
+        json.dumps(madmp),
+        json.dumps({'dmp': {'schema': 'http://example.org/9.9'}}),
+    ])
+
+    with base_app.test_client() as client:
+        res = client.post('/madmp/upload/batch', data=body,
+                          content_type='application/x-ndjson')
+        assert res.status_code == 200
+        assert res.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in res.data.splitlines()]
+
+        res = client.post('/madmp/upload/batch', data='',
+                          content_type='application/x-ndjson')
+        assert res.status_code == 400
+
+    assert [(line['id'], line['status']) for line in lines] == \
+        [(1, 400), (3, 400), (4, 400)]
+    assert lines[0]['message'].startswith('JSON syntax error')
+    assert lines[1]['errors'] == [
+        {'path': '$.dmp', 'message': "'title' is a required property"}
+    ]
+    assert 'Unsupported maDMP schema version' in lines[2]['message']
+
+
+@pytest.fixture()
+def failing_create(monkeypatch):
+    """Make the creation of the records titled ``fail`` raise an error."""
+    create = Record.create
+
+    def failing_create(data, **kwargs):
+        if data.get('title') == 'fail':
+            raise ValueError('Cannot create record')
+        return create(data, **kwargs)
+
+    monkeypatch.setattr(Record, 'create', failing_create)
+
+
+def test_create_records(base_app, db, location, indexed, failing_create,
+                        monkeypatch):
+    """Test a batch is committed once, with a savepoint per record."""
+    pids = PersistentIdentifier.query.filter_by(pid_type='recid').count()
+    commits = []
+    commit = db.session.commit
+    monkeypatch.setattr(db.session, 'commit',
+                        lambda: commits.append(1) or commit())
+
+    results = UploadMaDMP.create_records(
+        [{'title': 'first'}, {'title': 'fail'}, {'title': 'third'}])
+
+    assert len(commits) == 1
+    assert isinstance(results[1], ValueError)
+    assert [record['title'] for record in results[::2]] == ['first', 'third']
+    assert indexed['index'] == results[::2]
+
+    # The recid minted for the failing record was rolled back
+    assert PersistentIdentifier.query.filter_by(pid_type='recid').count() \
+        == pids + 2
+
+
+def test_create_records_indexing(base_app, db, location, indexed,
+                                 monkeypatch):
+    """Test records are indexed in bulk, or queued if indexing is deferred."""
+    monkeypatch.setattr(MaDMPIndexer, 'bulk_index_records',
+                        lambda self, records: [str(records[0].id)])
+    results = UploadMaDMP.create_records([{'title': 'a'}, {'title': 'b'}])
+    assert isinstance(results[0], IndexingError)
+    assert results[0].record_id == Record.get_record(results[0].record_id).id
+    assert isinstance(results[1], Record)
+
+    queued = []
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_INDEXER_DEFERRED',
+                        True)
+    monkeypatch.setattr(current_madmp.index_queue, 'enqueue',
+                        lambda record_ids, app=None: queued.extend(record_ids))
+    results = UploadMaDMP.create_records([{'title': 'c'}])
+    assert queued == [results[0].id]
+    assert indexed['index'] == []
+
+
+def test_ingest(base_app, db, location, indexed, failing_create,
+                monkeypatch):
+    """Test a response is returned per dataset, batch by batch."""
+    data = [{'title': 'first'}, {'title': 'fail'}, {'title': 'third'}]
+    batches = list(UploadMaDMP.ingest(data, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    responses = batches[0] + batches[1]
+    assert [(item['id'], item['status']) for item in responses] == \
+        [(1, 201), (2, 500), (3, 201)]
+    assert PersistentIdentifier.get('recid', responses[2]['recid'])
+
+    def create_records(batch):
+        raise ValueError('Cannot insert records')
+
+    monkeypatch.setattr(UploadMaDMP, 'create_records', create_records)
+    responses = next(UploadMaDMP.ingest(data))
+    assert [item['status'] for item in responses] == [500, 500, 500]
+
+
+def test_patch_madmp(base_app, db, location, indexed, madmp, monkeypatch):
+    """Test patches update, create and delete the records of the datasets."""
+    base_app.config['INVENIO_MADMP_DEDUPLICATE_UPLOADS'] = True
+    document = new_madmp(madmp)
+    url = '/madmp/dmps/' + document['dmp']['dmp_id']['identifier']
+    user = {'X-User-Id': '1'}
+
+    with base_app.test_client() as client:
+        res = client.post('/madmp/upload', json=document, headers=user)
+        assert res.status_code == 201
+        first, second = [item['recid'] for item in res.get_json()['responses']]
+        assert client.get(url, headers=user).get_json() == document
+        del indexed['index'][:]
+
+        # Change the first dataset, remove the second and add a third one
+        datasets = copy.deepcopy(document['dmp']['dataset'])
+        datasets[0]['title'] = 'Changed observations'
+        datasets[1]['dataset_id']['identifier'] += '/new'
+        commits = []
+        commit = db.session.commit
+        monkeypatch.setattr(db.session, 'commit',
+                            lambda: commits.append(1) or commit())
+
+        patch = json.dumps({'dmp': {'dataset': datasets}})
+        res = client.patch(url, data=patch, content_type=MERGE_PATCH,
+                           headers=user)
+        monkeypatch.setattr(db.session, 'commit', commit)
+
+        assert res.status_code == 200
+        result = res.get_json()
+        assert result['updated'] == [first]
+        assert result['deleted'] == [second]
+        assert len(result['created']) == 1
+        assert len(commits) == 1
+
+        assert Record.get_record(PersistentIdentifier.get(
+            'recid', first).object_uuid)['title'] == 'Changed observations'
+        assert PersistentIdentifier.query.filter_by(
+            pid_type='recid', pid_value=str(second)).one().status == \
+            PIDStatus.DELETED
+        assert [record['title'] for record in indexed['index']] == \
+            ['Changed observations', 'Analysis software']
+        assert len(indexed['delete']) == 1
+
+        # The upload of the maDMP as it was before creates new records
+        assert MaDMPDigest.get_recids(document_digest(document)) is None
+        patched = client.get(url, headers=user).get_json()
+        assert patched['dmp']['dataset'] == datasets
+
+        res = client.patch(url, data=json.dumps([{
+            'op': 'replace', 'path': '/dmp/dataset/1/title', 'value': 'Code',
+        }]), content_type=JSON_PATCH, headers=user)
+        assert res.status_code == 200
+        assert res.get_json()['updated'] == result['created']
+        assert res.get_json()['created'] == res.get_json()['deleted'] == []
+
+        res = client.patch(url, data=json.dumps({'dmp': {'language': 'eng'}}),
+                           content_type=MERGE_PATCH, headers=user)
+        assert res.status_code == 200
+        assert res.get_json()['updated'] == []
+
+        def stale(madmp, header, datasets):
+            raise StaleDataError()
+
+        monkeypatch.setattr(MaDMPResource, 'update', stale)
+        res = client.patch(url, data=json.dumps({'dmp': {'title': 'Other'}}),
+                           content_type=MERGE_PATCH, headers=user)
+        assert res.status_code == 409
+
+        res = client.patch(url + '/unknown', data='{}',
+                           content_type=MERGE_PATCH, headers=user)
+        assert res.status_code == 404
+
+
+class AllowAll(object):
+    """Permission given to every user."""
+
+    def can(self):
+        """Grant the permission."""
+        return True
+
+
+def test_patch_madmp_permissions(base_app, db, location, indexed, madmp,
+                                 monkeypatch):
+    """Test only the owner of the records of a maDMP can patch it."""
+    document = new_madmp(madmp)
+    url = '/madmp/dmps/' + document['dmp']['dmp_id']['identifier']
+    patch = json.dumps({'dmp': {'title': 'Patched'}})
+    owner, other = {'X-User-Id': '1'}, {'X-User-Id': '2'}
+
+    with base_app.test_client() as client:
+        res = client.post('/madmp/upload', json=document, headers=owner)
+        recids = [item['recid'] for item in res.get_json()['responses']]
+        assert [Record.get_record(PersistentIdentifier.get(
+            'recid', recid).object_uuid)['owner'] for recid in recids] == \
+            [1, 1]
+
+        assert client.get(url).status_code == 401
+        assert client.patch(url, data=patch, content_type=MERGE_PATCH) \
+            .status_code == 401
+
+        res = client.patch(url, data=patch, content_type=MERGE_PATCH,
+                           headers=other)
+        assert res.status_code == 403
+        assert client.get(url, headers=other).get_json() == document
+
+        monkeypatch.setitem(
+            base_app.config, 'INVENIO_MADMP_PATCH_PERMISSION_FACTORY',
+            lambda madmp: AllowAll())
+        res = client.patch(url, data=patch, content_type=MERGE_PATCH,
+                           headers=other)
+        assert res.status_code == 200
+
+        # Records uploaded anonymously have no owner
+        document = new_madmp(madmp)
+        client.post('/madmp/upload', json=document)
+        monkeypatch.setitem(
+            base_app.config, 'INVENIO_MADMP_PATCH_PERMISSION_FACTORY', None)
+        res = client.patch(
+            '/madmp/dmps/' + document['dmp']['dmp_id']['identifier'],
+            data=patch, content_type=MERGE_PATCH, headers=owner)
+        assert res.status_code == 403
+
+
+def test_multipart_upload(base_app, db, location, indexed, madmp,
+                          monkeypatch):
+    """Test a file is uploaded in parts, in any order, and merged."""
+    monkeypatch.setitem(base_app.config, 'LOGIN_DISABLED', True)
+    monkeypatch.setitem(base_app.config,
+                        'FILES_REST_MULTIPART_CHUNKSIZE_MIN', 4)
+
+    with base_app.test_client() as client:
+        res = client.post('/madmp/upload', json=new_madmp(madmp))
+        recid = res.get_json()['responses'][0]['recid']
+        url = '/madmp/records/{0}/files/data.txt/uploads'.format(recid)
+
+        assert client.post(url, json={'size': '10'}).status_code == 400
+        assert client.post(url, json={'size': 10, 'part_size': 2}) \
+            .status_code == 400
+        assert client.post('/madmp/records/0/files/data.txt/uploads',
+                           json={'size': 10, 'part_size': 4}) \
+            .status_code == 404
+
+        res = client.post(url, json={'size': 10, 'part_size': 4})
+        assert res.status_code == 201
+        upload = res.get_json()
+        assert (upload['size'], upload['part_size'],
+                upload['last_part_number'], upload['parts']) == \
+            (10, 4, 2, [])
+        upload_url = url + '/' + upload['upload_id']
+
+        # Parts are stored at their offset, whatever their order
+        for number, data in ((2, b'ij'), (0, b'xxxx'), (1, b'efgh')):
+            res = client.put('{0}/parts/{1}'.format(upload_url, number),
+                             data=data)
+            assert res.status_code == 200
+            assert res.get_json()['part_number'] == number
+        assert client.put(upload_url + '/parts/0', data=b'abcd') \
+            .status_code == 200
+
+        assert client.put(upload_url + '/parts/1', data=b'efg') \
+            .status_code == 400
+        assert client.put(upload_url + '/parts/3', data=b'ij') \
+            .status_code == 400
+        assert client.put(url + '/' + uuid.uuid4().hex + '/parts/0',
+                          data=b'abcd').status_code == 404
+
+        res = client.get(upload_url)
+        assert [part['part_number'] for part in res.get_json()['parts']] \
+            == [0, 1, 2]
+
+        res = client.post(upload_url + '/complete')
+        assert res.status_code == 201
+        assert res.get_json()['size'] == 10
+        assert res.get_json()['checksum'] == \
+            'md5:' + hashlib.md5(b'abcdefghij').hexdigest()
+        assert client.get(upload_url).status_code == 404
+
+        obj = ObjectVersion.get(get_record_bucket(recid), 'data.txt')
+        with obj.file.storage().open() as fp:
+            assert fp.read() == b'abcdefghij'
+
+        # Incomplete uploads cannot be completed, and can be aborted
+        res = client.post(url, json={'size': 10, 'part_size': 4})
+        upload_url = url + '/' + res.get_json()['upload_id']
+        client.put(upload_url + '/parts/0', data=b'abcd')
+        assert client.post(upload_url + '/complete').status_code == 400
+
+        assert client.delete(upload_url).status_code == 204
+        assert client.get(upload_url).status_code == 404
+        assert client.delete(upload_url).status_code == 404
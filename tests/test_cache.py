@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Record cache tests."""
+
+from __future__ import absolute_import, print_function
+
+import time
+
+from invenio_madmp.cache import MemoryCacheBackend, RecordCache
+
+
+def test_memory_backend():
+    """Test the in-process backend evicts and expires entries."""
+    backend = MemoryCacheBackend(max_size=2, ttl=60)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    assert backend.get('a') == 1
+    backend.set('c', 3)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1
+    backend.delete('a')
+    assert backend.get('a') is None
+
+    backend = MemoryCacheBackend(ttl=0.01)
+    backend.set('a', 1)
+    time.sleep(0.02)
+    assert backend.get('a') is None
+
+    backend = MemoryCacheBackend(max_size=0)
+    backend.set('a', 1)
+    assert backend.get('a') is None
+
+
+def test_record_cache():
+    """Test values are only returned for the revision they were built from."""
+    cache = RecordCache(MemoryCacheBackend())
+    assert cache.get(1, 0, 'export') is None
+
+    cache.set(1, 0, 'export', 'first')
+    cache.set(1, 0, 'download', 'file')
+    assert cache.get(1, 0, 'export') == 'first'
+    assert cache.get(1, 0, 'download') == 'file'
+    assert cache.get(2, 0, 'export') is None
+
+    cache.set(1, 1, 'export', 'second')
+    assert cache.get(1, 1, 'export') == 'second'
+    assert cache.get(1, 1, 'download') is None
+
+
+def test_record_cache_race():
+    """Test a value of an older revision cached last is not returned."""
+    cache = RecordCache(MemoryCacheBackend())
+
+    # A request read revision 0, the record was updated and another request
+    # cached revision 1 before the first one cached its value
+    cache.set(1, 1, 'export', 'second')
+    cache.set(1, 0, 'export', 'first')
+
+    assert cache.get(1, 1, 'export') == 'second'
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Schema compiler conformance tests."""
+
+from __future__ import absolute_import, print_function
+
+import copy
+import json
+import os
+
+import pytest
+from jsonschema import Draft7Validator, FormatChecker
+
+from invenio_madmp.compiler import CompiledValidator, SchemaCompiler, \
+    UnsupportedSchema, compile_validator
+
+REPLACEMENTS = [
+    None, True, False, 0, 1, 1.0, 1.5, -3, '', 'text', '2020-01-01',
+    '2020-13-45', '2020-01-01T10:00:00Z', 'user@example.org',
+    'https://creativecommons.org/licenses/by/4.0/', 'yes', 'no', 'unknown',
+    'MB', [], ['a'], ['a', 'a'], {}, {'name': 'x'},
+]
+"""Values replacing every value of the maDMP in the conformance test."""
+
+
+def paths(value, path=()):
+    """Yields the path of every value of a document."""
+    yield path
+    if isinstance(value, dict):
+        for key in value:
+            for subpath in paths(value[key], path + (key,)):
+                yield subpath
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            for subpath in paths(item, path + (index,)):
+                yield subpath
+
+
+def mutations(document):
+    """Yields copies of a document with one value replaced or removed."""
+    for path in paths(document):
+        if not path:
+            continue
+        for replacement in REPLACEMENTS + ['delete', 'extra']:
+            mutated = copy.deepcopy(document)
+            parent = mutated
+            for key in path[:-1]:
+                parent = parent[key]
+
+            if replacement == 'delete':
+                del parent[path[-1]]
+            elif replacement == 'extra':
+                if not isinstance(parent, dict):
+                    continue
+                parent['unexpected'] = 1
+            else:
+                parent[path[-1]] = replacement
+            yield mutated
+
+
+@pytest.fixture()
+def madmp_schema():
+    """The bundled maDMP schema."""
+    import invenio_madmp
+    path = os.path.join(os.path.dirname(invenio_madmp.__file__),
+                        'maDMP-schema.json')
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def test_conformance(madmp_schema, madmp):
+    """Test the compiled schema gives the verdicts of jsonschema."""
+    validator = Draft7Validator(madmp_schema, format_checker=FormatChecker())
+    compiled = compile_validator(validator)
+    assert isinstance(compiled, CompiledValidator)
+
+    assert compiled.is_valid(madmp)
+    assert list(compiled.iter_errors(madmp)) == []
+
+    count = invalid = 0
+    for document in mutations(madmp):
+        verdict = validator.is_valid(document)
+        assert compiled.is_valid(document) == verdict, json.dumps(document)
+        assert bool(list(compiled.iter_errors(document))) != verdict
+        count += 1
+        invalid += not verdict
+
+    assert 0 < invalid < count
+
+
+@pytest.mark.parametrize('schema, valid, invalid', [
+    ({'type': 'integer'}, [1, 1.0, -2], [1.5, True, '1', None]),
+    ({'type': 'number'}, [1, 1.5], [True, '1']),
+    ({'type': ['string', 'null']}, ['a', None], [1, []]),
+    ({'enum': ['yes', 'no']}, ['yes'], ['maybe', 1, ['yes'], {}]),
+    ({'required': ['a'], 'properties': {'a': {'type': 'string'}}},
+     [{'a': 'x'}, 'not an object'], [{}, {'a': 1}]),
+    ({'properties': {'a': {}}, 'additionalProperties': False},
+     [{'a': 1}], [{'b': 1}]),
+    ({'properties': {'a': {}}, 'additionalProperties': {'type': 'string'}},
+     [{'a': 1, 'b': 'x'}], [{'b': 1}]),
+    ({'items': {'type': 'string'}, 'minItems': 1, 'maxItems': 2},
+     [['a'], ['a', 'b'], 'not an array'], [[], [1], ['a', 'b', 'c']]),
+    ({'uniqueItems': True},
+     [['a', 'b'], [1, True], [{'a': 1}, {'a': 2}]],
+     [['a', 'a'], [1, 1.0], [{'a': [1]}, {'a': [1]}]]),
+    ({'format': 'email'}, ['a@example.org', 1], ['nobody']),
+    (True, [1, None], []),
+    ({'properties': {'a': False}}, [{}], [{'a': 1}]),
+])
+def test_keywords(schema, valid, invalid):
+    """Test every supported keyword against jsonschema."""
+    validator = Draft7Validator(schema, format_checker=FormatChecker())
+    check = SchemaCompiler(validator.format_checker).compile(schema)
+
+    for instance in valid:
+        assert validator.is_valid(instance)
+        assert check(instance)
+    for instance in invalid:
+        assert not validator.is_valid(instance)
+        assert not check(instance)
+
+
+def test_unsupported():
+    """Test schemas with unsupported keywords are not compiled."""
+    with pytest.raises(UnsupportedSchema):
+        SchemaCompiler().compile({'properties': {'a': {'$ref': '#'}}})
+    with pytest.raises(UnsupportedSchema):
+        SchemaCompiler().compile({'enum': [1, 2]})
+
+    validator = Draft7Validator({'pattern': '^a'})
+    assert compile_validator(validator) is validator
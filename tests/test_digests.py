@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""maDMP digest tests."""
+
+from __future__ import absolute_import, print_function
+
+import io
+import json
+
+from invenio_madmp.digests import document_digest, streamed_digest
+from invenio_madmp.streaming import MaDMPStream
+
+
+def test_document_digest(madmp):
+    """Test formatting and key order do not change the digest."""
+    digest = document_digest(madmp)
+    assert len(digest) == 64
+
+    reordered = json.loads(json.dumps(madmp, indent=4, sort_keys=True))
+    reordered['dmp'] = dict(reversed(list(reordered['dmp'].items())))
+    assert document_digest(reordered) == digest
+
+    madmp['dmp']['dataset'][0]['title'] += '.'
+    assert document_digest(madmp) != digest
+
+
+def test_streamed_digest(madmp):
+    """Test the digest of a streamed maDMP matches its document's."""
+    stream = MaDMPStream(io.BytesIO(json.dumps(madmp, indent=4).encode()))
+
+    assert streamed_digest(stream.header, stream.datasets()) == \
+        document_digest(madmp)
+    assert streamed_digest(stream.header, []) != document_digest(madmp)
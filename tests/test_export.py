@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Bulk export tests."""
+
+from __future__ import absolute_import, print_function
+
+import io
+import json
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from invenio_madmp.export import export_ndjson, export_records, export_zip
+from invenio_madmp.mapping import extractor
+from invenio_madmp.serializers import MaDMPJSONSerializer
+
+
+@pytest.fixture()
+def records(madmp):
+    """Records of the maDMP datasets, as returned by the database."""
+    return [
+        (str(rec_id), datetime(2020, 3, 14, 10, 53, 49), record)
+        for rec_id, record in enumerate(extractor.extract(madmp), 1)
+    ]
+
+
+def test_export_ndjson(records):
+    """Test every record is exported as one maDMP line."""
+    serializer = MaDMPJSONSerializer()
+    lines = list(export_ndjson(records, serializer))
+
+    assert len(lines) == 2
+    assert all(line.count('\n') == 1 and line.endswith('\n')
+               for line in lines)
+    assert lines[0] == ''.join(serializer.serialize([records[0][2]]))
+    assert json.loads(lines[1])['dmp']['dataset'][0]['title'] == \
+        records[1][2]['title']
+
+
+def test_export_zip(records):
+    """Test every record is exported as one file of a streamed archive."""
+    serializer = MaDMPJSONSerializer()
+    archive = zipfile.ZipFile(io.BytesIO(
+        b''.join(export_zip(records, serializer))))
+
+    assert archive.testzip() is None
+    names = archive.namelist()
+    assert len(names) == 2
+    assert all(name.endswith('-maDMP.json') for name in names)
+    assert names[0] == '1-' + serializer.filename(records[0][2])
+    assert archive.getinfo(names[0]).date_time == (2020, 3, 14, 10, 53, 48)
+
+    document = json.loads(archive.read(names[0]).decode('utf-8'))
+    assert document['dmp']['dataset'][0]['title'] == records[0][2]['title']
+
+
+def test_export_format():
+    """Test unknown formats are rejected."""
+    with pytest.raises(ValueError):
+        export_records('xml')
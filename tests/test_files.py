@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Content-addressed file storage tests."""
+
+from __future__ import absolute_import, print_function
+
+import hashlib
+import io
+from collections import namedtuple
+
+import pytest
+from invenio_files_rest.errors import FileSizeError
+from invenio_files_rest.models import Bucket, FileInstance, ObjectVersion
+
+from invenio_madmp.files import HashingStream, accel_redirect_uri, \
+    content_disposition, local_path, send_object, store_file, verify_file
+
+File = namedtuple('File', 'uri')
+"""Stand-in of a file instance, with its storage URI."""
+
+
+@pytest.fixture(scope='module', name='create_app')
+def api_app_factory(create_api_app):
+    """Test the storage with the files models."""
+    return create_api_app
+
+
+def test_hashing_stream():
+    """Test the content is hashed while it is read."""
+    data = b'shared reference data' * 1000
+    stream = HashingStream(io.BytesIO(data))
+
+    chunks = list(iter(lambda: stream.read(4096), b''))
+
+    assert b''.join(chunks) == data
+    assert stream.size == len(data)
+    assert stream.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+def test_accel_redirect_uri():
+    """Test storage paths are mapped to the internal locations of nginx."""
+    locations = {'/data/files/': '/protected-files',
+                 '/mnt/archive': '/archive/'}
+
+    assert accel_redirect_uri('/data/files/ab/cd/data', locations) == \
+        '/protected-files/ab/cd/data'
+    assert accel_redirect_uri('/mnt/archive/x/data', locations) == \
+        '/archive/x/data'
+    assert accel_redirect_uri('/mnt/archived/x/data', locations) is None
+    assert accel_redirect_uri('/tmp/data', {}) is None
+
+
+def test_local_path():
+    """Test only files of the local file system have a path."""
+    assert local_path(File('/data/files/ab/data')) == \
+        '/data/files/ab/data'
+    assert local_path(File('file:///data/ab/data')) == '/data/ab/data'
+    assert local_path(File('s3://bucket/ab/data')) is None
+    assert local_path(File(None)) is None
+
+
+def test_store_file(base_app, db, location, monkeypatch):
+    """Test identical content is stored once and not written again."""
+    data = b'shared reference data' * 10000
+    bucket = Bucket.create()
+    db.session.commit()
+
+    writes = []
+    set_contents = FileInstance.set_contents
+    monkeypatch.setattr(FileInstance, 'set_contents',
+                        lambda self, stream, **kwargs: writes.append(1) or
+                        set_contents(self, stream, **kwargs))
+    files = FileInstance.query.count()
+
+    first = store_file(bucket, 'a.txt', io.BytesIO(data), spool_size=1024)
+    second = store_file(bucket.id, 'b.txt', io.BytesIO(data))
+
+    assert len(writes) == 1
+    assert FileInstance.query.count() == files + 1
+    assert first.file_id == second.file_id
+    assert ObjectVersion.get(bucket, 'b.txt').file.size == len(data)
+    with second.file.storage().open() as fp:
+        assert fp.read() == data
+
+    store_file(bucket, 'c.txt', io.BytesIO(data + b'.'))
+    assert len(writes) == 2
+
+    with pytest.raises(FileSizeError):
+        store_file(bucket, 'd.txt', io.BytesIO(b'new' + data),
+                   size_limit=len(data), chunk_size=4096)
+    db.session.rollback()
+    assert len(writes) == 2
+    assert ObjectVersion.get(bucket, 'd.txt') is None
+
+
+def test_verify_file(base_app, db, location):
+    """Test the stored data is checked against the checksum."""
+    bucket = Bucket.create()
+    db.session.commit()
+    obj = store_file(bucket, 'a.txt', io.BytesIO(b'verified data'))
+
+    assert verify_file(str(obj.file_id)) is True
+    assert FileInstance.get(obj.file_id).last_check is True
+
+    with open(local_path(obj.file), 'wb') as fp:
+        fp.write(b'corrupted data')
+
+    assert verify_file(str(obj.file_id)) is False
+    assert FileInstance.get(obj.file_id).last_check is False
+
+
+def test_content_disposition():
+    """Test file names are quoted and encoded as in RFC 6266."""
+    assert content_disposition('data.csv') == \
+        'attachment; filename="data.csv"; filename*=UTF-8\'\'data.csv'
+    assert content_disposition('résumé "1".txt') == (
+        'attachment; filename="resume \\"1\\".txt"; '
+        'filename*=UTF-8\'\'r%C3%A9sum%C3%A9%20%221%22.txt'
+    )
+    assert content_disposition('a;b\r\nc') == \
+        'attachment; filename="a;bc"; filename*=UTF-8\'\'a%3Bb%0D%0Ac'
+
+
+def test_send_object(base_app, db, location, monkeypatch):
+    """Test local files are sent by the front-end server or in ranges."""
+    data = b'0123456789'
+    bucket = Bucket.create()
+    obj = ObjectVersion.create(bucket, 'données.txt', stream=io.BytesIO(data))
+    db.session.commit()
+    path = local_path(obj.file)
+    disposition = content_disposition('données.txt')
+
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_FILES_SENDFILE',
+                        'x-accel-redirect')
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_FILES_ACCEL_LOCATIONS',
+                        {location.uri: '/protected-files'})
+    with base_app.test_request_context():
+        response = send_object(obj)
+    assert response.headers['X-Accel-Redirect'] == \
+        '/protected-files/' + path[len(location.uri):].lstrip('/')
+    assert response.headers['Content-Disposition'] == disposition
+    assert response.get_data() == b''
+
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_FILES_SENDFILE',
+                        'x-sendfile')
+    with base_app.test_request_context():
+        response = send_object(obj)
+    assert response.headers['X-Sendfile'] == path
+    assert response.headers['Content-Disposition'] == disposition
+
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_FILES_SENDFILE', None)
+    with base_app.test_request_context(headers={'Range': 'bytes=2-5'}):
+        response = send_object(obj)
+        response.direct_passthrough = False
+        assert response.status_code == 206
+        assert response.headers['Content-Range'] == 'bytes 2-5/10'
+        assert response.get_data() == b'2345'
+        response.close()
+    assert response.headers['Content-Disposition'] == disposition
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Index migration tests."""
+
+from __future__ import absolute_import, print_function
+
+import json
+import os
+
+from invenio_madmp.indexer import migrate_index
+
+
+class Indices(object):
+    """Indices API of an Elasticsearch client, with indices in memory."""
+
+    def __init__(self, calls):
+        """Indices constructor."""
+        self.calls = calls
+        self.aliases = {'records-record-v1.0.0': {'records', 'records-record'}}
+
+    def exists(self, index):
+        """Checks if an index exists."""
+        return index in self.aliases
+
+    def create(self, index, body=None):
+        """Create an index."""
+        self.calls.append(('create', index, body))
+        self.aliases[index] = set()
+
+    def get(self, index):
+        """Indices of a name or alias."""
+        return {name: {} for name, aliases in self.aliases.items()
+                if name == index or index in aliases}
+
+    def exists_alias(self, name, index=None):
+        """Checks if an index has an alias."""
+        return name in self.aliases.get(index, ())
+
+    def update_aliases(self, body):
+        """Add and remove aliases."""
+        self.calls.append(('update_aliases', body))
+        for action in body['actions']:
+            for op, args in action.items():
+                aliases = self.aliases[args['index']]
+                aliases.add(args['alias']) if op == 'add' \
+                    else aliases.remove(args['alias'])
+
+
+class Client(object):
+    """Elasticsearch client recording its calls."""
+
+    def __init__(self):
+        """Client constructor."""
+        self.calls = []
+        self.indices = Indices(self.calls)
+
+    def reindex(self, body, **kwargs):
+        """Copy an index."""
+        self.calls.append(('reindex', body['source']['index'],
+                           body['dest']['index']))
+        return {'total': 2, 'created': 2, 'updated': 0}
+
+
+def test_migrate_index():
+    """Test the index is copied before and after the aliases are moved."""
+    client = Client()
+    migrate_index(client, 'records-record', 'records-record-v2.0.0',
+                  ['records', 'records-record'], body={'mappings': {}})
+
+    assert [call[0] for call in client.calls] == \
+        ['create', 'reindex', 'update_aliases', 'reindex']
+    assert client.calls[1][1:] == ('records-record', 'records-record-v2.0.0')
+    assert len(client.calls[2][1]['actions']) == 4
+    assert client.indices.aliases == {
+        'records-record-v1.0.0': set(),
+        'records-record-v2.0.0': {'records', 'records-record'},
+    }
+
+    client.calls[:] = []
+    migrate_index(client, 'records-record-v2.0.0', 'records-record-v2.0.0',
+                  [])
+    assert [call[0] for call in client.calls] == ['reindex', 'reindex']
+
+
+def test_mapping_v2():
+    """Test the enum-like fields of the v2 mapping are keywords."""
+    path = os.path.join(os.path.dirname(__file__), '..', 'files',
+                        'elasticsearch', 'record-v2.0.0.json')
+    with open(path) as fp:
+        mapping = json.load(fp)
+
+    properties = mapping['mappings']['properties']
+    for field in ('license', 'upload_type', 'data_access',
+                  'ethical_issues_exist', 'personal_data', 'sensitive_data'):
+        assert properties[field] == {'type': 'keyword', 'doc_values': True}
+    assert properties['contributors']['type'] == 'nested'
+    assert properties['suggest_title']['contexts'] == [
+        {'name': 'owner', 'type': 'category', 'path': 'owner'}]
+    # Category contexts are only read from keyword and text fields
+    assert properties['owner'] == {'type': 'keyword'}
+    assert mapping['settings']['index']['sort.field'] == 'publication_date'
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Upload job tests."""
+
+from __future__ import absolute_import, print_function
+
+import copy
+import io
+import json
+import os
+import time
+import uuid
+
+import pytest
+from flask import current_app
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.api import Record
+
+from invenio_madmp.jobs import JobManager, JobStore, process_job
+from invenio_madmp.proxies import current_madmp
+
+
+@pytest.fixture(scope='module', name='create_app')
+def api_app_factory(create_api_app):
+    """Test the jobs in the API application."""
+    return create_api_app
+
+
+def app_name(suffix):
+    """Name of the current application, to test background tasks."""
+    return current_app.name + suffix
+
+
+def new_madmp(madmp):
+    """Copy of a maDMP with new identifiers, so it is not a known upload."""
+    madmp = copy.deepcopy(madmp)
+    suffix = '/' + uuid.uuid4().hex
+    madmp['dmp']['dmp_id']['identifier'] += suffix
+    for dataset in madmp['dmp']['dataset']:
+        dataset['dataset_id']['identifier'] += suffix
+    return madmp
+
+
+def wait_for_job(job_id, timeout=10):
+    """Wait until a job of the worker pool is done and return it."""
+    deadline = time.time() + timeout
+    job = current_madmp.jobs.store.get(job_id)
+    while job.status in ('queued', 'running') and time.time() < deadline:
+        time.sleep(0.05)
+        job = current_madmp.jobs.store.get(job_id)
+    return job
+
+
+def test_job_store(tmpdir, madmp):
+    """Test storing payloads and job states."""
+    store = JobStore(str(tmpdir.join('jobs')))
+
+    job = store.create(madmp)
+    with open(store.payload_path(job.id)) as fp:
+        assert json.load(fp) == madmp
+    assert store.get(job.id).status == 'queued'
+
+    job.status = 'finished'
+    job.responses.append({'id': 1, 'message': 'ok', 'status': 201})
+    store.save(job)
+    store.remove_payload(job.id)
+    assert not os.path.exists(store.payload_path(job.id))
+    assert store.get(job.id).to_dict()['responses'][0]['status'] == 201
+
+    job = store.create(io.BytesIO(b'{"dmp": {}}'))
+    with open(store.payload_path(job.id), 'rb') as fp:
+        assert fp.read() == b'{"dmp": {}}'
+
+    assert store.get('../../etc/passwd') is None
+    assert store.get('0' * 32) is None
+
+
+def test_process_job(base_app, db, location, indexed, tmpdir, monkeypatch,
+                     madmp):
+    """Test a job creates the records of its maDMP and reports progress."""
+    store = JobStore(str(tmpdir.join('jobs')))
+    states = []
+    save = store.save
+    monkeypatch.setattr(store, 'save', lambda job: states.append(
+        (job.status, job.total, job.processed)) or save(job))
+
+    job = store.create(madmp)
+    process_job(store, job.id)
+
+    job = store.get(job.id)
+    assert job.status == 'finished'
+    assert [item['status'] for item in job.responses] == [201, 201]
+    assert states == [
+        ('queued', None, 0),
+        ('running', None, 0),
+        ('running', 2, 0),
+        ('running', 2, 2),
+        ('finished', 2, 2),
+    ]
+    assert not os.path.exists(store.payload_path(job.id))
+
+    del madmp['dmp']['title']
+    job = store.create(madmp)
+    process_job(store, job.id)
+    job = store.get(job.id)
+    assert job.status == 'failed'
+    assert job.message == 'JSON does not validate against the schema'
+
+    job = store.create(io.BytesIO(b'{"dmp": '))
+    process_job(store, job.id)
+    job = store.get(job.id)
+    assert job.status == 'failed'
+    assert job.message.startswith('JSON syntax error')
+
+
+def test_job_manager(base_app, db, location, indexed, tmpdir, madmp):
+    """Test jobs and tasks run in the worker pool of the manager."""
+    manager = JobManager(JobStore(str(tmpdir.join('jobs'))), max_workers=1)
+
+    job = manager.submit(madmp)
+    assert job.status == 'queued'
+    assert manager.run(app_name, '-task').result() == base_app.name + '-task'
+    manager.pool.shutdown(wait=True)
+
+    job = manager.store.get(job.id)
+    assert job.status == 'finished'
+    assert job.processed == 2
+
+    with pytest.raises(RuntimeError):
+        JobManager(manager.store, executor='process')
+
+
+def test_job_view(base_app, madmp):
+    """Test the state of a job is reported by the REST API."""
+    job = current_madmp.jobs.store.create(madmp)
+
+    with base_app.test_client() as client:
+        res = client.get('/madmp/jobs/' + job.id)
+        assert res.status_code == 200
+        assert res.get_json() == job.to_dict()
+
+        assert client.get('/madmp/jobs/' + '0' * 32).status_code == 404
+        assert client.get('/madmp/jobs/not-a-job').status_code == 404
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_async_upload(base_app, db, location, indexed, madmp, monkeypatch,
+                      streaming):
+    """Test maDMPs are accepted and handed to the jobs of the manager."""
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_ASYNC_UPLOADS', True)
+    monkeypatch.setitem(base_app.config, 'INVENIO_MADMP_STREAMING_UPLOADS',
+                        streaming)
+    payloads = []
+    submit = current_madmp.jobs.submit
+    monkeypatch.setattr(current_madmp.jobs, 'submit', lambda payload, **kw: (
+        payloads.append(payload) or submit(payload, **kw)))
+
+    document = new_madmp(madmp)
+    content = json.dumps(document).encode('utf-8')
+
+    with base_app.test_client() as client:
+        res = client.post('/madmp/upload', json=new_madmp(madmp),
+                          headers={'X-User-Id': '1'})
+        assert res.status_code == 202
+        job_id = res.get_json()['job_id']
+        assert res.get_json()['status'] == 202
+        assert res.headers['Location'] == \
+            'http://localhost/madmp/jobs/' + job_id
+        assert payloads[-1]['dmp']['title'] == document['dmp']['title']
+        job = wait_for_job(job_id)
+        assert job.status == 'finished'
+        assert [item['status'] for item in job.responses] == [201, 201]
+        assert job.owner == 1
+        assert Record.get_record(PersistentIdentifier.get(
+            'recid', job.responses[0]['recid']).object_uuid)['owner'] == 1
+
+        res = client.post('/madmp/upload', data={
+            'file': (io.BytesIO(content), 'madmp.json'),
+        })
+        assert res.status_code == 202
+        job_id = res.get_json()['job_id']
+        assert res.headers['Location'].endswith('/madmp/jobs/' + job_id)
+        assert not isinstance(payloads[-1], dict)
+        job = wait_for_job(job_id)
+        assert job.status == 'finished'
+        assert job.processed == 2
+
+        submitted = len(payloads)
+        invalid = new_madmp(madmp)
+        invalid['dmp']['title'] = 1
+        res = client.post('/madmp/upload', json=invalid)
+        assert res.status_code == 400
+        assert res.get_json()['message'] == \
+            'JSON does not validate against the schema'
+
+        res = client.post('/madmp/upload', data={
+            'file': (io.BytesIO(json.dumps(invalid).encode('utf-8')),
+                     'madmp.json'),
+        })
+        assert res.status_code == 400
+        assert len(payloads) == submitted
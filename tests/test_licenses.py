@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""License index tests."""
+
+from __future__ import absolute_import, print_function
+
+import pytest
+
+from invenio_madmp.licenses import get_license_mapping, licenses, \
+    normalize_license_url
+
+
+def test_normalize_license_url():
+    """Test URL variants of a license share one key."""
+    key = normalize_license_url('https://creativecommons.org/licenses/by/4.0/')
+    assert normalize_license_url('http://creativecommons.org/by/4.0') == key
+    assert normalize_license_url('https://www.creativecommons.org/licenses/BY/4.0') == key
+    assert normalize_license_url('https://creativecommons.org/licenses/by-sa/4.0/') != key
+
+
+def test_license_index():
+    """Test lookups by name and by URL."""
+    assert licenses.name('https://opensource.org/licenses/MIT') == 'MIT'
+    assert licenses.name('http://opensource.org/licenses/MIT/') == 'MIT'
+    assert licenses.name('https://creativecommons.org/by/4.0') == 'CC BY'
+    assert licenses.name('https://example.org/licenses/MIT') is None
+    assert licenses.name(None) is None
+
+    assert licenses.url('CC BY') == 'https://creativecommons.org/licenses/by/4.0/'
+    assert licenses.url('GNU General Public License version 3') == \
+        'https://opensource.org/licenses/GPL-3.0'
+    assert licenses.url('GNU LGPL') is None
+
+    assert 'https://opensource.org/licenses/LGPL-2.1' in licenses
+    assert 'https://opensource.org/licenses/foo' not in licenses
+
+    for name in licenses.names:
+        assert licenses.name(licenses.url(name)) == name
+    assert len(licenses.names) == sum(
+        len(v) if isinstance(v, dict) else 1
+        for v in get_license_mapping().values()
+    )
+
+    with pytest.raises(AttributeError):
+        licenses.foo = 'bar'
+
+
+def test_api_import():
+    """Test the license mapping can still be imported from the API module."""
+    from invenio_madmp.api import get_license_mapping as api_license_mapping
+
+    assert api_license_mapping is get_license_mapping
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""maDMP mapping tests."""
+
+from __future__ import absolute_import, print_function
+
+from invenio_madmp.mapping import extractor, serializer
+
+
+def test_extract(madmp):
+    """Test extracting one record per dataset."""
+    first, second = extractor.extract(madmp)
+
+    assert first == {
+        'dmp_id': {
+            'identifier': 'https://doi.org/10.15497/rda00039',
+            'type': 'doi',
+        },
+        'dataset_id': {
+            'identifier': 'https://hdl.handle.net/11353/10.923628',
+            'type': 'handle',
+        },
+        'ethical_issues_exist': 'unknown',
+        'contact': {'name': 'Charlie Chaplin', 'mbox': 'cc@example.com'},
+        'contributors': [{
+            'name': 'John Smith',
+            'email': 'john@example.com',
+            'role': ['Data Steward'],
+        }],
+        'title': 'Field observations',
+        'description': 'Field observation',
+        'publication_date': '2020-03-01',
+        'upload_type': 'Dataset',
+        'personal_data': 'no',
+        'sensitive_data': 'no',
+        'data_access': 'open',
+        'license': 'CC BY',
+        'license_start_date': '2020-03-01',
+        'distributions': [{
+            'title': 'Full resolution images',
+            'data_access': 'open',
+            'license': [{
+                'license_ref': 'https://creativecommons.org/licenses/by/4.0/',
+                'start_date': '2020-03-01',
+            }],
+        }],
+    }
+    assert second['title'] == 'Analysis software'
+    assert second['license'] == 'MIT'
+    assert 'publication_date' not in second
+
+
+def test_extract_key_order(madmp):
+    """Test maDMP keys after the dataset array are extracted as well."""
+    dmp = madmp['dmp']
+    dmp['ethical_issues_exist'] = dmp.pop('ethical_issues_exist')
+
+    for record in extractor.extract(madmp):
+        assert record['ethical_issues_exist'] == 'unknown'
+
+
+def test_extract_licenses(madmp):
+    """Test the first valid license of all distributions is kept."""
+    dataset = madmp['dmp']['dataset'][0]
+    dataset['distribution'][0]['license'].insert(0, {
+        'license_ref': 'https://example.org/license',
+        'start_date': '2019-01-01',
+    })
+    dataset['distribution'].append({
+        'title': 'Thumbnails',
+        'data_access': 'closed',
+        'license': [{
+            'license_ref': 'https://opensource.org/licenses/MIT',
+            'start_date': '2021-01-01',
+        }],
+    })
+
+    record = extractor.extract(madmp)[0]
+    assert record['license'] == 'CC BY'
+    assert record['license_start_date'] == '2021-01-01'
+    assert record['data_access'] == 'closed'
+
+
+def test_extract_invalid():
+    """Test documents without a dmp."""
+    assert extractor.extract({}) is None
+    assert extractor.extract({'dmp': {'title': 'No datasets'}}) == []
+
+
+def test_round_trip(madmp):
+    """Test serializing extracted records gives back the mapped maDMP."""
+    records = extractor.extract(madmp)
+    exported = serializer.serialize(records)
+
+    dmp = exported['dmp']
+    assert dmp['ethical_issues_exist'] == 'unknown'
+    assert dmp['dmp_id'] == madmp['dmp']['dmp_id']
+    assert dmp['contact'] == {'name': 'Charlie Chaplin', 'mbox': 'cc@example.com'}
+    assert dmp['contributor'] == [{
+        'name': 'John Smith',
+        'mbox': 'john@example.com',
+        'role': ['Data Steward'],
+    }]
+
+    assert len(dmp['dataset']) == 2
+    for dataset, original in zip(dmp['dataset'], madmp['dmp']['dataset']):
+        for key in ('dataset_id', 'title', 'issued', 'type', 'personal_data',
+                    'distribution'):
+            assert dataset.get(key) == original.get(key)
+
+    assert extractor.extract(exported) == records
+
+
+def test_serialize_distributions(madmp):
+    """Test records with several distributions and licenses."""
+    dataset = madmp['dmp']['dataset'][0]
+    dataset['distribution'][0]['license'].append({
+        'license_ref': 'http://opensource.org/licenses/MIT',
+        'start_date': '2021-01-01',
+    })
+    dataset['distribution'].append({
+        'title': 'Thumbnails',
+        'data_access': 'closed',
+        'byte_size': 1024,
+        'license': [{
+            'license_ref': 'https://example.org/license',
+            'start_date': '2021-01-01',
+        }],
+    })
+
+    record = extractor.extract(madmp)[0]
+    distributions = serializer.serialize_dataset(record)['distribution']
+    assert len(distributions) == 2
+    assert distributions[0]['license'][1] == {
+        'license_ref': 'https://opensource.org/licenses/MIT',
+        'start_date': '2021-01-01',
+    }
+    assert distributions[1] == {
+        'title': 'Thumbnails',
+        'data_access': 'closed',
+        'byte_size': 1024,
+        'license': [],
+    }
+
+
+def test_serialize_legacy_record():
+    """Test records without stored distributions."""
+    dataset = serializer.serialize_dataset({
+        'title': 'Deposit',
+        'publication_date': '2020-01-01',
+        'license': 'GNU General Public License version 2',
+        'license_start_date': '2020-01-01',
+        'access_right': 'open',
+    })
+    assert dataset == {
+        'title': 'Deposit',
+        'issued': '2020-01-01',
+        'distribution': [{
+            'license': [{
+                'license_ref': 'https://opensource.org/licenses/GPL-2.0',
+                'start_date': '2020-01-01',
+            }],
+        }],
+    }
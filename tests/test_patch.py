@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""maDMP patch tests."""
+
+from __future__ import absolute_import, print_function
+
+import copy
+
+import pytest
+
+from invenio_madmp.mapping import extractor
+from invenio_madmp.models import identifier_of
+from invenio_madmp.patch import JSON_PATCH, MERGE_PATCH, InvalidPatch, \
+    apply_patch, merge_patch
+
+
+def test_merge_patch():
+    """Test the examples of RFC 7386."""
+    assert merge_patch({'a': 'b'}, {'a': 'c'}) == {'a': 'c'}
+    assert merge_patch({'a': 'b'}, {'b': 'c'}) == {'a': 'b', 'b': 'c'}
+    assert merge_patch({'a': 'b'}, {'a': None}) == {}
+    assert merge_patch({'a': [{'b': 'c'}]}, {'a': [1]}) == {'a': [1]}
+    assert merge_patch({'e': None}, {'a': 1}) == {'e': None, 'a': 1}
+    assert merge_patch([1, 2], {'a': 'b', 'c': None}) == {'a': 'b'}
+    assert merge_patch({}, {'a': {'bb': {'ccc': None}}}) == {'a': {'bb': {}}}
+
+    target = {'a': {'b': 'c'}}
+    merge_patch(target, {'a': {'b': None}})
+    assert target == {'a': {'b': 'c'}}
+
+
+def test_apply_patch(madmp):
+    """Test applying both kinds of patches to a maDMP."""
+    original = copy.deepcopy(madmp)
+
+    patched = apply_patch(madmp, [
+        {'op': 'replace', 'path': '/dmp/dataset/1/title', 'value': 'Code'},
+    ], JSON_PATCH)
+    assert patched['dmp']['dataset'][1]['title'] == 'Code'
+    assert madmp == original
+
+    patched = apply_patch(madmp, {'dmp': {'ethical_issues_exist': 'no'}},
+                          MERGE_PATCH)
+    assert patched['dmp']['ethical_issues_exist'] == 'no'
+    assert patched['dmp']['dataset'] == original['dmp']['dataset']
+
+    with pytest.raises(InvalidPatch):
+        apply_patch(madmp, [{'op': 'remove', 'path': '/dmp/nothing'}],
+                    JSON_PATCH)
+    with pytest.raises(InvalidPatch):
+        apply_patch(madmp, {}, 'application/json')
+
+
+def test_dataset_identifiers(madmp):
+    """Test the records keep the identifiers of their maDMP and dataset."""
+    dmp = madmp['dmp']
+    assert identifier_of(dmp, 'dmp_id') == 'https://doi.org/10.15497/rda00039'
+    assert identifier_of(dmp['dataset'][1], 'dataset_id') == \
+        'https://hdl.handle.net/11353/10.923629'
+    assert identifier_of({'dataset_id': {'type': 'other'}}, 'dataset_id') \
+        is None
+
+    for record, dataset in zip(extractor.extract(madmp), dmp['dataset']):
+        assert record['dataset_id'] == dataset['dataset_id']
+        assert set(record) <= extractor.record_keys
+    assert 'license_start_date' in extractor.record_keys
+    assert 'owner' not in extractor.record_keys
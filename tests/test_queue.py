@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Deferred indexing queue tests."""
+
+from __future__ import absolute_import, print_function
+
+import time
+from collections import namedtuple
+
+import pytest
+from invenio_records.api import Record
+
+from invenio_madmp.indexer import MaDMPIndexer
+from invenio_madmp.queue import IndexQueue, MemoryQueueBackend, \
+    SQLiteQueueBackend
+
+Loaded = namedtuple('Loaded', 'id')
+"""Stand-in of a record loaded from the database."""
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmpdir):
+    """Queue backends."""
+    if request.param == 'sqlite':
+        return SQLiteQueueBackend(str(tmpdir.join('queue.db')))
+    return MemoryQueueBackend()
+
+
+def test_backend(backend):
+    """Test pushing and popping record ids in order."""
+    backend.push(['a', 'b', 'c'])
+    backend.push(['d'], attempt=2)
+    assert len(backend) == 4
+
+    assert backend.pop(2) == [('a', 0), ('b', 0)]
+    assert backend.pop(5) == [('c', 0), ('d', 2)]
+    assert backend.pop(5) == []
+    assert len(backend) == 0
+
+
+def test_backend_not_before(backend):
+    """Test record ids are only popped once they are due."""
+    backend.push(['a'], attempt=1, not_before=100)
+    backend.push(['b', 'c'])
+    backend.push(['d'], attempt=2, not_before=200)
+
+    assert backend.pop(1, now=50) == [('b', 0)]
+    assert backend.pop(5, now=50) == [('c', 0)]
+    assert backend.pop(5, now=150) == [('a', 1)]
+    assert len(backend) == 1
+    assert backend.pop(5, now=250) == [('d', 2)]
+
+
+def test_ext_queue(base_app):
+    """Test the queue created by the extension."""
+    queue = base_app.extensions['invenio-madmp'].index_queue
+    assert isinstance(queue, IndexQueue)
+    assert isinstance(queue.backend, MemoryQueueBackend)
+    assert queue.batch_size == base_app.config[
+        'INVENIO_MADMP_INDEXER_BATCH_SIZE']
+
+
+@pytest.fixture()
+def bulk_index(monkeypatch):
+    """Index stub failing the record ids in ``failing``, recording calls.
+
+    :returns: dictionary with the list of the indexed record id lists under
+        ``calls`` and the set of the record ids to fail under ``failing``
+    """
+    state = {'calls': [], 'failing': set()}
+
+    def bulk_index_records(self, records):
+        ids = [str(record.id) for record in records]
+        state['calls'].append(ids)
+        return [rid for rid in ids if rid in state['failing']]
+
+    monkeypatch.setattr(Record, 'get_records', classmethod(
+        lambda cls, ids, **kwargs: [Loaded(rid) for rid in ids]))
+    monkeypatch.setattr(MaDMPIndexer, 'bulk_index_records',
+                        bulk_index_records)
+    return state
+
+
+def test_consume_retry(base_app, bulk_index):
+    """Test a failed record is retried after the delay, then indexed."""
+    queue = IndexQueue(MemoryQueueBackend(), batch_size=2, retry_delay=10)
+    queue.enqueue(['a', 'b', 'c'])
+    bulk_index['failing'].add('a')
+
+    with base_app.app_context():
+        assert queue.consume(now=1000) == 2
+        bulk_index['failing'].clear()
+        assert queue.consume(now=1000) == 1
+        assert queue.consume(now=1009) == 0
+        assert queue.consume(now=1010) == 1
+
+    assert bulk_index['calls'] == [['a', 'b'], ['c'], ['a']]
+    assert len(queue.backend) == 0
+
+
+def test_consume_give_up(base_app, bulk_index, capsys):
+    """Test a record failing every time is dropped after the retries."""
+    queue = IndexQueue(MemoryQueueBackend(), max_retries=2, retry_delay=10)
+    queue.enqueue(['a'])
+    bulk_index['failing'].add('a')
+
+    with base_app.app_context():
+        assert queue.consume(now=0) == 1
+        # Retried after 10 then 20 seconds, not at once
+        assert queue.consume(now=9) == 0
+        assert queue.consume(now=10) == 1
+        assert queue.consume(now=29) == 0
+        assert queue.consume(now=30) == 1
+        assert queue.consume(now=10 ** 6) == 0
+
+    assert bulk_index['calls'] == [['a']] * 3
+    assert 'Giving up indexing record a' in capsys.readouterr().out
+
+
+def test_consume_outage(base_app, bulk_index):
+    """Test a failing bulk request does not drain the retries at once."""
+    queue = IndexQueue(MemoryQueueBackend(), batch_size=2, retry_delay=10)
+    queue.enqueue(['a', 'b'])
+    bulk_index['failing'].update(['a', 'b'])
+
+    with base_app.app_context():
+        # The loop of the consumer thread stops once no batch is due
+        while queue.consume() == queue.batch_size:
+            pass
+
+    assert bulk_index['calls'] == [['a', 'b']]
+    assert len(queue.backend) == 2
+
+
+def test_flush_thread(base_app, bulk_index):
+    """Test the consumer thread drains full batches and flushes the rest."""
+    queue = IndexQueue(MemoryQueueBackend(), batch_size=2,
+                       flush_interval=0.2)
+    queue.enqueue(['a', 'b', 'c', 'd', 'e'], app=base_app)
+
+    deadline = time.time() + 5
+    while len(bulk_index['calls']) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert len(queue.backend) == 0
+    assert bulk_index['calls'] == [['a', 'b'], ['c', 'd'], ['e']]
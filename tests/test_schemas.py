@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Schema registry tests."""
+
+from __future__ import absolute_import, print_function
+
+import io
+import json
+import os
+
+import pytest
+from jsonschema import ValidationError
+
+from invenio_madmp.schemas import SchemaRegistry, SchemaValidationErrors, \
+    UnknownSchemaVersion, json_path
+
+
+def test_version_of():
+    """Test reading the declared schema version."""
+    url = 'https://github.com/RDA-DMP-Common/RDA-DMP-Common-Standard/' \
+          'tree/master/examples/JSON/JSON-schema/1.0'
+    assert SchemaRegistry.version_of({'dmp': {'schema': url}}) == '1.0'
+    assert SchemaRegistry.version_of(
+        {'$schema': 'http://example.org/1.1/maDMP-schema-1.1.json'}) == '1.1'
+    assert SchemaRegistry.version_of({'dmp': {}}) is None
+    assert SchemaRegistry.version_of([]) is None
+
+
+def test_registry(tmpdir):
+    """Test validators are cached until the schema file changes."""
+    schema_file = tmpdir.join('schema.json')
+    schema_file.write(json.dumps({'type': 'object', 'required': ['dmp']}))
+
+    registry = SchemaRegistry({'1.0': str(schema_file)}, '1.0')
+    validator = registry.get()
+    assert registry.get('1.0') is validator
+    assert registry.versions == ('1.0',)
+
+    registry.validate({'dmp': {}})
+    with pytest.raises(ValidationError):
+        registry.validate({})
+    with pytest.raises(UnknownSchemaVersion):
+        registry.validate({'dmp': {'schema': 'http://example.org/9.9'}})
+
+    schema_file.write(json.dumps({'type': 'object'}))
+    mtime = os.stat(str(schema_file)).st_mtime
+    os.utime(str(schema_file), (mtime + 10, mtime + 10))
+    assert registry.get() is not validator
+    registry.validate({})
+
+
+def test_bundled_schema(base_app, madmp):
+    """Test the bundled maDMP schema is loaded at initialization."""
+    registry = base_app.extensions['invenio-madmp'].schemas
+    assert registry.entry().validator is not None
+    registry.validate(madmp)
+    with pytest.raises(ValidationError):
+        registry.validate({'dmp': {}})
+
+
+def test_validate_stream(base_app, madmp):
+    """Test validating a maDMP one dataset at a time."""
+    pytest.importorskip('ijson')
+    from invenio_madmp.streaming import MaDMPStream
+
+    registry = base_app.extensions['invenio-madmp'].schemas
+
+    stream = MaDMPStream(io.BytesIO(json.dumps(madmp).encode('utf-8')))
+    registry.validate_stream(stream)
+    assert stream.dataset_count == 2
+    assert 'dataset' not in stream.header['dmp']
+    assert [d['title'] for d in stream.datasets()] == \
+        ['Field observations', 'Analysis software']
+
+    madmp['dmp']['dataset'][1]['personal_data'] = 'maybe'
+    stream = MaDMPStream(io.BytesIO(json.dumps(madmp).encode('utf-8')))
+    with pytest.raises(ValidationError) as exc_info:
+        registry.validate_stream(stream)
+    assert json_path(exc_info.value.absolute_path) == \
+        '$.dmp.dataset[1].personal_data'
+
+    madmp['dmp']['dataset'] = []
+    stream = MaDMPStream(io.BytesIO(json.dumps(madmp).encode('utf-8')))
+    with pytest.raises(ValidationError):
+        registry.validate_stream(stream)
+
+
+def test_validate_parallel(base_app, madmp):
+    """Test validating the datasets of a maDMP in a process pool."""
+    schemas = base_app.config['INVENIO_MADMP_SCHEMAS']
+    registry = SchemaRegistry(schemas, '1.0', processes=2,
+                              parallel_threshold=3, chunk_size=2,
+                              max_errors=0)
+
+    datasets = madmp['dmp']['dataset']
+    madmp['dmp']['dataset'] = [dict(datasets[i % 2]) for i in range(7)]
+    registry.validate(madmp)
+
+    madmp['dmp']['dataset'][2]['personal_data'] = 'maybe'
+    del madmp['dmp']['dataset'][5]['title']
+    with pytest.raises(SchemaValidationErrors) as exc_info:
+        registry.validate(madmp)
+    assert [error['path'] for error in exc_info.value.errors] == [
+        '$.dmp.dataset[2].personal_data',
+        '$.dmp.dataset[5]',
+    ]
+
+    registry.max_errors = 1
+    with pytest.raises(SchemaValidationErrors) as exc_info:
+        registry.validate(madmp)
+    assert len(exc_info.value.errors) == 1
+
+    # below the threshold the first error is raised in-process
+    registry.parallel_threshold = 8
+    with pytest.raises(ValidationError) as exc_info:
+        registry.validate(madmp)
+    assert not isinstance(exc_info.value, SchemaValidationErrors)
+
+
+def test_max_errors(base_app, madmp):
+    """Test stopping at the first error or collecting several."""
+    schemas = base_app.config['INVENIO_MADMP_SCHEMAS']
+    madmp['dmp']['dataset'][0]['personal_data'] = 'maybe'
+    madmp['dmp']['dataset'][1]['sensitive_data'] = 'maybe'
+    madmp['dmp']['contact']['mbox'] = 'not an email'
+
+    registry = SchemaRegistry(schemas, '1.0', max_errors=2)
+    with pytest.raises(SchemaValidationErrors) as exc_info:
+        registry.validate(madmp)
+    assert len(exc_info.value.errors) == 2
+
+    registry.max_errors = 0
+    with pytest.raises(SchemaValidationErrors) as exc_info:
+        registry.validate(madmp)
+    assert sorted(error['path'] for error in exc_info.value.errors) == [
+        '$.dmp.contact.mbox',
+        '$.dmp.dataset[0].personal_data',
+        '$.dmp.dataset[1].sensitive_data',
+    ]
+
+    registry = SchemaRegistry(schemas, '1.0', formats=['date'],
+                              max_errors=0)
+    with pytest.raises(SchemaValidationErrors) as exc_info:
+        registry.validate(madmp)
+    assert len(exc_info.value.errors) == 2
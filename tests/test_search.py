@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Faceted search and title suggestion tests."""
+
+from __future__ import absolute_import, print_function
+
+import pytest
+
+from invenio_madmp.cache import MemoryCacheBackend
+from invenio_madmp.search import InvalidCursor, SearchCache, decode_cursor, \
+    encode_cursor, normalise_filters, search, suggest
+
+
+class Client(object):
+    """Elasticsearch client returning two hits and recording the requests."""
+
+    def __init__(self):
+        """Client constructor."""
+        self.bodies = []
+
+    def search(self, index, body):
+        """Search an index."""
+        self.bodies.append(body)
+        if 'suggest' in body:
+            return {'suggest': {'title': [{'options': [
+                {'text': 'Test data', '_source': {'id': '1'}},
+                {'text': 'Test plan', '_source': {'id': '2'}},
+            ]}]}}
+
+        response = {
+            'hits': {
+                'total': {'value': 3, 'relation': 'eq'},
+                'hits': [
+                    {'_id': 'a', '_source': {'id': '1'}, 'sort': [2, '1']},
+                    {'_id': 'b', '_source': {'id': '2'}, 'sort': [1, '2']},
+                ],
+            },
+        }
+        if 'aggs' in body:
+            response['aggregations'] = {
+                facet: {'buckets': [{'key': 'no', 'doc_count': 3}]}
+                for facet in body['aggs']
+            }
+        return response
+
+
+def test_normalise_filters():
+    """Test equal filter sets are normalised to the same filters."""
+    assert normalise_filters({
+        'upload_type': ['dataset'],
+        'license': ['CC0-1.0', 'CC-BY-4.0', 'CC0-1.0'],
+        'personal_data': [],
+    }) == normalise_filters({
+        'license': ['CC-BY-4.0', 'CC0-1.0'],
+        'upload_type': ['dataset'],
+    }) == (('license', ('CC-BY-4.0', 'CC0-1.0')),
+           ('upload_type', ('dataset',)))
+
+
+def test_cursor():
+    """Test cursors are decoded to the sort values of the last hit."""
+    assert decode_cursor(encode_cursor(['2020-01-01', '12'])) == \
+        ['2020-01-01', '12']
+
+    for cursor in ('not a cursor', encode_cursor(['2020-01-01']),
+                   encode_cursor({'id': 1})):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor)
+
+
+def test_search():
+    """Test hits are paginated and facet counts are cached until a write."""
+    client = Client()
+    cache = SearchCache(MemoryCacheBackend())
+
+    result = search(client, 'records', filters={'license': ['CC0-1.0']},
+                    size=2, facet_cache=cache)
+    assert result['total'] == 3
+    assert [hit['id'] for hit in result['hits']] == ['a', 'b']
+    assert result['facets']['license'] == [{'key': 'no', 'doc_count': 3}]
+    assert decode_cursor(result['next']) == [1, '2']
+
+    query = client.bodies[0]['query']['bool']
+    assert query['must'] == [{'match_all': {}}]
+    assert query['filter'] == [{'terms': {'license': ['CC0-1.0']}}]
+    assert 'search_after' not in client.bodies[0]
+
+    page = search(client, 'records', filters={'license': ['CC0-1.0']},
+                  size=2, search_after=result['next'], facet_cache=cache)
+    assert page['facets'] == result['facets']
+    assert client.bodies[1]['search_after'] == [1, '2']
+    assert 'aggs' not in client.bodies[1]
+
+    search(client, 'records', q='title:test', size=2, facet_cache=cache)
+    assert 'aggs' in client.bodies[2]
+
+    cache.invalidate()
+    search(client, 'records', filters={'license': ['CC0-1.0']}, size=2,
+           facet_cache=cache)
+    assert 'aggs' in client.bodies[3]
+
+    assert search(client, 'records', size=3)['next'] is None
+
+
+def test_suggest():
+    """Test titles are completed in the context of owners and cached."""
+    client = Client()
+    cache = SearchCache(MemoryCacheBackend(), prefix='madmp:suggest')
+
+    assert suggest(client, 'records', 'Tes', owners=[2, 1], cache=cache) == [
+        {'id': '1', 'title': 'Test data'},
+        {'id': '2', 'title': 'Test plan'},
+    ]
+    completion = client.bodies[0]['suggest']['title']['completion']
+    assert client.bodies[0]['suggest']['title']['prefix'] == 'Tes'
+    assert completion['field'] == 'suggest_title'
+    assert completion['contexts'] == {'owner': ['1', '2']}
+
+    suggest(client, 'records', 'tes', owners=[1, 2], cache=cache)
+    assert len(client.bodies) == 1
+
+    suggest(client, 'records', 'tes', cache=cache)
+    assert 'contexts' not in client.bodies[1]['suggest']['title']['completion']
+
+    cache.invalidate()
+    suggest(client, 'records', 'tes', owners=[1, 2], cache=cache)
+    assert len(client.bodies) == 3
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Export serializer tests."""
+
+from __future__ import absolute_import, print_function
+
+import csv
+import io
+import json
+
+from invenio_madmp.mapping import extractor
+from invenio_madmp.serializers import DatasetCSVSerializer, \
+    MaDMPJSONLDSerializer, MaDMPJSONSerializer, Serializer, \
+    SerializerRegistry
+
+
+def test_json(madmp):
+    """Test records are serialized back to the maDMP."""
+    records = extractor.extract(madmp)
+    serializer = MaDMPJSONSerializer()
+
+    output = ''.join(serializer.serialize(records))
+    assert output.endswith('\n')
+    document = json.loads(output)
+    assert document['dmp']['dmp_id'] == madmp['dmp']['dmp_id']
+    assert [dataset['title'] for dataset in document['dmp']['dataset']] == \
+        [dataset['title'] for dataset in madmp['dmp']['dataset']]
+    assert serializer.filename({'title': 'My data'}) == 'My_data-maDMP.json'
+
+
+def test_jsonld(madmp):
+    """Test the JSON-LD context is added to the maDMP."""
+    serializer = MaDMPJSONLDSerializer()
+    document = json.loads(''.join(serializer.serialize(extractor.extract(madmp))))
+
+    assert '@vocab' in document['@context']
+    assert document['dmp']['dmp_id'] == madmp['dmp']['dmp_id']
+    assert serializer.filename({'title': 'x'}).endswith('.jsonld')
+
+
+def test_csv(madmp):
+    """Test every dataset is one CSV row."""
+    serializer = DatasetCSVSerializer()
+    chunks = list(serializer.serialize(extractor.extract(madmp)))
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+
+    assert len(chunks) == len(rows) == 3
+    assert tuple(rows[0]) == DatasetCSVSerializer.columns
+    assert rows[1][0] == madmp['dmp']['dmp_id']['identifier']
+    assert rows[2][2] == madmp['dmp']['dataset'][1]['title']
+
+
+def test_registry(base_app):
+    """Test the configured serializers are built with the application."""
+    serializers = base_app.extensions['invenio-madmp'].serializers
+    assert set(serializers) == {'json', 'jsonld', 'csv'}
+    assert isinstance(serializers.get('csv'), DatasetCSVSerializer)
+    assert serializers.get('xml') is None
+
+    registry = SerializerRegistry()
+    registry.load(base_app, {'x': Serializer})
+    assert 'x' in registry
+    assert isinstance(registry.get('x'), Serializer)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Sotiris.
+#
+# invenio-maDMP is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Record lookup and conditional request tests."""
+
+from __future__ import absolute_import, print_function
+
+import uuid
+from datetime import datetime
+
+import pytest
+from flask import make_response
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_records.api import Record
+
+from invenio_madmp.proxies import current_madmp
+from invenio_madmp.views import blueprint, conditional, get_record_metadata, \
+    get_record_revision, is_fresh, record_etag
+
+UPDATED = datetime(2020, 3, 14, 10, 53, 49, 123456)
+
+
+@pytest.fixture(scope='module', name='create_app')
+def api_app_factory(create_api_app):
+    """Test the views with the records and PID store models."""
+    def factory(**config):
+        app = create_api_app(**config)
+        app.register_blueprint(blueprint)
+        return app
+    return factory
+
+
+def create_record(db, data):
+    """Create a record with a registered numeric recid."""
+    rec_id = str(uuid.uuid4().int % 10 ** 12)
+    record = Record.create(data)
+    PersistentIdentifier.create('recid', rec_id, object_type='rec',
+                                object_uuid=record.id,
+                                status=PIDStatus.REGISTERED)
+    db.session.commit()
+    return rec_id, record
+
+
+def test_record_lookup(base_app, db):
+    """Test records are found by their registered recid."""
+    rec_id, record = create_record(db, {'title': 'Lookup'})
+
+    metadata = get_record_metadata(rec_id)
+    assert metadata['id'] == record.id
+    assert metadata['json'] == {'title': 'Lookup'}
+    assert metadata['version_id'] == record.model.version_id
+    assert get_record_revision(rec_id) == (0, record.updated)
+
+    record['title'] = 'Changed'
+    record.commit()
+    db.session.commit()
+    assert get_record_metadata(rec_id)['json'] == {'title': 'Changed'}
+    assert get_record_revision(rec_id) == (1, record.updated)
+    assert record.revision_id == 1
+
+    assert get_record_metadata(uuid.uuid4().hex) is None
+    assert get_record_revision(uuid.uuid4().hex) is None
+
+    # Deleted records keep their row and PID, without JSON
+    record.delete()
+    db.session.commit()
+    assert get_record_metadata(rec_id) is None
+    assert get_record_revision(rec_id) is None
+
+
+def test_is_fresh(base_app):
+    """Test the conditional headers are compared with the record revision."""
+    etag = record_etag(1, 2, 'download')
+
+    with base_app.test_request_context():
+        assert not is_fresh(etag, UPDATED)
+
+    with base_app.test_request_context(
+            headers={'If-None-Match': '"1-2-download"'}):
+        assert is_fresh(etag, UPDATED)
+    with base_app.test_request_context(headers={'If-None-Match': '*'}):
+        assert is_fresh(etag, UPDATED)
+    with base_app.test_request_context(headers={
+            'If-None-Match': '"1-1-download"',
+            'If-Modified-Since': 'Sat, 14 Mar 2020 10:53:49 GMT'}):
+        assert not is_fresh(etag, UPDATED)
+
+    with base_app.test_request_context(headers={
+            'If-Modified-Since': 'Sat, 14 Mar 2020 10:53:49 GMT'}):
+        assert is_fresh(etag, UPDATED)
+    with base_app.test_request_context(headers={
+            'If-Modified-Since': 'Sat, 14 Mar 2020 10:53:48 GMT'}):
+        assert not is_fresh(etag, UPDATED)
+
+
+def test_conditional(base_app):
+    """Test the validators are added to responses."""
+    with base_app.test_request_context():
+        response = conditional(make_response(''), '1-2-download', UPDATED)
+
+    assert response.headers['ETag'] == '"1-2-download"'
+    assert response.headers['Last-Modified'] == 'Sat, 14 Mar 2020 10:53:49 GMT'
+
+
+def test_download(base_app, db):
+    """Test downloads are cached per revision and validated."""
+    rec_id, record = create_record(db, {'title': 'Cached'})
+    url = '/madmp/{0}/export/csv/download'.format(rec_id)
+    etag = '"{0}-0-download.csv"'.format(rec_id)
+
+    with base_app.test_client() as client:
+        res = client.get(url)
+        assert res.status_code == 200
+        assert res.headers['ETag'] == etag
+        assert 'Cached' in res.get_data(as_text=True)
+
+        res = client.get(url, headers={'If-None-Match': etag})
+        assert res.status_code == 304
+
+        # A value cached for an older revision is not returned
+        record['title'] = 'Changed'
+        record.commit()
+        db.session.commit()
+        current_madmp.record_cache.set(rec_id, 0, 'download.csv', {
+            'body': 'stale', 'filename': 'stale.csv'})
+
+        res = client.get(url, headers={'If-None-Match': etag})
+        assert res.status_code == 200
+        assert res.headers['ETag'] == '"{0}-1-download.csv"'.format(rec_id)
+        assert 'Changed' in res.get_data(as_text=True)
+
+        current_madmp.record_cache.set(rec_id, 1, 'download.csv', {
+            'body': 'cached', 'filename': 'cached.csv'})
+        assert client.get(url).get_data(as_text=True) == 'cached'
+
+        record.delete()
+        db.session.commit()
+        assert client.get(url).status_code == 404